@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from booking import Booking
+from exceptions import ServiceBusyError
+from logica import Seat
+from payments import Payment
+from theater import Theater
+from write_queue import STOP, WriteQueue
+
+WRITE_QUEUE_SIZE = 100
+READ_WORKERS = 4
+
+
+class DatabaseExecutor:
+    """
+    Выполнение операций с БД вне event loop.
+
+    Все записи выполняет один поток-писатель из ограниченной очереди,
+    поэтому они не конкурируют за блокировку записи SQLite. Чтения
+    идут в пул из readers потоков.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = WRITE_QUEUE_SIZE,
+        readers: int = READ_WORKERS,
+    ) -> None:
+        self._writes = WriteQueue("Исполнитель закрыт.", maxsize=queue_size)
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+        self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def pending_writes(self) -> int:
+        """Количество записей в очереди."""
+        return self._writes.qsize()
+
+    def submit_write(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Поставить запись в очередь без ожидания.
+
+        Бросает:
+            ServiceBusyError: если очередь заполнена.
+            RuntimeError: если исполнитель закрыт.
+        """
+        future: Future = Future()
+        try:
+            self._writes.put(future, func, args, kwargs)
+        except queue.Full:
+            raise ServiceBusyError("Очередь записи переполнена.") from None
+        return future
+
+    def submit_read(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Выполнить чтение в пуле читателей."""
+        return self._readers.submit(func, *args, **kwargs)
+
+    def close(self) -> None:
+        """Дождаться выполнения поставленных записей и остановить потоки."""
+        if self._writes.close(self._writer):
+            self._readers.shutdown(wait=True)
+
+    def _write_loop(self) -> None:
+        """Цикл потока-писателя."""
+        while True:
+            item = self._writes.get()
+            if item is STOP:
+                return
+            future, func, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as error:
+                future.set_exception(error)
+
+
+class AsyncBookingService:
+    """
+    Асинхронный фасад над Booking, Payment, Theater и Seat.
+
+    Методы — корутины; работа с SQLite выполняется в DatabaseExecutor.
+    Не больше queue_size записей одновременно ждут выполнения: новые
+    корутины ждут свободного места (обратное давление), а если задан
+    submit_timeout и место не освободилось за это время, получают
+    ServiceBusyError.
+
+    Использование:
+        async with AsyncBookingService() as service:
+            booking_id = await service.create(theater_id, "Иван", [(1, 1)])
+    """
+
+    def __init__(
+        self,
+        queue_size: int = WRITE_QUEUE_SIZE,
+        readers: int = READ_WORKERS,
+        submit_timeout: Optional[float] = None,
+    ) -> None:
+        self.submit_timeout = submit_timeout
+        self._executor = DatabaseExecutor(queue_size, readers)
+        self._write_slots = asyncio.Semaphore(queue_size)
+        self._read_slots = asyncio.Semaphore(queue_size)
+        self._stats = {"writes": 0, "reads": 0, "rejected": 0}
+
+    async def __aenter__(self) -> AsyncBookingService:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Счётчики выполненных записей, чтений и отказов."""
+        return {**self._stats, "pending_writes": self._executor.pending_writes}
+
+    async def create(
+        self,
+        theater_id: int,
+        guest_name: str,
+        seat_positions: List[Tuple[int, int]],
+        guest_email: str = "",
+    ) -> int:
+        """Создать бронирование (см. Booking.create)."""
+        return await self._write(
+            Booking.create, theater_id, guest_name, seat_positions, guest_email
+        )
+
+    async def create_best_available(
+        self,
+        theater_id: int,
+        guest_name: str,
+        seats_count: int,
+        guest_email: str = "",
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """Забронировать лучшие свободные места (см. Booking.create_best_available)."""
+        return await self._write(
+            Booking.create_best_available,
+            theater_id,
+            guest_name,
+            seats_count,
+            guest_email,
+            preferences,
+        )
+
+    async def confirm(self, booking_id: int) -> None:
+        """Подтвердить бронирование (см. Booking.confirm)."""
+        await self._write(Booking.confirm, booking_id)
+
+    async def cancel(self, booking_id: int) -> None:
+        """Отменить бронирование (см. Booking.cancel)."""
+        await self._write(Booking.cancel, booking_id)
+
+    async def process_payment(
+        self,
+        booking_id: int,
+        amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> int:
+        """Обработать платёж (см. Payment.process)."""
+        return await self._write(Payment.process, booking_id, amount, idempotency_key)
+
+    async def seat_map(self, theater_id: int) -> Dict[Tuple[int, int], str]:
+        """Статусы всех мест сеанса (см. Seat.get_statuses)."""
+        return await self._read(Seat.get_statuses, theater_id)
+
+    async def render_seat_map(self, theater_id: int) -> Optional[str]:
+        """Текстовая схема зала (см. Theater.render_seat_map)."""
+        return await self._read(Theater.render_seat_map, theater_id)
+
+    async def check_available(
+        self,
+        theater_id: int,
+        seat_positions: List[Tuple[int, int]],
+    ) -> bool:
+        """Проверить, что все места свободны (см. Seat.check_available)."""
+        return await self._read(Seat.check_available, theater_id, seat_positions)
+
+    async def search(self, **filters: Any) -> List[Tuple[Any, ...]]:
+        """Найти сеансы со свободными местами (см. Theater.search)."""
+        return await self._read(Theater.search, **filters)
+
+    async def close(self) -> None:
+        """Дождаться поставленных операций и остановить потоки."""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.close)
+
+    async def _write(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполнить запись через поток-писатель."""
+        await self._acquire(self._write_slots)
+        try:
+            result = await asyncio.wrap_future(self._executor.submit_write(func, *args))
+        finally:
+            self._write_slots.release()
+        self._stats["writes"] += 1
+        return result
+
+    async def _read(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Выполнить чтение в пуле читателей."""
+        await self._acquire(self._read_slots)
+        try:
+            result = await asyncio.wrap_future(self._executor.submit_read(func, *args, **kwargs))
+        finally:
+            self._read_slots.release()
+        self._stats["reads"] += 1
+        return result
+
+    async def _acquire(self, slots: asyncio.Semaphore) -> None:
+        """
+        Занять место в очереди, ожидая не дольше submit_timeout.
+
+        Бросает:
+            ServiceBusyError: если место не освободилось вовремя.
+        """
+        if self.submit_timeout is None:
+            await slots.acquire()
+            return
+        try:
+            await asyncio.wait_for(slots.acquire(), self.submit_timeout)
+        except asyncio.TimeoutError:
+            self._stats["rejected"] += 1
+            raise ServiceBusyError("Очередь операций переполнена.") from None
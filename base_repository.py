@@ -1,10 +1,87 @@
 from __future__ import annotations
 
 import sqlite3
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from db_init import get_db
+from db_init import add_reset_hook, get_db, on_commit
+
+
+class RepositoryCache:
+    """
+    Ограниченный LRU кэш строк таблицы по ID с необязательным TTL.
+
+    Инвалидация увеличивает поколение кэша; строка, прочитанная из БД
+    до инвалидации, не попадёт в кэш (см. generation/put).
+    """
+
+    def __init__(self, size: int, ttl: Optional[float] = None) -> None:
+        self.size = size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[float, Tuple[Any, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def generation(self) -> int:
+        """Номер поколения; меняется при каждой инвалидации."""
+        return self._generation
+
+    def get(self, entity_id: int) -> Optional[Tuple[Any, ...]]:
+        """Вернуть строку из кэша или None (промах)."""
+        with self._lock:
+            entry = self._entries.get(entity_id)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[entity_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entity_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, entity_id: int, row: Tuple[Any, ...], generation: int) -> None:
+        """Сохранить строку, если с момента чтения не было инвалидаций."""
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[entity_id] = (expires_at, row)
+            self._entries.move_to_end(entity_id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, entity_ids: Optional[Iterable[int]] = None) -> None:
+        """Удалить указанные строки (или все при None) из кэша."""
+        with self._lock:
+            self._generation += 1
+            if entity_ids is None:
+                self._entries.clear()
+                return
+            for entity_id in entity_ids:
+                self._entries.pop(entity_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """Счётчики попаданий, промахов, вытеснений и текущий размер."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+
+_caches: Dict[str, RepositoryCache] = {}
+_caches_lock = threading.Lock()
 
 
 class BaseRepository(ABC):
@@ -15,8 +92,19 @@ class BaseRepository(ABC):
     Дочерние классы должны переопределить:
         - table_name: название таблицы
         - field_mapping: маппинг полей из БД в словарь
+
+    Чтение get() можно кэшировать в памяти процесса, задав в дочернем
+    классе cache_size > 0 (и при необходимости cache_ttl в секундах).
+    Если в строке есть часто меняющиеся колонки, в cache_columns
+    перечисляются стабильные: тогда кэшируется только get_cached(),
+    а get() всегда читает строку из БД. Код, меняющий кэшируемые
+    колонки в обход delete(), должен вызывать invalidate_cache().
     """
 
+    cache_size: int = 0
+    cache_ttl: Optional[float] = None
+    cache_columns: Optional[str] = None
+
     @property
     @abstractmethod
     def table_name(self) -> str:
@@ -59,7 +147,30 @@ class BaseRepository(ABC):
     def get(self, entity_id: int) -> Optional[Tuple[Any, ...]]:
         """Получить одну сущность по ID."""
         query = f"SELECT * FROM {self.table_name} WHERE id = ?"
-        return self.execute_query(query, (entity_id,), fetch_one=True)
+        if self.cache_size <= 0 or self.cache_columns is not None:
+            return self.execute_query(query, (entity_id,), fetch_one=True)
+        return self._cached_select(query, entity_id)
+
+    def get_cached(self, entity_id: int) -> Optional[Tuple[Any, ...]]:
+        """Получить кэшируемые колонки сущности (cache_columns, иначе всю строку)."""
+        if self.cache_columns is None:
+            return self.get(entity_id)
+        query = f"SELECT {self.cache_columns} FROM {self.table_name} WHERE id = ?"
+        if self.cache_size <= 0:
+            return self.execute_query(query, (entity_id,), fetch_one=True)
+        return self._cached_select(query, entity_id)
+
+    def _cached_select(self, query: str, entity_id: int) -> Optional[Tuple[Any, ...]]:
+        """Выполнить выборку одной строки по ID через кэш таблицы."""
+        cache = self._cache()
+        row = cache.get(entity_id)
+        if row is not None:
+            return row
+        generation = cache.generation
+        row = self.execute_query(query, (entity_id,), fetch_one=True)
+        if row is not None:
+            cache.put(entity_id, row, generation)
+        return row
 
     def get_all(self) -> List[Tuple[Any, ...]]:
         """Получить все сущности."""
@@ -71,6 +182,7 @@ class BaseRepository(ABC):
         """Удалить сущность по ID."""
         query = f"DELETE FROM {self.table_name} WHERE id = ?"
         self.execute_query(query, (entity_id,))
+        self.invalidate_cache(self.table_name, [entity_id])
 
     def to_dict(
             self,
@@ -80,3 +192,43 @@ class BaseRepository(ABC):
         if entity is None:
             return None
         return {key: entity[idx] for idx, key in self.field_mapping.items()}
+
+    @staticmethod
+    def invalidate_cache(
+            table_name: str,
+            entity_ids: Optional[Iterable[int]] = None,
+    ) -> None:
+        """
+        Сбросить закэшированные строки таблицы (все при entity_ids=None).
+
+        Внутри get_db() сброс откладывается до commit, чтобы
+        параллельное чтение не вернуло в кэш старую версию строки.
+        """
+        cache = _caches.get(table_name)
+        if cache is None:
+            return
+        ids = None if entity_ids is None else list(entity_ids)
+        on_commit(lambda: cache.invalidate(ids))
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Dict[str, int]]:
+        """Статистика кэшей по таблицам."""
+        return {table: cache.stats() for table, cache in _caches.items()}
+
+    @staticmethod
+    def clear_caches() -> None:
+        """Очистить все кэши и их счётчики."""
+        with _caches_lock:
+            _caches.clear()
+
+    def _cache(self) -> RepositoryCache:
+        """Вернуть кэш таблицы, создав его при первом обращении."""
+        with _caches_lock:
+            cache = _caches.get(self.table_name)
+            if cache is None:
+                cache = RepositoryCache(self.cache_size, self.cache_ttl)
+                _caches[self.table_name] = cache
+            return cache
+
+
+add_reset_hook(BaseRepository.clear_caches)
@@ -0,0 +1,551 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from booking import Booking
+from db_init import (
+    MEMORY_DB,
+    clear_db,
+    configure_database,
+    configure_pool,
+    configure_profile,
+    get_database,
+    get_db,
+    get_profile,
+)
+from exceptions import BookingError, PaymentError
+from logica import Movie, Seat
+from payments import Payment
+from theater import Theater
+
+BENCH_DB_NAME = "cinema_bench.db"
+RESULTS_FILE = "benchmark_results.json"
+OPERATIONS = ("create", "pay", "confirm", "cancel", "flow")
+PROFILES = ("default", "durable", "throughput")
+
+
+def seed(
+    movies: int = 10,
+    sessions_per_movie: int = 5,
+    rows: int = 10,
+    cols: int = 20,
+    seed_value: int = 0,
+    seat_storage: str = Seat.STORAGE_ROWS,
+) -> List[int]:
+    """
+    Создать фильмы и сеансы для нагрузки и вернуть ID сеансов.
+
+    Данные детерминированы при одинаковом seed_value.
+    """
+    rng = random.Random(seed_value)
+    movie_ids = [
+        Movie.add(f"Фильм {index}", rng.randint(80, 180), round(rng.uniform(4, 9.5), 1))
+        for index in range(movies)
+    ]
+    sessions = [
+        {
+            "movie_id": movie_id,
+            "rows": rows,
+            "cols": cols,
+            "price": float(rng.randrange(200, 600, 50)),
+            "schedule": f"2025-01-{day + 1:02d}T{rng.randint(10, 23):02d}:00:00",
+            "seat_storage": seat_storage,
+        }
+        for movie_id in movie_ids
+        for day in range(sessions_per_movie)
+    ]
+    return [theater_id for theater_id in Theater.add_many(sessions) if theater_id is not None]
+
+
+def run_benchmark(
+    threads: int = 8,
+    processes: int = 1,
+    operations: int = 200,
+    hot_sessions: int = 2,
+    hot_share: float = 0.8,
+    seats_per_booking: int = 2,
+    cancel_rate: float = 0.2,
+    movies: int = 10,
+    sessions_per_movie: int = 5,
+    rows: int = 10,
+    cols: int = 20,
+    seat_storage: str = Seat.STORAGE_ROWS,
+    seed_value: int = 0,
+    db_name: str = BENCH_DB_NAME,
+    label: str = "",
+) -> Dict[str, Any]:
+    """
+    Прогнать нагрузку create → process → confirm/cancel на отдельной БД.
+
+    operations — количество сценариев на поток; потоки запускаются в
+    каждом из processes процессов. Доля hot_share сценариев идёт в
+    первые hot_sessions сеансов, чтобы создать конкуренцию за места.
+
+    db_name — цель БД для configure_database(); in-memory БД
+    (MEMORY_DB) доступна только при processes=1.
+
+    Возвращает результат: настройки, пропускную способность,
+    перцентили задержек по операциям, долю конфликтов, ошибки и
+    нарушения целостности (см. check_integrity).
+
+    Бросает:
+        ValueError: если in-memory БД запрошена для нескольких процессов.
+    """
+    if db_name == MEMORY_DB and processes > 1:
+        raise ValueError("In-memory БД недоступна из других процессов.")
+    config = {
+        "threads": threads,
+        "processes": processes,
+        "operations": operations,
+        "hot_sessions": hot_sessions,
+        "hot_share": hot_share,
+        "seats_per_booking": seats_per_booking,
+        "cancel_rate": cancel_rate,
+        "movies": movies,
+        "sessions_per_movie": sessions_per_movie,
+        "rows": rows,
+        "cols": cols,
+        "seat_storage": seat_storage,
+        "seed": seed_value,
+    }
+    with _use_database(db_name):
+        clear_db()
+        theater_ids = seed(movies, sessions_per_movie, rows, cols, seed_value, seat_storage)
+
+        started = time.perf_counter()
+        worker_args = [
+            (get_database(), theater_ids, config, seed_value * 1000 + index)
+            for index in range(processes)
+        ]
+        if processes == 1:
+            partials = [_process_worker(worker_args[0])]
+        else:
+            context = multiprocessing.get_context("spawn")
+            with context.Pool(processes) as pool:
+                partials = pool.map(_process_worker, worker_args)
+        elapsed = time.perf_counter() - started
+
+        violations = check_integrity()
+
+    totals = _merge(partials)
+    attempts = totals["attempts"]
+    return {
+        "label": label,
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "config": config,
+        "seconds": elapsed,
+        "attempts": attempts,
+        "completed": totals["completed"],
+        "throughput": totals["completed"] / elapsed if elapsed > 0 else 0.0,
+        "conflicts": totals["conflicts"],
+        "conflict_rate": totals["conflicts"] / attempts if attempts else 0.0,
+        "errors": totals["errors"],
+        "latency_ms": {
+            operation: summarize(samples) for operation, samples in totals["latency"].items()
+        },
+        "violations": violations,
+    }
+
+
+def run_profile_benchmark(
+    profiles: Tuple[str, ...] = PROFILES,
+    readers: int = 4,
+    writers: int = 2,
+    duration: float = 2.0,
+    rows: int = 10,
+    cols: int = 20,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Сравнить профили PRAGMA при одновременном чтении и записи.
+
+    Для каждого профиля создаётся новый временный файл БД. writers
+    потоков в течение duration секунд бронируют и отменяют места,
+    readers потоков читают карту мест и ищут сеансы. Возвращает по
+    профилю количество операций в секунду, перцентили задержек и
+    количество ошибок (например, "database is locked").
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    previous_profile = get_profile()
+    for profile in profiles:
+        with tempfile.TemporaryDirectory() as directory, _use_database(
+            os.path.join(directory, "profile.db")
+        ):
+            configure_profile(profile)
+            configure_pool(readers + writers)
+            try:
+                clear_db()
+                theater_ids = seed(1, 4, rows, cols)
+                results[profile] = _run_mixed_load(
+                    theater_ids, readers, writers, duration, rows, cols
+                )
+            finally:
+                configure_profile(previous_profile)
+    return results
+
+
+def _run_mixed_load(
+    theater_ids: List[int],
+    readers: int,
+    writers: int,
+    duration: float,
+    rows: int,
+    cols: int,
+) -> Dict[str, Any]:
+    """Одновременно читать и писать duration секунд; вернуть итоги."""
+    deadline = time.perf_counter() + duration
+    latency: Dict[str, List[float]] = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def write(worker_seed: int) -> None:
+        rng = random.Random(worker_seed)
+        while time.perf_counter() < deadline:
+            position = (rng.randint(1, rows), rng.randint(1, cols))
+            started = time.perf_counter()
+            try:
+                booking_id = Booking.create(rng.choice(theater_ids), "Гость", [position])
+                Booking.cancel(booking_id)
+            except BookingError:
+                continue
+            except sqlite3.Error:
+                with lock:
+                    errors["write"] += 1
+                continue
+            with lock:
+                latency["write"].append((time.perf_counter() - started) * 1000)
+
+    def read(worker_seed: int) -> None:
+        rng = random.Random(worker_seed)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                Seat.get_statuses(rng.choice(theater_ids))
+                Theater.search(min_free=1, limit=10)
+            except sqlite3.Error:
+                with lock:
+                    errors["read"] += 1
+                continue
+            with lock:
+                latency["read"].append((time.perf_counter() - started) * 1000)
+
+    workers = [
+        threading.Thread(target=write, args=(index,)) for index in range(writers)
+    ] + [
+        threading.Thread(target=read, args=(1000 + index,)) for index in range(readers)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return {
+        # Одна запись — создание и отмена брони (две транзакции).
+        "writes_per_sec": len(latency["write"]) / duration,
+        "reads_per_sec": len(latency["read"]) / duration,
+        "write_ms": summarize(latency["write"]),
+        "read_ms": summarize(latency["read"]),
+        "errors": errors,
+    }
+
+
+def check_integrity() -> Dict[str, int]:
+    """
+    Проверить, что одно место не продано дважды и счётчики сходятся.
+
+    Возвращает количество нарушений по видам:
+        seat_count: активные брони, у которых занято не столько мест,
+            сколько оплачено (место перехвачено другой бронью);
+        orphan_seats: места, занятые отменёнными или истекшими бронями;
+        status: места со статусом, не соответствующим статусу брони;
+        occupancy: сеансы с разошедшимися счётчиками заполненности.
+    """
+    with get_db() as cursor:
+        seat_count = cursor.execute(
+            """
+            SELECT COUNT(*) FROM bookings b
+            JOIN theaters t ON t.id = b.theater_id
+            WHERE b.status IN (?, ?)
+              AND ROUND(b.total_price / t.price) != (
+                  (SELECT COUNT(*) FROM seats s WHERE s.booking_id = b.id)
+                  + (SELECT COUNT(*) FROM seat_holds h WHERE h.booking_id = b.id)
+              )
+            """,
+            (Booking.STATUS_PENDING, Booking.STATUS_CONFIRMED),
+        ).fetchone()[0]
+        orphan_seats = cursor.execute(
+            """
+            SELECT COUNT(*) FROM (
+                SELECT booking_id FROM seats WHERE booking_id IS NOT NULL
+                UNION ALL
+                SELECT booking_id FROM seat_holds
+            ) held
+            JOIN bookings b ON b.id = held.booking_id
+            WHERE b.status NOT IN (?, ?)
+            """,
+            (Booking.STATUS_PENDING, Booking.STATUS_CONFIRMED),
+        ).fetchone()[0]
+        status = cursor.execute(
+            """
+            SELECT COUNT(*) FROM seats s JOIN bookings b ON b.id = s.booking_id
+            WHERE (s.status = ? AND b.status != ?)
+               OR (s.status = ? AND b.status != ?)
+            """,
+            (
+                Seat.STATUS_SOLD,
+                Booking.STATUS_CONFIRMED,
+                Seat.STATUS_RESERVED,
+                Booking.STATUS_PENDING,
+            ),
+        ).fetchone()[0]
+    return {
+        "seat_count": seat_count,
+        "orphan_seats": orphan_seats,
+        "status": status,
+        "occupancy": len(Theater.check_occupancy()),
+    }
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Количество, среднее и перцентили p50/p95/p99 выборки задержек, мс."""
+    if not samples:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": percentile(ordered, 50),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1],
+    }
+
+
+def percentile(ordered: List[float], percent: float) -> float:
+    """Перцентиль отсортированной выборки методом ближайшего ранга."""
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Сравнить два результата run_benchmark().
+
+    Возвращает относительное изменение пропускной способности и
+    перцентилей по операциям (0.1 — на 10% больше, чем в baseline).
+    """
+
+    def change(old: float, new: float) -> Optional[float]:
+        return (new - old) / old if old else None
+
+    latency: Dict[str, Dict[str, Optional[float]]] = {}
+    for operation, stats in current["latency_ms"].items():
+        old = baseline["latency_ms"].get(operation)
+        if old is None:
+            continue
+        latency[operation] = {
+            key: change(old[key], stats[key]) for key in ("p50", "p95", "p99")
+        }
+    return {
+        "throughput": change(baseline["throughput"], current["throughput"]),
+        "conflict_rate": current["conflict_rate"] - baseline["conflict_rate"],
+        "latency": latency,
+    }
+
+
+def _process_worker(args: Tuple[str, List[int], Dict[str, Any], int]) -> Dict[str, Any]:
+    """Запустить потоки нагрузки в текущем процессе и вернуть их итоги."""
+    db_name, theater_ids, config, process_seed = args
+    with _use_database(db_name):
+        results: List[Dict[str, Any]] = []
+        workers = [
+            threading.Thread(
+                target=lambda worker_seed=process_seed * 100 + index: results.append(
+                    _run_flows(theater_ids, config, worker_seed)
+                ),
+                name=f"bench-{index}",
+            )
+            for index in range(config["threads"])
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    return _merge(results)
+
+
+def _run_flows(theater_ids: List[int], config: Dict[str, Any], worker_seed: int) -> Dict[str, Any]:
+    """Выполнить сценарии одного потока."""
+    rng = random.Random(worker_seed)
+    hot = theater_ids[: config["hot_sessions"]] or theater_ids
+    latency: Dict[str, List[float]] = {operation: [] for operation in OPERATIONS}
+    totals: Dict[str, Any] = {"attempts": 0, "completed": 0, "conflicts": 0, "errors": 0}
+
+    for _ in range(config["operations"]):
+        pool = hot if rng.random() < config["hot_share"] else theater_ids
+        theater_id = rng.choice(pool)
+        row = rng.randint(1, config["rows"])
+        first = rng.randint(1, max(1, config["cols"] - config["seats_per_booking"] + 1))
+        positions = [(row, first + offset) for offset in range(config["seats_per_booking"])]
+
+        totals["attempts"] += 1
+        flow_started = time.perf_counter()
+        try:
+            started = time.perf_counter()
+            booking_id = Booking.create(theater_id, f"Гость {worker_seed}", positions)
+            latency["create"].append((time.perf_counter() - started) * 1000)
+
+            amount = Booking().get(booking_id)[5]
+            started = time.perf_counter()
+            Payment.process(booking_id, amount)
+            latency["pay"].append((time.perf_counter() - started) * 1000)
+
+            operation = "cancel" if rng.random() < config["cancel_rate"] else "confirm"
+            started = time.perf_counter()
+            if operation == "cancel":
+                Booking.cancel(booking_id)
+            else:
+                Booking.confirm(booking_id)
+            latency[operation].append((time.perf_counter() - started) * 1000)
+        except BookingError:
+            totals["conflicts"] += 1
+            continue
+        except (PaymentError, sqlite3.Error):
+            totals["errors"] += 1
+            continue
+        latency["flow"].append((time.perf_counter() - flow_started) * 1000)
+        totals["completed"] += 1
+
+    totals["latency"] = latency
+    return totals
+
+
+def _merge(partials: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Сложить итоги потоков или процессов."""
+    merged: Dict[str, Any] = {
+        "attempts": 0,
+        "completed": 0,
+        "conflicts": 0,
+        "errors": 0,
+        "latency": {operation: [] for operation in OPERATIONS},
+    }
+    for partial in partials:
+        for key in ("attempts", "completed", "conflicts", "errors"):
+            merged[key] += partial[key]
+        for operation, samples in partial["latency"].items():
+            merged["latency"][operation].extend(samples)
+    return merged
+
+
+@contextmanager
+def _use_database(db_name: str) -> Iterator[None]:
+    """Временно переключить приложение на БД db_name."""
+    previous = configure_database(db_name)
+    try:
+        yield
+    finally:
+        configure_database(previous)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Запуск из командной строки с сохранением результата в JSON."""
+    parser = argparse.ArgumentParser(description="Нагрузочный тест бронирования.")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--operations", type=int, default=200, help="сценариев на поток")
+    parser.add_argument("--hot-sessions", type=int, default=2)
+    parser.add_argument("--hot-share", type=float, default=0.8)
+    parser.add_argument("--seats", type=int, default=2, help="мест в брони")
+    parser.add_argument("--cancel-rate", type=float, default=0.2)
+    parser.add_argument("--movies", type=int, default=10)
+    parser.add_argument("--sessions-per-movie", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--cols", type=int, default=20)
+    parser.add_argument(
+        "--seat-storage",
+        choices=(Seat.STORAGE_ROWS, Seat.STORAGE_BITMAP),
+        default=Seat.STORAGE_ROWS,
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", default=BENCH_DB_NAME, help="путь, URI, :memory: или :temp:")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output", default=RESULTS_FILE)
+    parser.add_argument("--compare", help="JSON с прошлым результатом для сравнения")
+    parser.add_argument(
+        "--profiles",
+        nargs="*",
+        help="вместо сценариев сравнить профили PRAGMA (по умолчанию все из PROFILES)",
+    )
+    parser.add_argument("--duration", type=float, default=2.0, help="секунд на профиль")
+    args = parser.parse_args(argv)
+
+    if args.profiles is not None:
+        profiles = run_profile_benchmark(
+            tuple(args.profiles) or PROFILES,
+            readers=args.threads,
+            writers=max(1, args.threads // 2),
+            duration=args.duration,
+            rows=args.rows,
+            cols=args.cols,
+        )
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(profiles, file, indent=2, ensure_ascii=False)
+        for profile, stats in profiles.items():
+            print(
+                f"{profile}: записей {stats['writes_per_sec']:.0f}/с "
+                f"(p95 {stats['write_ms']['p95']:.1f} мс), "
+                f"чтений {stats['reads_per_sec']:.0f}/с "
+                f"(p95 {stats['read_ms']['p95']:.1f} мс), ошибок {stats['errors']}"
+            )
+        print(f"Результат сохранён в {args.output}")
+        return
+
+    result = run_benchmark(
+        threads=args.threads,
+        processes=args.processes,
+        operations=args.operations,
+        hot_sessions=args.hot_sessions,
+        hot_share=args.hot_share,
+        seats_per_booking=args.seats,
+        cancel_rate=args.cancel_rate,
+        movies=args.movies,
+        sessions_per_movie=args.sessions_per_movie,
+        rows=args.rows,
+        cols=args.cols,
+        seat_storage=args.seat_storage,
+        seed_value=args.seed,
+        db_name=args.db,
+        label=args.label,
+    )
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            result["comparison"] = compare(json.load(file), result)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(result, file, indent=2, ensure_ascii=False)
+
+    flow = result["latency_ms"]["flow"]
+    print(
+        f"Сценариев: {result['completed']}/{result['attempts']}, "
+        f"{result['throughput']:.1f} в секунду; "
+        f"p50/p95/p99: {flow['p50']:.1f}/{flow['p95']:.1f}/{flow['p99']:.1f} мс; "
+        f"конфликтов: {result['conflict_rate']:.1%}, ошибок: {result['errors']}"
+    )
+    print(f"Нарушения: {result['violations']}")
+    print(f"Результат сохранён в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
-from datetime import datetime
+import sqlite3
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 from base_repository import BaseRepository
 from db_init import get_db
 from exceptions import BookingError
 from logica import Seat
+from seat_finder import find_in_transaction
 from theater import Theater
+from tracing import annotate, span, traced
+
+SEATS_LOOKUP_CHUNK = 500
+HOLD_TTL = timedelta(minutes=15)
+EXPIRE_BATCH_SIZE = 500
+BULK_CHUNK = 5000
 
 
 class Booking(BaseRepository):
@@ -36,6 +44,7 @@ class Booking(BaseRepository):
         }
 
     @staticmethod
+    @traced("booking.create")
     def create(
         theater_id: int,
         guest_name: str,
@@ -45,37 +54,122 @@ class Booking(BaseRepository):
         """
         Создать бронирование, занять места и вернуть ID брони.
 
+        Вставка брони и захват мест выполняются в одной транзакции
+        BEGIN IMMEDIATE: места занимаются одним условным UPDATE, и если
+        занято меньше мест, чем запрошено, бронь откатывается.
+
         Бросает:
             BookingError: если сеанс не найден или места уже заняты.
         """
-        theater = Theater()
-        theater_data = theater.get(theater_id)
+        with span("theater.lookup", theater_id=theater_id):
+            theater = Theater()
+            theater_data = theater.get_cached(theater_id)
         if theater_data is None:
             raise BookingError("Сеанс не найден.")
 
-        price = theater_data[4]
+        price = theater_data[0]
+        positions = list(dict.fromkeys(tuple(p) for p in seat_positions))
 
-        if not Seat.check_available(theater_id, seat_positions):
-            raise BookingError("Некоторые выбранные места недоступны.")
+        with span("booking.transaction"), get_db(immediate=True) as cursor:
+            booking_id = Booking._insert_with_seats(
+                cursor, theater_id, guest_name, guest_email, positions, price
+            )
+
+        annotate(booking_id=booking_id, seats=len(positions))
+        return booking_id
+
+    @staticmethod
+    def create_best_available(
+        theater_id: int,
+        guest_name: str,
+        seats_count: int,
+        guest_email: str = "",
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """
+        Найти лучшие свободные места, занять их и вернуть ID брони.
+
+        Поиск (seat_finder.choose_seats) и захват мест выполняются в
+        одной транзакции BEGIN IMMEDIATE, поэтому найденные места не
+        может перехватить другой покупатель.
+
+        Бросает:
+            BookingError: если сеанс не найден или свободных мест не хватает.
+        """
+        theater_data = Theater().get_cached(theater_id)
+        if theater_data is None:
+            raise BookingError("Сеанс не найден.")
+
+        with get_db(immediate=True) as cursor:
+            positions = find_in_transaction(cursor, theater_id, seats_count, preferences)
+            if not positions:
+                raise BookingError("Недостаточно свободных мест.")
+            booking_id = Booking._insert_with_seats(
+                cursor, theater_id, guest_name, guest_email, positions, theater_data[0]
+            )
+
+        return booking_id
+
+    @staticmethod
+    def create_in_transaction(
+        cursor: sqlite3.Cursor,
+        theater_id: int,
+        guest_name: str,
+        seat_positions: List[Tuple[int, int]],
+        guest_email: str = "",
+    ) -> int:
+        """
+        Создать бронирование внутри открытой транзакции (см. create).
 
-        total_price = len(seat_positions) * price
+        Бросает:
+            BookingError: если сеанс не найден или места уже заняты.
+        """
+        result = cursor.execute(
+            "SELECT price FROM theaters WHERE id = ?", (theater_id,)
+        ).fetchone()
+        if result is None:
+            raise BookingError("Сеанс не найден.")
+        positions = list(dict.fromkeys(tuple(p) for p in seat_positions))
+        return Booking._insert_with_seats(
+            cursor, theater_id, guest_name, guest_email, positions, result[0]
+        )
+
+    @staticmethod
+    def _insert_with_seats(
+        cursor: sqlite3.Cursor,
+        theater_id: int,
+        guest_name: str,
+        guest_email: str,
+        positions: List[Tuple[int, int]],
+        price: float,
+    ) -> int:
+        """
+        Вставить бронь и занять её места внутри открытой транзакции.
+
+        Бросает:
+            BookingError: если заняты не все места (транзакцию нужно откатить).
+        """
         query = """
             INSERT INTO bookings (theater_id, guest_name, guest_email,
                                   total_price, status)
             VALUES (?, ?, ?, ?, ?)
         """
-        booking_id = Booking.execute_query(
-            query,
-            (
-                theater_id,
-                guest_name,
-                guest_email,
-                total_price,
-                Booking.STATUS_PENDING,
-            ),
-        )
+        with span("booking.insert"):
+            booking_id = cursor.execute(
+                query,
+                (
+                    theater_id,
+                    guest_name,
+                    guest_email,
+                    len(positions) * price,
+                    Booking.STATUS_PENDING,
+                ),
+            ).lastrowid
 
-        Seat.reserve(theater_id, seat_positions, booking_id)
+        with span("seat.claim", seats=len(positions)):
+            claimed = Seat.claim(cursor, theater_id, positions, booking_id)
+        if claimed != len(positions):
+            raise BookingError("Некоторые выбранные места недоступны.")
         return booking_id
 
     @staticmethod
@@ -86,6 +180,7 @@ class Booking(BaseRepository):
         return result if result else []
 
     @staticmethod
+    @traced("booking.confirm")
     def confirm(booking_id: int) -> None:
         """
         Подтвердить бронирование и пометить места как проданные.
@@ -93,28 +188,38 @@ class Booking(BaseRepository):
         Бросает:
             BookingError: если бронь не найдена или статус не pending.
         """
-        booking = Booking()
-        booking_data = booking.get(booking_id)
-        if booking_data is None:
-            raise BookingError("Бронирование не найдено.")
+        annotate(booking_id=booking_id)
+        with span("booking.transaction"), get_db(immediate=True) as cursor:
+            Booking.confirm_in_transaction(cursor, booking_id)
 
-        status = booking_data[4]
-        if status != Booking.STATUS_PENDING:
-            raise BookingError(f"Бронирование уже в статусе '{status}'.")
+    @staticmethod
+    def confirm_in_transaction(cursor: sqlite3.Cursor, booking_id: int) -> None:
+        """
+        Подтвердить бронирование внутри открытой транзакции (см. confirm).
 
+        Бросает:
+            BookingError: если бронь не найдена или статус не pending.
+        """
         query = """
             UPDATE bookings
             SET status = ?, confirmed_at = ?
             WHERE id = ?
         """
-        Booking.execute_query(
-            query,
-            (Booking.STATUS_CONFIRMED, datetime.now().isoformat(), booking_id),
-        )
+        with span("booking.status_check"):
+            status = Booking._get_status(cursor, booking_id)
+        if status != Booking.STATUS_PENDING:
+            raise BookingError(f"Бронирование уже в статусе '{status}'.")
 
-        Seat.sell(booking_id)
+        with span("booking.update"):
+            cursor.execute(
+                query,
+                (Booking.STATUS_CONFIRMED, datetime.now().isoformat(), booking_id),
+            )
+        with span("seat.sell"):
+            Seat.sell_bookings(cursor, [booking_id])
 
     @staticmethod
+    @traced("booking.cancel")
     def cancel(booking_id: int) -> None:
         """
         Отменить бронирование и освободить места.
@@ -122,19 +227,18 @@ class Booking(BaseRepository):
         Бросает:
             BookingError: если бронь не найдена или уже отменена.
         """
-        booking = Booking()
-        booking_data = booking.get(booking_id)
-        if booking_data is None:
-            raise BookingError("Бронирование не найдено.")
-
-        status = booking_data[4]
-        if status == Booking.STATUS_CANCELLED:
-            raise BookingError("Бронирование уже отменено.")
-
         query = "UPDATE bookings SET status = ? WHERE id = ?"
-        Booking.execute_query(query, (Booking.STATUS_CANCELLED, booking_id))
+        annotate(booking_id=booking_id)
+        with span("booking.transaction"), get_db(immediate=True) as cursor:
+            with span("booking.status_check"):
+                status = Booking._get_status(cursor, booking_id)
+            if status == Booking.STATUS_CANCELLED:
+                raise BookingError("Бронирование уже отменено.")
 
-        Seat.free(booking_id)
+            with span("booking.update"):
+                cursor.execute(query, (Booking.STATUS_CANCELLED, booking_id))
+            with span("seat.free"):
+                Seat.free_bookings(cursor, [booking_id])
 
     @staticmethod
     def mark_expired(booking_id: int) -> None:
@@ -144,30 +248,227 @@ class Booking(BaseRepository):
         Бросает:
             BookingError: если бронь не найдена.
         """
-        booking = Booking()
-        booking_data = booking.get(booking_id)
-        if booking_data is None:
+        query = "UPDATE bookings SET status = ? WHERE id = ?"
+        with get_db(immediate=True) as cursor:
+            Booking._get_status(cursor, booking_id)
+            cursor.execute(query, (Booking.STATUS_EXPIRED, booking_id))
+            Seat.free_bookings(cursor, [booking_id])
+
+    @staticmethod
+    def expire_stale_holds(
+        ttl: timedelta = HOLD_TTL,
+        batch_size: int = EXPIRE_BATCH_SIZE,
+    ) -> Dict[str, int]:
+        """
+        Перевести в expired брони, висящие в pending дольше ttl.
+
+        Кандидаты ищутся по индексу (status, created_at) пачками по
+        batch_size; каждая пачка истекает в своей транзакции одним UPDATE
+        по bookings и одним по местам. Возвращает количество истёкших
+        броней, освобождённых мест и обработанных пачек.
+        """
+        cutoff = (datetime.now(timezone.utc) - ttl).strftime("%Y-%m-%d %H:%M:%S")
+        totals = {"bookings": 0, "seats": 0, "batches": 0}
+
+        while True:
+            with get_db(immediate=True) as cursor:
+                booking_ids = [
+                    row[0]
+                    for row in cursor.execute(
+                        """
+                        SELECT id FROM bookings
+                        WHERE status = ? AND created_at < ?
+                        ORDER BY created_at
+                        LIMIT ?
+                        """,
+                        (Booking.STATUS_PENDING, cutoff, batch_size),
+                    )
+                ]
+                if not booking_ids:
+                    break
+
+                placeholders = ", ".join(["?"] * len(booking_ids))
+                cursor.execute(
+                    f"UPDATE bookings SET status = ? WHERE id IN ({placeholders})",
+                    [Booking.STATUS_EXPIRED, *booking_ids],
+                )
+                totals["seats"] += Seat.free_bookings(cursor, booking_ids)
+
+            totals["bookings"] += len(booking_ids)
+            totals["batches"] += 1
+            if len(booking_ids) < batch_size:
+                break
+
+        return totals
+
+    @staticmethod
+    def confirm_many(booking_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Подтвердить несколько броней одной транзакцией (см. confirm).
+
+        Возвращает {ID брони: None} для подтверждённых броней и
+        {ID брони: текст ошибки} для пропущенных: не найденных или не в
+        статусе pending. Ошибки отдельных броней не откатывают остальные.
+        """
+        return Booking._transition_many(booking_ids, Booking.STATUS_CONFIRMED)
+
+    @staticmethod
+    def cancel_many(booking_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Отменить несколько броней одной транзакцией (см. cancel).
+
+        Возвращает отчёт в формате confirm_many().
+        """
+        return Booking._transition_many(booking_ids, Booking.STATUS_CANCELLED)
+
+    @staticmethod
+    def expire_many(booking_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Отметить несколько броней как истекшие одной транзакцией (см. mark_expired).
+
+        Возвращает отчёт в формате confirm_many().
+        """
+        return Booking._transition_many(booking_ids, Booking.STATUS_EXPIRED)
+
+    @staticmethod
+    def _transition_error(status: Optional[str], target: str) -> Optional[str]:
+        """Текст ошибки перехода брони из status в target или None, если переход допустим."""
+        if status is None:
+            return "Бронирование не найдено."
+        if target == Booking.STATUS_CONFIRMED and status != Booking.STATUS_PENDING:
+            return f"Бронирование уже в статусе '{status}'."
+        if target == Booking.STATUS_CANCELLED and status == Booking.STATUS_CANCELLED:
+            return "Бронирование уже отменено."
+        return None
+
+    @staticmethod
+    def _transition_many(booking_ids: List[int], target: str) -> Dict[int, Optional[str]]:
+        """
+        Перевести брони в статус target пакетно.
+
+        Статусы читаются, а брони и места обновляются по одному запросу
+        на каждые BULK_CHUNK броней, всё в одной транзакции BEGIN IMMEDIATE.
+        """
+        booking_ids = list(dict.fromkeys(booking_ids))
+        report: Dict[int, Optional[str]] = {}
+        if not booking_ids:
+            return report
+
+        with get_db(immediate=True) as cursor:
+            statuses: Dict[int, str] = {}
+            for start in range(0, len(booking_ids), BULK_CHUNK):
+                chunk = booking_ids[start:start + BULK_CHUNK]
+                placeholders = ", ".join(["?"] * len(chunk))
+                statuses.update(cursor.execute(
+                    f"SELECT id, status FROM bookings WHERE id IN ({placeholders})", chunk
+                ))
+
+            valid = []
+            for booking_id in booking_ids:
+                report[booking_id] = Booking._transition_error(statuses.get(booking_id), target)
+                if report[booking_id] is None:
+                    valid.append(booking_id)
+
+            confirmed_at = datetime.now().isoformat()
+            for start in range(0, len(valid), BULK_CHUNK):
+                chunk = valid[start:start + BULK_CHUNK]
+                placeholders = ", ".join(["?"] * len(chunk))
+                if target == Booking.STATUS_CONFIRMED:
+                    cursor.execute(
+                        f"""
+                        UPDATE bookings SET status = ?, confirmed_at = ?
+                        WHERE id IN ({placeholders})
+                        """,
+                        [target, confirmed_at, *chunk],
+                    )
+                    Seat.sell_bookings(cursor, chunk)
+                else:
+                    cursor.execute(
+                        f"UPDATE bookings SET status = ? WHERE id IN ({placeholders})",
+                        [target, *chunk],
+                    )
+                    Seat.free_bookings(cursor, chunk)
+
+        return report
+
+    @staticmethod
+    def _get_status(cursor: sqlite3.Cursor, booking_id: int) -> str:
+        """
+        Прочитать статус брони внутри открытой транзакции.
+
+        Бросает:
+            BookingError: если бронь не найдена.
+        """
+        result = cursor.execute(
+            "SELECT status FROM bookings WHERE id = ?", (booking_id,)
+        ).fetchone()
+        if result is None:
             raise BookingError("Бронирование не найдено.")
+        return result[0]
 
-        query = "UPDATE bookings SET status = ? WHERE id = ?"
-        Booking.execute_query(query, (Booking.STATUS_EXPIRED, booking_id))
+    @staticmethod
+    def list_with_seats(guest_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Получить бронирования в виде словарей вместе с местами.
 
-        Seat.free(booking_id)
+        Если указан guest_name, возвращаются только брони этого гостя.
+        Места всех броней читаются пакетно через to_dicts().
+        """
+        if guest_name is None:
+            bookings = Booking().get_all()
+        else:
+            bookings = Booking.get_by_guest(guest_name)
+        return Booking.to_dicts(bookings)
 
     @staticmethod
     def to_dict(booking: Optional[Tuple[Any, ...]]) -> Optional[Dict[str, Any]]:
         """Преобразовать бронирование в словарь."""
         if booking is None:
             return None
-        seats = Seat.get_by_booking(booking[0])
-        return {
-            "id": booking[0],
-            "theater_id": booking[1],
-            "guest_name": booking[2],
-            "guest_email": booking[3],
-            "status": booking[4],
-            "total_price": booking[5],
-            "created_at": booking[6],
-            "confirmed_at": booking[7],
-            "seats_count": len(seats),
-        }
+        return Booking.to_dicts([booking])[0]
+
+    @staticmethod
+    def to_dicts(bookings: List[Tuple[Any, ...]]) -> List[Dict[str, Any]]:
+        """
+        Преобразовать список бронирований в словари.
+
+        Места всех броней выбираются одним запросом на каждые
+        SEATS_LOOKUP_CHUNK броней, а не отдельным запросом на бронь.
+        """
+        seats = Booking._seats_for([booking[0] for booking in bookings])
+        result = []
+        for booking in bookings:
+            positions = seats.get(booking[0], [])
+            result.append({
+                "id": booking[0],
+                "theater_id": booking[1],
+                "guest_name": booking[2],
+                "guest_email": booking[3],
+                "status": booking[4],
+                "total_price": booking[5],
+                "created_at": booking[6],
+                "confirmed_at": booking[7],
+                "seats_count": len(positions),
+                "seats": positions,
+            })
+        return result
+
+    @staticmethod
+    def _seats_for(booking_ids: List[int]) -> Dict[int, List[Tuple[int, int]]]:
+        """Получить {ID брони: [(ряд, место), ...]} для списка броней."""
+        seats: Dict[int, List[Tuple[int, int]]] = {}
+        for start in range(0, len(booking_ids), SEATS_LOOKUP_CHUNK):
+            chunk = booking_ids[start:start + SEATS_LOOKUP_CHUNK]
+            placeholders = ", ".join(["?"] * len(chunk))
+            query = f"""
+                SELECT booking_id, row, col FROM seats
+                WHERE booking_id IN ({placeholders})
+                UNION ALL
+                SELECT booking_id, row, col FROM seat_holds
+                WHERE booking_id IN ({placeholders})
+                ORDER BY 1, 2, 3
+            """
+            rows = Booking.execute_query(query, tuple(chunk) * 2, fetch_all=True)
+            for booking_id, row, col in rows or []:
+                seats.setdefault(booking_id, []).append((row, col))
+        return seats
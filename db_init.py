@@ -1,40 +1,524 @@
+import atexit
+import itertools
 import os
 import sqlite3
+import tempfile
+import threading
+import time
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
 
 DB_NAME = "cinema.db"
+# Специальные значения цели БД для configure_database().
+MEMORY_DB = ":memory:"
+TEMP_DB = ":temp:"
+# Переменная окружения с целью БД по умолчанию (путь, URI или
+# специальное значение).
+DB_ENV_VAR = "CINEMA_DB"
+
+# Наборы PRAGMA, применяемые к каждому новому соединению пула.
+# busy_timeout идёт первым, чтобы смена journal_mode ждала блокировку.
+PRAGMA_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Настройки SQLite по умолчанию: rollback journal, synchronous=FULL.
+    "default": {},
+    # WAL: читатели не блокируют писателя; каждый commit синхронизируется.
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+    },
+    # WAL без fsync на каждый commit (при сбое ОС теряются последние
+    # транзакции, но не целостность), большой кэш и mmap.
+    "throughput": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+    # Для тестов: журнал в памяти и без fsync.
+    "test": {
+        "busy_timeout": 5000,
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "temp_store": "MEMORY",
+    },
+}
+DB_PROFILE = "durable"
+DB_PROFILE_ENV_VAR = "CINEMA_DB_PROFILE"
+POOL_SIZE = 5
+POOL_TIMEOUT = 5.0
+
+# Колонки, добавленные в таблицы после первой версии схемы:
+# (таблица, колонка, определение). В старых БД добавляются через ALTER TABLE.
+COLUMNS: List[Tuple[str, str, str]] = [
+    ("theaters", "seat_version", "INTEGER NOT NULL DEFAULT 0"),
+    ("movies", "change_seq", "INTEGER"),
+    ("theaters", "change_seq", "INTEGER"),
+    ("bookings", "change_seq", "INTEGER"),
+    ("payments", "change_seq", "INTEGER"),
+    ("theaters", "free_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("theaters", "max_block", "INTEGER NOT NULL DEFAULT 0"),
+    ("theaters", "reserved_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("theaters", "sold_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("payments", "idempotency_key", "TEXT"),
+]
+
+# Счётчики заполненности сеанса: если их (или seat_row_blocks) ещё не было
+# в существующей БД, init_db() заполняет их пересчётом по местам.
+OCCUPANCY_COLUMNS = {"free_count", "reserved_count", "sold_count", "max_block"}
+
+# Таблицы с отслеживанием изменений: (таблица, колонки для UPDATE OF).
+# Триггеры проставляют change_seq из общего счётчика sequences.changes
+# при вставке строки и при изменении перечисленных колонок.
+CHANGE_TRACKED: List[Tuple[str, str]] = [
+    ("movies", "title, duration, rating, description"),
+    ("theaters", "price, schedule"),
+    ("bookings", "status, confirmed_at"),
+    ("payments", "status"),
+]
+
+# Вторичные индексы схемы: (версия, DDL). Новые индексы добавляются
+# с номером версии больше INDEXES_VERSION, который затем увеличивается.
+INDEXES_VERSION = 7
+INDEXES: List[Tuple[int, str]] = [
+    (
+        1,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_seats_position "
+        "ON seats (theater_id, row, col)",
+    ),
+    (
+        1,
+        "CREATE INDEX IF NOT EXISTS idx_seats_booking "
+        "ON seats (booking_id)",
+    ),
+    (
+        1,
+        "CREATE INDEX IF NOT EXISTS idx_bookings_guest "
+        "ON bookings (guest_name)",
+    ),
+    (
+        1,
+        "CREATE INDEX IF NOT EXISTS idx_bookings_status_created "
+        "ON bookings (status, created_at)",
+    ),
+    (
+        2,
+        "CREATE INDEX IF NOT EXISTS idx_seat_holds_booking "
+        "ON seat_holds (booking_id)",
+    ),
+] + [
+    (
+        3,
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_change_seq "
+        f"ON {table} (change_seq)",
+    )
+    for table, _ in CHANGE_TRACKED
+] + [
+    (
+        4,
+        "CREATE INDEX IF NOT EXISTS idx_theaters_movie_schedule "
+        "ON theaters (movie_id, schedule)",
+    ),
+    (
+        5,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_idempotency_key "
+        "ON payments (idempotency_key) WHERE idempotency_key IS NOT NULL",
+    ),
+    (
+        6,
+        "CREATE INDEX IF NOT EXISTS idx_payments_transaction "
+        "ON payments (transaction_id, amount)",
+    ),
+    (
+        7,
+        "CREATE INDEX IF NOT EXISTS idx_theaters_schedule "
+        "ON theaters (schedule)",
+    ),
+]
+
+
+_database = DB_NAME
+_database_uri = False
+_memory_keepers: Dict[str, sqlite3.Connection] = {}
+_memory_counter = itertools.count(1)
+_temp_files: List[str] = []
+_profile = os.environ.get(DB_PROFILE_ENV_VAR, DB_PROFILE)
 
 
 def get_connection() -> sqlite3.Connection:
-    """Создать и вернуть соединение с БД."""
-    return sqlite3.connect(DB_NAME)
+    """Создать соединение с БД и применить к нему PRAGMA текущего профиля."""
+    conn = sqlite3.connect(_database, uri=_database_uri, check_same_thread=False)
+    for name, value in PRAGMA_PROFILES[_profile].items():
+        try:
+            conn.execute(f"PRAGMA {name} = {value}")
+        except sqlite3.OperationalError:
+            # journal_mode нельзя сменить у read-only БД; остаётся текущий.
+            if name != "journal_mode":
+                conn.close()
+                raise
+    return conn
+
+
+def get_profile() -> str:
+    """Имя текущего профиля PRAGMA."""
+    return _profile
+
+
+def configure_profile(profile: str = DB_PROFILE) -> str:
+    """
+    Выбрать профиль PRAGMA (см. PRAGMA_PROFILES) и вернуть прежний.
+
+    Пул закрывается, новые соединения открываются с новым профилем.
+    journal_mode=WAL сохраняется в файле БД и остаётся после смены
+    профиля на "default".
+
+    Бросает:
+        ValueError: если профиль неизвестен.
+    """
+    global _profile
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Неизвестный профиль БД: {profile}.")
+    previous, _profile = _profile, profile
+    reset_pool()
+    return previous
+
+
+def get_database() -> str:
+    """Текущая цель БД: путь к файлу или URI."""
+    return _database
+
+
+def configure_database(target: str = DB_NAME) -> str:
+    """
+    Переключить приложение на другую БД и вернуть прежнюю цель.
+
+    target может быть:
+        - путём к файлу;
+        - URI SQLite ("file:...");
+        - MEMORY_DB (":memory:") — новая БД в памяти процесса, общая
+          для всех соединений пула. Используется VFS memdb, а не
+          cache=shared: в режиме общего кэша параллельные читатели и
+          писатели получают "database table is locked" без ожидания.
+          БД живёт до конца процесса; чтобы вернуться к ней,
+          передайте значение, возвращённое get_database();
+        - TEMP_DB (":temp:") — новый временный файл, удаляемый при
+          выходе из процесса (отдельная БД на процесс-воркер).
+
+    Пул соединений закрывается, in-process кэши сбрасываются.
+    """
+    global _database, _database_uri
+    previous = _database
+    database, uri = _resolve_target(target)
+    reset_pool()
+    _database, _database_uri = database, uri
+    _run_reset_hooks()
+    return previous
+
+
+def _resolve_target(target: str) -> Tuple[str, bool]:
+    """Превратить цель configure_database() в аргументы sqlite3.connect."""
+    if target == MEMORY_DB:
+        name = f"file:/cinema-{os.getpid()}-{next(_memory_counter)}?vfs=memdb"
+        # БД memdb существует, пока открыто хотя бы одно соединение.
+        _memory_keepers[name] = sqlite3.connect(name, uri=True, check_same_thread=False)
+        return name, True
+    if target == TEMP_DB:
+        handle, path = tempfile.mkstemp(prefix="cinema-", suffix=".db")
+        os.close(handle)
+        _temp_files.append(path)
+        return path, False
+    return target, target.startswith("file:")
+
+
+def _remove_temp_files() -> None:
+    """Удалить временные файлы БД, созданные через TEMP_DB."""
+    reset_pool()
+    for path in _temp_files:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+atexit.register(_remove_temp_files)
+_database, _database_uri = _resolve_target(os.environ.get(DB_ENV_VAR, DB_NAME))
+
+
+class ConnectionPool:
+    """
+    Ограниченный пул долгоживущих соединений с БД.
+
+    Соединения создаются лениво (не больше size), выдаются через
+    acquire() и возвращаются через release(). Перед выдачей соединение
+    проверяется запросом SELECT 1, сломанные соединения заменяются новыми.
+    """
+
+    def __init__(self, size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT) -> None:
+        if size < 1:
+            raise ValueError("Размер пула должен быть положительным.")
+        self.size = size
+        self.timeout = timeout
+        self._idle: List[sqlite3.Connection] = []
+        # Уведомляется и при возврате соединения, и при освобождении слота.
+        self._available = threading.Condition()
+        self._created = 0
+        self._closed = False
+
+    @property
+    def created(self) -> int:
+        """Количество открытых пулом соединений."""
+        return self._created
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Взять соединение из пула.
+
+        Бросает:
+            sqlite3.OperationalError: если пул закрыт или свободное
+            соединение не появилось за timeout секунд.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = self._take_or_reserve(deadline)
+            if conn is None:
+                try:
+                    return get_connection()
+                except Exception:
+                    self._free_slot()
+                    raise
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Вернуть соединение в пул."""
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+
+    def close(self) -> None:
+        """Закрыть пул и все свободные соединения."""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    def _take_or_reserve(self, deadline: float) -> Optional[sqlite3.Connection]:
+        """
+        Взять свободное соединение или занять слот под новое (тогда None).
+
+        Если свободных соединений и слотов нет, ждёт до deadline.
+
+        Бросает:
+            sqlite3.OperationalError: если пул закрыт или время ожидания истекло.
+        """
+        with self._available:
+            while True:
+                if self._closed:
+                    raise sqlite3.OperationalError("Пул соединений закрыт.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError("Пул соединений исчерпан.")
+                self._available.wait(remaining)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        """Закрыть соединение и освободить его слот."""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._free_slot()
+
+    def _free_slot(self) -> None:
+        """Освободить слот соединения и разбудить ожидающий поток."""
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        """Проверить, что соединение живо."""
+        try:
+            conn.execute("SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+        return True
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+_reset_hooks: List[Callable[[], None]] = []
+_local = threading.local()
+# Сборщик статистики запросов (см. instrumentation.py) или None.
+_instrumentation: Optional[Any] = None
+
+
+def add_reset_hook(hook: Callable[[], None]) -> None:
+    """
+    Зарегистрировать функцию, вызываемую при пересоздании БД.
+
+    Используется in-process кэшами, которые должны сбрасываться, когда
+    данные под ними заменяются целиком (например, в clear_db()).
+    """
+    if hook not in _reset_hooks:
+        _reset_hooks.append(hook)
+
+
+def _run_reset_hooks() -> None:
+    """Вызвать все зарегистрированные функции сброса."""
+    for hook in _reset_hooks:
+        hook()
+
+
+def set_instrumentation(instrumentation: Optional[Any]) -> None:
+    """
+    Подключить сборщик статистики запросов или отключить его (None).
+
+    Сборщик должен реализовать record_acquire(seconds) и
+    wrap(cursor) -> курсор; см. instrumentation.QueryInstrumentation.
+    """
+    global _instrumentation
+    _instrumentation = instrumentation
+
+
+def get_instrumentation() -> Optional[Any]:
+    """Вернуть подключённый сборщик статистики запросов или None."""
+    return _instrumentation
+
+
+def get_pool() -> ConnectionPool:
+    """Вернуть общий пул соединений, создав его при первом обращении."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(POOL_SIZE, POOL_TIMEOUT)
+        return _pool
+
+
+def configure_pool(size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT) -> ConnectionPool:
+    """Пересоздать общий пул с новыми размером и таймаутом."""
+    global _pool
+    new_pool = ConnectionPool(size, timeout)
+    with _pool_lock:
+        old_pool, _pool = _pool, new_pool
+    if old_pool is not None:
+        old_pool.close()
+    return new_pool
+
+
+def reset_pool() -> None:
+    """Закрыть общий пул; следующий get_db() откроет новый (для тестов)."""
+    global _pool
+    with _pool_lock:
+        old_pool, _pool = _pool, None
+    if old_pool is not None:
+        old_pool.close()
 
 
 @contextmanager
-def get_db() -> Generator[sqlite3.Cursor, None, None]:
+def get_db(immediate: bool = False) -> Generator[sqlite3.Cursor, None, None]:
     """
     Контекстный менеджер для работы с БД.
 
+    Соединение берётся из общего пула и возвращается в него после
+    commit/rollback. При immediate=True транзакция открывается через
+    BEGIN IMMEDIATE, то есть блокировка на запись берётся сразу.
+    Функции, зарегистрированные через on_commit() внутри блока,
+    вызываются после успешного commit.
+
     Использование:
         with get_db() as cursor:
             cursor.execute("SELECT * FROM movies")
     """
-    conn = get_connection()
+    pool = get_pool()
+    instrumentation = _instrumentation
+    if instrumentation is None:
+        conn = pool.acquire()
+        cursor = conn.cursor()
+    else:
+        started = time.perf_counter()
+        conn = pool.acquire()
+        instrumentation.record_acquire(time.perf_counter() - started)
+        cursor = instrumentation.wrap(conn.cursor())
+    pending: List[Callable[[], None]] = []
+    stack = _local.__dict__.setdefault("pending", [])
+    stack.append(pending)
     try:
-        yield conn.cursor()
+        if immediate:
+            cursor.execute("BEGIN IMMEDIATE")
+        yield cursor
         conn.commit()
     except Exception:
         conn.rollback()
         raise
     finally:
-        conn.close()
+        # Блоки могут закрываться не по порядку (например, в генераторах).
+        stack[:] = [item for item in stack if item is not pending]
+        cursor.close()
+        pool.release(conn)
+    for callback in pending:
+        callback()
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """
+    Вызвать callback после commit текущего блока get_db() этого потока.
+
+    При откате транзакции callback не вызывается; вне get_db()
+    вызывается сразу.
+    """
+    stack = _local.__dict__.get("pending")
+    if not stack:
+        callback()
+        return
+    stack[-1].append(callback)
 
 
 def init_db() -> None:
-    """Создать БД и таблицы, если их ещё нет."""
-    conn = get_connection()
-    cursor = conn.cursor()
+    """
+    Создать БД и таблицы, если их ещё нет, и обновить схему старой БД.
+
+    Если в существующую БД добавлены счётчики заполненности сеансов,
+    они в той же транзакции пересчитываются по местам: иначе поиск по
+    min_free/min_block не находил бы уже созданные сеансы.
+    """
+    with get_db() as cursor:
+        existing = {
+            row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        }
+        _create_tables(cursor)
+        added = _apply_columns(cursor)
+        _apply_indexes(cursor)
+        _apply_change_tracking(cursor)
+        if "theaters" in existing and (
+            "seat_row_blocks" not in existing
+            or any(table == "theaters" and column in OCCUPANCY_COLUMNS for table, column in added)
+        ):
+            # Импорт здесь: theater зависит от db_init.
+            from theater import Theater
+
+            Theater.rebuild_occupancy_in_transaction(cursor)
+
+
+def _create_tables(cursor: sqlite3.Cursor) -> None:
+    """Создать таблицы схемы."""
 
     cursor.execute(
         """
@@ -43,7 +527,8 @@ def init_db() -> None:
             title TEXT UNIQUE NOT NULL,
             duration INTEGER NOT NULL,
             rating REAL DEFAULT 0.0,
-            description TEXT
+            description TEXT,
+            change_seq INTEGER
         )
         """
     )
@@ -57,6 +542,12 @@ def init_db() -> None:
             cols INTEGER NOT NULL,
             price REAL NOT NULL,
             schedule TEXT NOT NULL,
+            seat_version INTEGER NOT NULL DEFAULT 0,
+            change_seq INTEGER,
+            free_count INTEGER NOT NULL DEFAULT 0,
+            max_block INTEGER NOT NULL DEFAULT 0,
+            reserved_count INTEGER NOT NULL DEFAULT 0,
+            sold_count INTEGER NOT NULL DEFAULT 0,
             FOREIGN KEY (movie_id) REFERENCES movies(id)
         )
         """
@@ -77,6 +568,44 @@ def init_db() -> None:
         """
     )
 
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS seat_maps (
+            theater_id INTEGER PRIMARY KEY,
+            state BLOB NOT NULL,
+            FOREIGN KEY (theater_id) REFERENCES theaters(id)
+        )
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS seat_holds (
+            theater_id INTEGER NOT NULL,
+            row INTEGER NOT NULL,
+            col INTEGER NOT NULL,
+            booking_id INTEGER NOT NULL,
+            PRIMARY KEY (theater_id, row, col),
+            FOREIGN KEY (theater_id) REFERENCES theaters(id),
+            FOREIGN KEY (booking_id) REFERENCES bookings(id)
+        ) WITHOUT ROWID
+        """
+    )
+
+    # Самый длинный отрезок свободных мест каждого ряда сеанса: по нему
+    # theaters.max_block обновляется без пересчёта всех мест сеанса.
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS seat_row_blocks (
+            theater_id INTEGER NOT NULL,
+            row INTEGER NOT NULL,
+            longest INTEGER NOT NULL,
+            PRIMARY KEY (theater_id, row),
+            FOREIGN KEY (theater_id) REFERENCES theaters(id)
+        ) WITHOUT ROWID
+        """
+    )
+
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS bookings (
@@ -88,6 +617,7 @@ def init_db() -> None:
             total_price REAL NOT NULL,
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
             confirmed_at TEXT,
+            change_seq INTEGER,
             FOREIGN KEY (theater_id) REFERENCES theaters(id)
         )
         """
@@ -102,17 +632,108 @@ def init_db() -> None:
             status TEXT DEFAULT 'completed',
             transaction_id TEXT,
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            change_seq INTEGER,
+            idempotency_key TEXT,
             FOREIGN KEY (booking_id) REFERENCES bookings(id)
         )
         """
     )
 
-    conn.commit()
-    conn.close()
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        )
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS export_watermarks (
+            name TEXT PRIMARY KEY,
+            change_seq INTEGER NOT NULL,
+            exported_at TEXT NOT NULL
+        )
+        """
+    )
+
+
+def _apply_columns(cursor: sqlite3.Cursor) -> List[Tuple[str, str]]:
+    """
+    Добавить в существующие таблицы недостающие колонки из COLUMNS.
+
+    Возвращает добавленные колонки: [(таблица, колонка), ...].
+    """
+    added = []
+    for table, column, definition in COLUMNS:
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            added.append((table, column))
+    return added
+
+
+def _apply_indexes(cursor: sqlite3.Cursor) -> None:
+    """
+    Создать индексы, появившиеся после сохранённой версии схемы.
+
+    Версия хранится в PRAGMA user_version, а все DDL используют
+    IF NOT EXISTS, поэтому повторный вызов ничего не меняет.
+    """
+    current = cursor.execute("PRAGMA user_version").fetchone()[0]
+    if current >= INDEXES_VERSION:
+        return
+    for version, ddl in INDEXES:
+        if version > current:
+            cursor.execute(ddl)
+    cursor.execute(f"PRAGMA user_version = {INDEXES_VERSION}")
+
+
+def _apply_change_tracking(cursor: sqlite3.Cursor) -> None:
+    """Создать счётчик изменений и триггеры, проставляющие change_seq."""
+    cursor.execute("INSERT OR IGNORE INTO sequences (name, value) VALUES ('changes', 0)")
+    for table, columns in CHANGE_TRACKED:
+        body = f"""
+            BEGIN
+                UPDATE sequences SET value = value + 1 WHERE name = 'changes';
+                UPDATE {table}
+                SET change_seq = (SELECT value FROM sequences WHERE name = 'changes')
+                WHERE id = NEW.id;
+            END
+        """
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_change_insert "
+            f"AFTER INSERT ON {table} {body}"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{table}_change_update "
+            f"AFTER UPDATE OF {columns} ON {table} {body}"
+        )
 
 
 def clear_db() -> None:
-    """Удалить БД и создать пустую заново."""
-    if os.path.exists(DB_NAME):
-        os.remove(DB_NAME)
+    """
+    Очистить все таблицы БД и создать недостающие объекты схемы.
+
+    Таблицы очищаются DELETE без WHERE в одной транзакции (SQLite
+    выполняет его как быстрое усечение) вместо удаления файла, поэтому
+    работает для любой цели БД, включая in-memory. Счётчики
+    AUTOINCREMENT и изменений сбрасываются.
+    """
+    with get_db(immediate=True) as cursor:
+        tables = [
+            row[0]
+            for row in cursor.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )
+        ]
+        for table in tables:
+            cursor.execute(f'DELETE FROM "{table}"')
+        if cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'"
+        ).fetchone():
+            cursor.execute("DELETE FROM sqlite_sequence")
+    _run_reset_hooks()
     init_db()
@@ -77,9 +77,7 @@ def main() -> None:
         print(f"  ID: {t_dict['id']}, Цена: {t_dict['price']}₽")
 
     print("\nВсе бронирования:")
-    booking = Booking()
-    for b in booking.get_all():
-        b_dict = booking.to_dict(b)
+    for b_dict in Booking.list_with_seats():
         print(f"  {b_dict['guest_name']} - {b_dict['status']} ({b_dict['total_price']}₽)")
 
     print("\nВсе платежи:")
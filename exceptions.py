@@ -4,3 +4,7 @@ class BookingError(ValueError):
 
 class PaymentError(ValueError):
     """Ошибка при работе с платежами."""
+
+
+class ServiceBusyError(RuntimeError):
+    """Очередь операций переполнена, операция не принята."""
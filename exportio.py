@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+import gzip
 import json
-from typing import Any, Dict, List
+import time
+from datetime import datetime
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
 
+from base_repository import BaseRepository
 from booking import Booking
+from db_init import get_db
 from logica import Movie
 from payments import Payment
 from theater import Theater
 
+EXPORT_CHUNK_SIZE = 1000
+
 
 class Exporter:
     """Экспорт всех данных кинотеатра."""
@@ -28,7 +35,7 @@ class Exporter:
         data: Dict[str, List[Dict[str, Any]]] = {
             "movies": [movie.to_dict(m) for m in movies],
             "theaters": [theater.to_dict(t) for t in theaters],
-            "bookings": [booking.to_dict(b) for b in bookings],
+            "bookings": booking.to_dicts(bookings),
             "payments": [payment.to_dict(p) for p in payments],
         }
 
@@ -36,3 +43,181 @@ class Exporter:
             json.dump(data, file, indent=2, ensure_ascii=False)
 
         return data
+
+    @staticmethod
+    def to_json_stream(
+        filename: str = "cinema_data.json",
+        ndjson: bool = False,
+        compress: bool = False,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        Выгрузить данные потоково, не держа всю БД в памяти.
+
+        Строки читаются курсором по chunk_size штук и сразу пишутся в
+        файл. По умолчанию пишется один JSON документ той же структуры,
+        что и в to_json(); при ndjson=True — по строке на запись вида
+        {"table": ..., "data": {...}}. При compress=True файл сжимается
+        gzip на лету.
+
+        Возвращает статистику: количество строк по таблицам, общее
+        количество строк, время и скорость (строк в секунду).
+        """
+        sources = [
+            (repository.table_name, Exporter.iter_records(repository, chunk_size))
+            for repository in Exporter._repositories()
+        ]
+        return Exporter._write_stream(filename, sources, ndjson, compress)
+
+    @staticmethod
+    def export_changes(
+        filename: str = "cinema_changes.ndjson",
+        name: str = "default",
+        ndjson: bool = True,
+        compress: bool = False,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        Выгрузить строки, созданные или изменённые с прошлой выгрузки.
+
+        Изменения отслеживаются по change_seq, который триггеры
+        проставляют при вставке строк и при смене статусов (confirm,
+        cancel, mark_expired, новые платежи и т.д.). Водяной знак
+        последней выгрузки хранится в export_watermarks под именем name
+        и сдвигается только после успешной записи файла. Первая
+        выгрузка для имени — полная.
+
+        Возвращает статистику to_json_stream() и поля since (прошлый
+        водяной знак или None) и watermark (новый).
+        """
+        since = Exporter.get_watermark(name)
+        with get_db() as cursor:
+            until = cursor.execute(
+                "SELECT value FROM sequences WHERE name = 'changes'"
+            ).fetchone()[0]
+
+        sources = [
+            (
+                repository.table_name,
+                Exporter.iter_records(repository, chunk_size, since, until),
+            )
+            for repository in Exporter._repositories()
+        ]
+        stats = Exporter._write_stream(filename, sources, ndjson, compress)
+
+        with get_db() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO export_watermarks (name, change_seq, exported_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE
+                SET change_seq = excluded.change_seq,
+                    exported_at = excluded.exported_at
+                """,
+                (name, until, datetime.now().isoformat()),
+            )
+
+        stats["since"] = since
+        stats["watermark"] = until
+        return stats
+
+    @staticmethod
+    def get_watermark(name: str = "default") -> Optional[int]:
+        """Получить водяной знак выгрузки изменений или None, если её не было."""
+        with get_db() as cursor:
+            result = cursor.execute(
+                "SELECT change_seq FROM export_watermarks WHERE name = ?",
+                (name,),
+            ).fetchone()
+        return result[0] if result else None
+
+    @staticmethod
+    def iter_records(
+        repository: BaseRepository,
+        chunk_size: int = EXPORT_CHUNK_SIZE,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Перебрать записи таблицы репозитория в виде словарей.
+
+        Курсор читается через fetchmany(chunk_size); для броней места
+        подгружаются пакетно на каждый прочитанный блок. Если задан
+        since, возвращаются только строки с since < change_seq <= until.
+        """
+        table = repository.table_name
+        if since is None:
+            query = f"SELECT * FROM {table} ORDER BY id"
+            params: tuple = ()
+        else:
+            query = f"""
+                SELECT * FROM {table}
+                WHERE change_seq > ? AND change_seq <= ?
+                ORDER BY change_seq
+            """
+            params = (since, until)
+
+        with get_db() as cursor:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if isinstance(repository, Booking):
+                    yield from Booking.to_dicts(rows)
+                else:
+                    for row in rows:
+                        yield repository.to_dict(row)
+
+    @staticmethod
+    def _write_stream(
+        filename: str,
+        sources: List[Tuple[str, Iterator[Dict[str, Any]]]],
+        ndjson: bool,
+        compress: bool,
+    ) -> Dict[str, Any]:
+        """Записать записи из (таблица, итератор) в JSON или NDJSON файл."""
+        started = time.perf_counter()
+        counts: Dict[str, int] = {}
+
+        with Exporter._open(filename, compress) as file:
+            if not ndjson:
+                file.write("{")
+            for table_index, (table, records) in enumerate(sources):
+                counts[table] = 0
+                if not ndjson:
+                    separator = "," if table_index else ""
+                    file.write(f"{separator}\n{json.dumps(table)}: [")
+                for record in records:
+                    if ndjson:
+                        line = {"table": table, "data": record}
+                        file.write(json.dumps(line, ensure_ascii=False) + "\n")
+                    else:
+                        separator = "," if counts[table] else ""
+                        file.write(f"{separator}\n  {json.dumps(record, ensure_ascii=False)}")
+                    counts[table] += 1
+                if not ndjson:
+                    file.write("\n]")
+            if not ndjson:
+                file.write("\n}\n")
+
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        return {
+            "tables": counts,
+            "rows": total,
+            "seconds": elapsed,
+            "rows_per_sec": total / elapsed if elapsed > 0 else 0.0,
+        }
+
+    @staticmethod
+    def _repositories() -> List[BaseRepository]:
+        """Репозитории в порядке выгрузки."""
+        return [Movie(), Theater(), Booking(), Payment()]
+
+    @staticmethod
+    def _open(filename: str, compress: bool) -> IO[str]:
+        """Открыть файл выгрузки на запись, при необходимости через gzip."""
+        if compress:
+            return gzip.open(filename, "wt", encoding="utf-8")
+        return open(filename, "w", encoding="utf-8")
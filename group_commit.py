@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from booking import Booking
+from db_init import get_db
+from payments import Payment
+from write_queue import STOP, WriteQueue
+
+GROUP_MAX_BATCH = 64
+GROUP_MAX_WAIT = 0.002
+
+
+class WriteCoordinator:
+    """
+    Групповой commit записей из многих потоков.
+
+    Операции копятся не дольше max_wait секунд (или до max_batch штук)
+    и выполняются одной транзакцией BEGIN IMMEDIATE, поэтому на пакет
+    приходится один commit (и один fsync). Каждая операция идёт в своей
+    точке сохранения: ошибка одной операции откатывает только её, и
+    вызывающий получает своё исключение. Результаты возвращаются после
+    успешного commit; если commit не удался, ошибку получают все
+    операции пакета.
+
+    Использование:
+        coordinator = WriteCoordinator()
+        booking_id = coordinator.create_booking(theater_id, "Иван", [(1, 1)])
+        coordinator.close()
+    """
+
+    def __init__(
+        self,
+        max_batch: int = GROUP_MAX_BATCH,
+        max_wait: float = GROUP_MAX_WAIT,
+    ) -> None:
+        if max_batch < 1:
+            raise ValueError("Размер пакета должен быть положительным.")
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = WriteQueue("Координатор записи закрыт.")
+        self._lock = threading.Lock()
+        self._stats = {"batches": 0, "operations": 0, "failed": 0, "max_batch": 0}
+        self._thread = threading.Thread(target=self._loop, name="group-commit", daemon=True)
+        self._thread.start()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Количество пакетов, операций, ошибок и наибольший пакет."""
+        with self._lock:
+            return dict(self._stats)
+
+    def submit(self, operation: Callable[[sqlite3.Cursor], Any]) -> Any:
+        """
+        Выполнить operation(cursor) в ближайшем пакете и вернуть результат.
+
+        Бросает:
+            RuntimeError: если координатор закрыт.
+            Исключение самой операции или commit пакета.
+        """
+        future: Future = Future()
+        self._queue.put(future, operation)
+        return future.result()
+
+    def create_booking(
+        self,
+        theater_id: int,
+        guest_name: str,
+        seat_positions: List[Tuple[int, int]],
+        guest_email: str = "",
+    ) -> int:
+        """
+        Создать бронирование в групповом commit (см. Booking.create).
+
+        Бросает:
+            BookingError: если сеанс не найден или места уже заняты.
+        """
+        return self.submit(
+            lambda cursor: Booking.create_in_transaction(
+                cursor, theater_id, guest_name, seat_positions, guest_email
+            )
+        )
+
+    def process_payment(
+        self,
+        booking_id: int,
+        amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> int:
+        """
+        Обработать платёж в групповом commit (см. Payment.process).
+
+        Бросает:
+            PaymentError: если бронь не найдена, сумма не совпадает
+                или бронь уже оплачена с другим ключом.
+        """
+        return self.submit(
+            lambda cursor: Payment.process_in_transaction(
+                cursor, booking_id, amount, idempotency_key
+            )
+        )
+
+    def close(self) -> None:
+        """Выполнить уже поставленные операции и остановить поток."""
+        self._queue.close(self._thread)
+
+    def _loop(self) -> None:
+        """Цикл потока: собрать пакет и выполнить его."""
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is STOP:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[Tuple[Future, Callable[[sqlite3.Cursor], Any]]]) -> None:
+        """Выполнить пакет одной транзакцией и раздать результаты."""
+        outcomes: List[Tuple[bool, Any]] = []
+        try:
+            with get_db(immediate=True) as cursor:
+                for index, (_, operation) in enumerate(batch):
+                    savepoint = f"op_{index}"
+                    cursor.execute(f"SAVEPOINT {savepoint}")
+                    try:
+                        outcomes.append((True, operation(cursor)))
+                    except Exception as error:
+                        cursor.execute(f"ROLLBACK TO {savepoint}")
+                        outcomes.append((False, error))
+                    cursor.execute(f"RELEASE {savepoint}")
+        except Exception as error:
+            outcomes = [(False, error)] * len(batch)
+
+        failed = 0
+        for (future, _), (ok, value) in zip(batch, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                failed += 1
+                future.set_exception(value)
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["operations"] += len(batch)
+            self._stats["failed"] += failed
+            self._stats["max_batch"] = max(self._stats["max_batch"], len(batch))
+
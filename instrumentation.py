@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import db_init
+
+# Верхние границы корзин гистограммы времени, мс.
+HISTOGRAM_BUCKETS: Tuple[float, ...] = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+SLOW_QUERY_MS = 100.0
+
+logger = logging.getLogger("cinema.queries")
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_PARAM_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_NAMED = re.compile(r":\w+")
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Привести SQL к виду ключа статистики.
+
+    Литералы и именованные параметры заменяются на ?, списки
+    параметров в скобках — на (...), чтобы запросы с IN/VALUES разной
+    длины попадали в один ключ.
+    """
+    text = _WHITESPACE.sub(" ", query).strip()
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _NAMED.sub("?", text)
+    text = _PARAM_LIST.sub("(...)", text)
+    return _PARAM_ROWS.sub("(...)", text)
+
+
+class Timing:
+    """Счётчик количества, суммы, максимума и гистограммы времени."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+
+    def add(self, elapsed_ms: float, rows: int = 0) -> None:
+        """Учесть одно измерение."""
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        for index, bound in enumerate(HISTOGRAM_BUCKETS):
+            if elapsed_ms <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Снимок в виде словаря; корзины подписаны верхней границей."""
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS] + [
+            f">{HISTOGRAM_BUCKETS[-1]}ms"
+        ]
+        return {
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "rows": self.rows,
+            "histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+class QueryInstrumentation:
+    """
+    Сбор статистики запросов, выполняемых через get_db().
+
+    Подключается через enable(); пока не подключена, get_db() работает
+    с обычным курсором без дополнительных затрат. Запросы дольше
+    slow_query_ms пишутся в лог cinema.queries с уровнем WARNING.
+    """
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS) -> None:
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._queries: Dict[str, Timing] = {}
+        self._acquire = Timing()
+        self._slow = 0
+
+    def record_acquire(self, elapsed: float) -> None:
+        """Учесть время получения соединения из пула, секунды."""
+        with self._lock:
+            self._acquire.add(elapsed * 1000)
+
+    def record_query(self, query: str, elapsed: float, rows: int) -> str:
+        """
+        Учесть выполнение запроса: время в секундах и число строк.
+
+        Возвращает нормализованный SQL — ключ для add_rows().
+        """
+        elapsed_ms = elapsed * 1000
+        key = normalize_sql(query)
+        with self._lock:
+            timing = self._queries.get(key)
+            if timing is None:
+                timing = self._queries[key] = Timing()
+            timing.add(elapsed_ms, rows)
+            slow = elapsed_ms > self.slow_query_ms
+            if slow:
+                self._slow += 1
+        if slow:
+            logger.warning("Медленный запрос (%.1f мс, строк: %d): %s", elapsed_ms, rows, key)
+        return key
+
+    def add_rows(self, key: str, rows: int) -> None:
+        """Добавить строки, прочитанные fetch*() после выполнения запроса."""
+        with self._lock:
+            timing = self._queries.get(key)
+            if timing is not None:
+                timing.rows += rows
+
+    def wrap(self, cursor: sqlite3.Cursor) -> InstrumentedCursor:
+        """Обернуть курсор для учёта его запросов."""
+        return InstrumentedCursor(cursor, self)
+
+    def stats(self) -> Dict[str, Any]:
+        """Снимок статистики: запросы по нормализованному SQL и пул."""
+        with self._lock:
+            queries = {key: timing.to_dict() for key, timing in self._queries.items()}
+            return {
+                "queries": dict(
+                    sorted(queries.items(), key=lambda item: item[1]["total_ms"], reverse=True)
+                ),
+                "acquire": self._acquire.to_dict(),
+                "slow_queries": self._slow,
+            }
+
+    def reset(self) -> None:
+        """Обнулить накопленную статистику."""
+        with self._lock:
+            self._queries.clear()
+            self._acquire = Timing()
+            self._slow = 0
+
+
+class InstrumentedCursor:
+    """
+    Обёртка над sqlite3.Cursor, замеряющая execute/executemany.
+
+    Для DML число строк берётся из rowcount, для SELECT — считается
+    по строкам, прочитанным через fetch*() и итерацию.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, instrumentation: QueryInstrumentation) -> None:
+        self._cursor = cursor
+        self._instrumentation = instrumentation
+        self._key: Optional[str] = None
+
+    def execute(self, query: str, params: Any = ()) -> InstrumentedCursor:
+        """Выполнить запрос с замером времени."""
+        started = time.perf_counter()
+        self._cursor.execute(query, params)
+        self._record(query, time.perf_counter() - started)
+        return self
+
+    def executemany(self, query: str, params: Any) -> InstrumentedCursor:
+        """Выполнить запрос для набора параметров с замером времени."""
+        started = time.perf_counter()
+        self._cursor.executemany(query, params)
+        self._record(query, time.perf_counter() - started)
+        return self
+
+    def fetchone(self) -> Optional[Tuple[Any, ...]]:
+        """Прочитать одну строку."""
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._add_rows(1)
+        return row
+
+    def fetchmany(self, size: int = 1) -> List[Tuple[Any, ...]]:
+        """Прочитать до size строк."""
+        rows = self._cursor.fetchmany(size)
+        self._add_rows(len(rows))
+        return rows
+
+    def fetchall(self) -> List[Tuple[Any, ...]]:
+        """Прочитать все оставшиеся строки."""
+        rows = self._cursor.fetchall()
+        self._add_rows(len(rows))
+        return rows
+
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        """Перебрать оставшиеся строки."""
+        for row in self._cursor:
+            self._add_rows(1)
+            yield row
+
+    def __getattr__(self, name: str) -> Any:
+        """Остальные атрибуты — у исходного курсора."""
+        return getattr(self._cursor, name)
+
+    def _record(self, query: str, elapsed: float) -> None:
+        """Учесть выполненный запрос."""
+        rows = max(self._cursor.rowcount, 0)
+        self._key = self._instrumentation.record_query(query, elapsed, rows)
+
+    def _add_rows(self, rows: int) -> None:
+        """Добавить прочитанные строки к последнему запросу."""
+        if rows and self._key is not None:
+            self._instrumentation.add_rows(self._key, rows)
+
+
+def enable(slow_query_ms: float = SLOW_QUERY_MS) -> QueryInstrumentation:
+    """Включить сбор статистики запросов и вернуть сборщик."""
+    instrumentation = QueryInstrumentation(slow_query_ms)
+    db_init.set_instrumentation(instrumentation)
+    return instrumentation
+
+
+def disable() -> None:
+    """Выключить сбор статистики запросов."""
+    db_init.set_instrumentation(None)
+
+
+def stats() -> Dict[str, Any]:
+    """Снимок статистики включённого сборщика (пустой, если выключен)."""
+    instrumentation = db_init.get_instrumentation()
+    if instrumentation is None:
+        return {"queries": {}, "acquire": Timing().to_dict(), "slow_queries": 0}
+    return instrumentation.stats()
+
+
+def reset() -> None:
+    """Обнулить статистику включённого сборщика."""
+    instrumentation = db_init.get_instrumentation()
+    if instrumentation is not None:
+        instrumentation.reset()
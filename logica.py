@@ -1,15 +1,25 @@
 from __future__ import annotations
 
 import sqlite3
-from typing import Any, Dict, List, Optional, Tuple
+from collections import Counter
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 from base_repository import BaseRepository
 from db_init import get_db
+from seat_bitmap import SeatBitmap
+
+# Изменение мест сеанса: (ID сеанса, ряд, старый статус, новый статус, количество мест).
+SeatChange = Tuple[int, int, str, str, int]
 
 
 class Movie(BaseRepository):
     """Класс для работы с фильмами."""
 
+    cache_size = 256
+    cache_ttl = 30.0
+
     @property
     def table_name(self) -> str:
         return "movies"
@@ -61,15 +71,31 @@ class Movie(BaseRepository):
         params = tuple(fields_to_update.values()) + (movie_id,)
 
         Movie.execute_query(query, params)
+        Movie.invalidate_cache("movies", [movie_id])
 
 
 class Seat(BaseRepository):
-    """Класс для работы с местами в зале."""
+    """
+    Класс для работы с местами в зале.
+
+    Места сеанса хранятся одним из двух способов:
+        - rows: строка в seats на каждое место (по умолчанию);
+        - bitmap: упакованная карта состояний в seat_maps (2 бита на
+          место) и строки seat_holds только для мест, привязанных к брони.
+    Публичные методы работают одинаково для обоих способов; для мест
+    в режиме bitmap вместо id места возвращается None. Каждое изменение
+    мест в той же транзакции увеличивает theaters.seat_version сеанса и
+    обновляет его счётчики free_count, reserved_count, sold_count и
+    max_block (см. _touch).
+    """
 
     STATUS_FREE = "free"
     STATUS_RESERVED = "reserved"
     STATUS_SOLD = "sold"
 
+    STORAGE_ROWS = "rows"
+    STORAGE_BITMAP = "bitmap"
+
     @property
     def table_name(self) -> str:
         return "seats"
@@ -88,6 +114,13 @@ class Seat(BaseRepository):
     @staticmethod
     def get_available(theater_id: int) -> List[Tuple[Any, ...]]:
         """Получить список свободных мест для сеанса."""
+        seat_map = Seat.get_map(theater_id)
+        if seat_map is not None:
+            return [
+                (None, theater_id, row, col, Seat.STATUS_FREE, None)
+                for row, col in seat_map.positions(Seat.STATUS_FREE)
+            ]
+
         query = """
             SELECT * FROM seats
             WHERE theater_id = ? AND status = ?
@@ -102,6 +135,21 @@ class Seat(BaseRepository):
         col: int,
     ) -> Optional[Tuple[Any, ...]]:
         """Получить одно место по ряду и месту."""
+        seat_map = Seat.get_map(theater_id)
+        if seat_map is not None:
+            if not seat_map.contains(row, col):
+                return None
+            status = seat_map.get(row, col)
+            booking_id = None
+            if status != Seat.STATUS_FREE:
+                query = """
+                    SELECT booking_id FROM seat_holds
+                    WHERE theater_id = ? AND row = ? AND col = ?
+                """
+                hold = Seat.execute_query(query, (theater_id, row, col), fetch_one=True)
+                booking_id = hold[0] if hold else None
+            return None, theater_id, row, col, status, booking_id
+
         query = """
             SELECT * FROM seats
             WHERE theater_id = ? AND row = ? AND col = ?
@@ -111,32 +159,69 @@ class Seat(BaseRepository):
     @staticmethod
     def get_by_booking(booking_id: int) -> List[Tuple[int, int]]:
         """Получить список (ряд, место) по ID бронирования."""
-        query = "SELECT row, col FROM seats WHERE booking_id = ?"
-        result = Seat.execute_query(query, (booking_id,), fetch_all=True)
+        query = """
+            SELECT row, col FROM seats WHERE booking_id = ?
+            UNION ALL
+            SELECT row, col FROM seat_holds WHERE booking_id = ?
+        """
+        result = Seat.execute_query(query, (booking_id, booking_id), fetch_all=True)
         return result if result else []
 
+    @staticmethod
+    def get_statuses(theater_id: int) -> Dict[Tuple[int, int], str]:
+        """Получить статусы всех мест сеанса: {(ряд, место): статус}."""
+        seat_map = Seat.get_map(theater_id)
+        if seat_map is not None:
+            return {(row, col): status for row, col, status in seat_map.cells()}
+
+        query = "SELECT row, col, status FROM seats WHERE theater_id = ?"
+        result = Seat.execute_query(query, (theater_id,), fetch_all=True)
+        return {(row, col): status for row, col, status in result or []}
+
+    @staticmethod
+    def free_positions(cursor: sqlite3.Cursor, theater_id: int) -> List[Tuple[int, int]]:
+        """Получить (ряд, место) свободных мест сеанса, отсортированные по ряду и месту."""
+        seat_map = Seat._load_map(cursor, theater_id)
+        if seat_map is not None:
+            return seat_map.positions(Seat.STATUS_FREE)
+
+        query = """
+            SELECT row, col FROM seats
+            WHERE theater_id = ? AND status = ?
+            ORDER BY row, col
+        """
+        return cursor.execute(query, (theater_id, Seat.STATUS_FREE)).fetchall()
+
     @staticmethod
     def check_available(
         theater_id: int,
         seat_positions: list[tuple[int, int]],
     ) -> bool:
         """Проверить, что все указанные места свободны."""
-        for row, col in seat_positions:
-            query = """
-                SELECT 1 FROM seats
-                WHERE theater_id = ?
-                  AND row = ?
-                  AND col = ?
-                  AND status = ?
-            """
-            result = Seat.execute_query(
-                query,
-                (theater_id, row, col, Seat.STATUS_FREE),
-                fetch_one=True,
+        positions = list(dict.fromkeys(tuple(p) for p in seat_positions))
+        if not positions:
+            return True
+
+        seat_map = Seat.get_map(theater_id)
+        if seat_map is not None:
+            return all(
+                seat_map.contains(row, col) and seat_map.get(row, col) == Seat.STATUS_FREE
+                for row, col in positions
             )
-            if result is None:
-                return False
-        return True
+
+        in_clause, in_params = Seat._positions_clause(positions)
+        query = f"""
+            SELECT COUNT(*) FROM seats
+            WHERE theater_id = ?
+              AND status = ?
+              AND {in_clause}
+        """
+        result = Seat.execute_query(
+            query,
+            (theater_id, Seat.STATUS_FREE) + in_params,
+            fetch_one=True,
+        )
+        return result[0] == len(positions)
 
     @staticmethod
     def reserve(
@@ -145,30 +230,521 @@ class Seat(BaseRepository):
         booking_id: int,
     ) -> None:
         """Пометить места как забронированные и привязать к брони."""
-        query = """
+        if not seat_positions:
+            return
+
+        seat_positions = list(dict.fromkeys(tuple(p) for p in seat_positions))
+        with get_db(immediate=True) as cursor:
+            seat_map = Seat._load_map(cursor, theater_id)
+            if seat_map is not None:
+                positions = [p for p in seat_positions if seat_map.contains(*p)]
+                changes = [
+                    (theater_id, row, seat_map.get(row, col), Seat.STATUS_RESERVED, 1)
+                    for row, col in positions
+                ]
+                Seat._hold_in_map(cursor, theater_id, seat_map, positions, booking_id)
+                Seat._touch(cursor, changes, Seat._map_blocks(theater_id, seat_map, changes))
+                return
+
+            in_clause, in_params = Seat._positions_clause(seat_positions)
+            changes = [
+                (theater_id, row, status, Seat.STATUS_RESERVED, count)
+                for row, status, count in cursor.execute(
+                    f"""
+                    SELECT row, status, COUNT(*) FROM seats
+                    WHERE theater_id = ? AND {in_clause}
+                    GROUP BY row, status
+                    """,
+                    (theater_id,) + in_params,
+                )
+            ]
+            query = f"""
+                UPDATE seats
+                SET status = ?, booking_id = ?
+                WHERE theater_id = ? AND {in_clause}
+            """
+            cursor.execute(
+                query,
+                (Seat.STATUS_RESERVED, booking_id, theater_id) + in_params,
+            )
+            Seat._touch(cursor, changes)
+
+    @staticmethod
+    def claim(
+        cursor: sqlite3.Cursor,
+        theater_id: int,
+        seat_positions: list[tuple[int, int]],
+        booking_id: int,
+    ) -> int:
+        """
+        Занять свободные места одним UPDATE внутри открытой транзакции.
+
+        Возвращает количество реально занятых мест: если оно меньше
+        количества запрошенных, часть мест уже была занята и транзакцию
+        нужно откатить.
+        """
+        if not seat_positions:
+            return 0
+
+        seat_map = Seat._load_map(cursor, theater_id)
+        if seat_map is not None:
+            free = [
+                (row, col)
+                for row, col in seat_positions
+                if seat_map.contains(row, col) and seat_map.get(row, col) == Seat.STATUS_FREE
+            ]
+            if len(free) == len(seat_positions):
+                Seat._hold_in_map(cursor, theater_id, seat_map, free, booking_id)
+                changes = Seat._claim_changes(theater_id, free)
+                Seat._touch(cursor, changes, Seat._map_blocks(theater_id, seat_map, changes))
+            return len(free)
+
+        in_clause, in_params = Seat._positions_clause(seat_positions)
+        query = f"""
             UPDATE seats
             SET status = ?, booking_id = ?
-            WHERE theater_id = ? AND row = ? AND col = ?
+            WHERE theater_id = ? AND status = ? AND {in_clause}
         """
-        for row, col in seat_positions:
-            Seat.execute_query(query, (Seat.STATUS_RESERVED, booking_id, theater_id, row, col))
+        cursor.execute(
+            query,
+            (Seat.STATUS_RESERVED, booking_id, theater_id, Seat.STATUS_FREE) + in_params,
+        )
+        claimed = cursor.rowcount
+        if claimed == len(seat_positions):
+            Seat._touch(cursor, Seat._claim_changes(theater_id, seat_positions))
+        return claimed
+
+    @staticmethod
+    def claim_many(
+        cursor: sqlite3.Cursor,
+        theater_id: int,
+        claims: List[Tuple[int, List[Tuple[int, int]]]],
+    ) -> int:
+        """
+        Занять места нескольких броней сеанса внутри открытой транзакции.
+
+        claims — список (ID брони, места). В отличие от claim(), уже
+        занятые места пропускаются, а счётчики сеанса обновляются один
+        раз на весь пакет. Возвращает количество занятых мест.
+        """
+        holds: List[Tuple[int, int, int, int]] = []
+        seat_map = Seat._load_map(cursor, theater_id)
+        if seat_map is not None:
+            for booking_id, seat_positions in claims:
+                for row, col in seat_positions:
+                    if seat_map.contains(row, col) and seat_map.get(row, col) == Seat.STATUS_FREE:
+                        seat_map.set(row, col, Seat.STATUS_RESERVED)
+                        holds.append((theater_id, row, col, booking_id))
+            cursor.executemany(
+                """
+                INSERT OR REPLACE INTO seat_holds (theater_id, row, col, booking_id)
+                VALUES (?, ?, ?, ?)
+                """,
+                holds,
+            )
+            Seat._save_map(cursor, theater_id, seat_map)
+        else:
+            rows = sorted({row for _, seat_positions in claims for row, _ in seat_positions})
+            placeholders = ", ".join(["?"] * len(rows))
+            free = set(
+                cursor.execute(
+                    f"""
+                    SELECT row, col FROM seats
+                    WHERE theater_id = ? AND status = ? AND row IN ({placeholders})
+                    """,
+                    (theater_id, Seat.STATUS_FREE, *rows),
+                )
+            )
+            for booking_id, seat_positions in claims:
+                for position in map(tuple, seat_positions):
+                    if position in free:
+                        free.discard(position)
+                        holds.append((theater_id, *position, booking_id))
+            cursor.executemany(
+                """
+                UPDATE seats
+                SET status = ?, booking_id = ?
+                WHERE theater_id = ? AND row = ? AND col = ?
+                """,
+                [
+                    (Seat.STATUS_RESERVED, booking_id, theater_id, row, col)
+                    for _, row, col, booking_id in holds
+                ],
+            )
+
+        if holds:
+            changes = Seat._claim_changes(theater_id, [(row, col) for _, row, col, _ in holds])
+            blocks = Seat._map_blocks(theater_id, seat_map, changes) if seat_map else None
+            Seat._touch(cursor, changes, blocks)
+        return len(holds)
 
     @staticmethod
     def sell(booking_id: int) -> None:
         """Пометить места брони как проданные."""
-        query = """
-            UPDATE seats
-            SET status = ?
-            WHERE booking_id = ?
-        """
-        Seat.execute_query(query, (Seat.STATUS_SOLD, booking_id))
+        with get_db(immediate=True) as cursor:
+            Seat.sell_bookings(cursor, [booking_id])
 
     @staticmethod
     def free(booking_id: int) -> None:
         """Освободить места для указанной брони."""
-        query = """
+        with get_db(immediate=True) as cursor:
+            Seat.free_bookings(cursor, [booking_id])
+
+    @staticmethod
+    def sell_bookings(cursor: sqlite3.Cursor, booking_ids: List[int]) -> int:
+        """
+        Пометить места броней как проданные внутри открытой транзакции.
+
+        Возвращает количество изменённых мест.
+        """
+        return Seat._set_booking_status(cursor, booking_ids, Seat.STATUS_SOLD)
+
+    @staticmethod
+    def free_bookings(cursor: sqlite3.Cursor, booking_ids: List[int]) -> int:
+        """
+        Освободить места броней внутри открытой транзакции.
+
+        Возвращает количество освобождённых мест.
+        """
+        return Seat._set_booking_status(cursor, booking_ids, Seat.STATUS_FREE)
+
+    @staticmethod
+    def _set_booking_status(
+        cursor: sqlite3.Cursor,
+        booking_ids: List[int],
+        status: str,
+    ) -> int:
+        """
+        Перевести места броней в status (sold или free) в обоих режимах хранения.
+
+        Старые статусы мест читаются одним запросом по индексу booking_id,
+        поэтому счётчики сеансов обновляются разницами. При освобождении
+        места отвязываются от броней. Возвращает количество изменённых мест.
+        """
+        if not booking_ids:
+            return 0
+        placeholders = ", ".join(["?"] * len(booking_ids))
+        changes: List[SeatChange] = [
+            (theater_id, row, old, status, count)
+            for theater_id, row, old, count in cursor.execute(
+                f"""
+                SELECT theater_id, row, status, COUNT(*) FROM seats
+                WHERE booking_id IN ({placeholders}) AND status != ?
+                GROUP BY theater_id, row, status
+                """,
+                [*booking_ids, status],
+            )
+        ]
+        booking_clause = ", booking_id = NULL" if status == Seat.STATUS_FREE else ""
+        cursor.execute(
+            f"""
             UPDATE seats
-            SET status = ?, booking_id = NULL
-            WHERE booking_id = ?
+            SET status = ?{booking_clause}
+            WHERE booking_id IN ({placeholders}) AND status != ?
+            """,
+            [status, *booking_ids, status],
+        )
+        held, blocks = Seat._update_holds(cursor, booking_ids, status)
+        changes += held
+        Seat._touch(cursor, changes, blocks)
+        return sum(change[4] for change in changes)
+
+    @staticmethod
+    def get_map(theater_id: int) -> Optional[SeatBitmap]:
+        """Получить карту мест сеанса или None, если места хранятся строками."""
+        with get_db() as cursor:
+            return Seat._load_map(cursor, theater_id)
+
+    @staticmethod
+    def create_map(
+        cursor: sqlite3.Cursor,
+        theater_id: int,
+        rows: int,
+        cols: int,
+    ) -> None:
+        """Создать пустую (все места свободны) карту мест сеанса."""
+        cursor.execute(
+            "INSERT INTO seat_maps (theater_id, state) VALUES (?, ?)",
+            (theater_id, SeatBitmap(rows, cols).to_bytes()),
+        )
+
+    @staticmethod
+    def _load_map(cursor: sqlite3.Cursor, theater_id: int) -> Optional[SeatBitmap]:
+        """Прочитать карту мест сеанса внутри открытой транзакции."""
+        query = """
+            SELECT theaters.rows, theaters.cols, seat_maps.state
+            FROM seat_maps
+            JOIN theaters ON theaters.id = seat_maps.theater_id
+            WHERE seat_maps.theater_id = ?
+        """
+        result = cursor.execute(query, (theater_id,)).fetchone()
+        if result is None:
+            return None
+        return SeatBitmap(result[0], result[1], result[2])
+
+    @staticmethod
+    def _save_map(cursor: sqlite3.Cursor, theater_id: int, seat_map: SeatBitmap) -> None:
+        """Записать карту мест сеанса."""
+        cursor.execute(
+            "UPDATE seat_maps SET state = ? WHERE theater_id = ?",
+            (seat_map.to_bytes(), theater_id),
+        )
+
+    @staticmethod
+    def _hold_in_map(
+        cursor: sqlite3.Cursor,
+        theater_id: int,
+        seat_map: SeatBitmap,
+        seat_positions: list[tuple[int, int]],
+        booking_id: int,
+    ) -> None:
+        """Зарезервировать места в карте и привязать их к брони."""
+        for row, col in seat_positions:
+            seat_map.set(row, col, Seat.STATUS_RESERVED)
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO seat_holds (theater_id, row, col, booking_id)
+            VALUES (?, ?, ?, ?)
+            """,
+            [(theater_id, row, col, booking_id) for row, col in seat_positions],
+        )
+        Seat._save_map(cursor, theater_id, seat_map)
+
+    @staticmethod
+    def _update_holds(
+        cursor: sqlite3.Cursor,
+        booking_ids: List[int],
+        status: str,
+    ) -> Tuple[List[SeatChange], Dict[Tuple[int, int], int]]:
+        """
+        Перевести места броней в режиме bitmap в указанный статус.
+
+        Карта каждого затронутого сеанса читается и записывается один
+        раз; при освобождении привязки мест к броням удаляются.
+        Возвращает изменения мест и длины свободных отрезков изменённых
+        рядов (см. _touch).
+        """
+        changes: List[SeatChange] = []
+        blocks: Dict[Tuple[int, int], int] = {}
+        if not booking_ids:
+            return changes, blocks
+        placeholders = ", ".join(["?"] * len(booking_ids))
+        held = cursor.execute(
+            f"""
+            SELECT theater_id, row, col FROM seat_holds
+            WHERE booking_id IN ({placeholders})
+            ORDER BY theater_id
+            """,
+            booking_ids,
+        ).fetchall()
+        if not held:
+            return changes, blocks
+
+        for theater_id, seats in groupby(held, key=itemgetter(0)):
+            seat_map = Seat._load_map(cursor, theater_id)
+            transitions: Counter = Counter()
+            for _, row, col in seats:
+                old = seat_map.get(row, col)
+                if old != status:
+                    seat_map.set(row, col, status)
+                    transitions[(row, old)] += 1
+            Seat._save_map(cursor, theater_id, seat_map)
+            theater_changes = [
+                (theater_id, row, old, status, count)
+                for (row, old), count in sorted(transitions.items())
+            ]
+            changes += theater_changes
+            blocks.update(Seat._map_blocks(theater_id, seat_map, theater_changes))
+
+        if status == Seat.STATUS_FREE:
+            cursor.execute(
+                f"DELETE FROM seat_holds WHERE booking_id IN ({placeholders})",
+                booking_ids,
+            )
+        return changes, blocks
+
+    @staticmethod
+    def occupancy(cursor: sqlite3.Cursor, theater_id: int) -> Dict[str, int]:
+        """
+        Посчитать заполненность сеанса по текущему состоянию мест.
+
+        Возвращает free_count, reserved_count, sold_count и max_block
+        (самый длинный отрезок свободных мест в ряду). Читает все места
+        сеанса, поэтому используется только для сверки и пересчёта.
+        """
+        cells = Seat._cells(cursor, theater_id)
+        counts = Counter(status for _, _, status in cells)
+        free = [(row, col) for row, col, status in cells if status == Seat.STATUS_FREE]
+        return {
+            "free_count": counts[Seat.STATUS_FREE],
+            "reserved_count": counts[Seat.STATUS_RESERVED],
+            "sold_count": counts[Seat.STATUS_SOLD],
+            "max_block": Seat._longest_run(free),
+        }
+
+    @staticmethod
+    def rebuild_row_blocks(cursor: sqlite3.Cursor, theater_id: int) -> None:
+        """Заново заполнить seat_row_blocks сеанса по текущему состоянию мест."""
+        rows = cursor.execute(
+            "SELECT rows FROM theaters WHERE id = ?", (theater_id,)
+        ).fetchone()
+        free = [
+            (row, col)
+            for row, col, status in Seat._cells(cursor, theater_id)
+            if status == Seat.STATUS_FREE
+        ]
+        blocks = {row: 0 for row in range(1, (rows[0] if rows else 0) + 1)}
+        for row, positions in groupby(free, key=itemgetter(0)):
+            blocks[row] = Seat._longest_run(list(positions))
+        cursor.execute("DELETE FROM seat_row_blocks WHERE theater_id = ?", (theater_id,))
+        cursor.executemany(
+            "INSERT INTO seat_row_blocks (theater_id, row, longest) VALUES (?, ?, ?)",
+            [(theater_id, row, longest) for row, longest in blocks.items()],
+        )
+
+    @staticmethod
+    def _cells(cursor: sqlite3.Cursor, theater_id: int) -> List[Tuple[int, int, str]]:
+        """Все места сеанса как (ряд, место, статус), упорядоченные по ряду и месту."""
+        seat_map = Seat._load_map(cursor, theater_id)
+        if seat_map is not None:
+            return list(seat_map.cells())
+        query = """
+            SELECT row, col, status FROM seats
+            WHERE theater_id = ?
+            ORDER BY row, col
         """
-        Seat.execute_query(query, (Seat.STATUS_FREE, booking_id))
+        return cursor.execute(query, (theater_id,)).fetchall()
+
+    @staticmethod
+    def _touch(
+        cursor: sqlite3.Cursor,
+        changes: Iterable[SeatChange],
+        blocks: Optional[Dict[Tuple[int, int], int]] = None,
+    ) -> None:
+        """
+        Отметить изменение мест сеансов внутри открытой транзакции.
+
+        Для каждого сеанса из changes одним UPDATE увеличивается
+        seat_version, к free_count, reserved_count и sold_count
+        прибавляются разницы, а max_block берётся из seat_row_blocks, где
+        пересчитываются только ряды с изменившимися свободными местами.
+        blocks — уже известные длины свободных отрезков {(сеанс, ряд):
+        длина} (режим bitmap); остальные ряды читаются из seats.
+        """
+        deltas: Dict[int, Counter] = {}
+        free_rows: Dict[int, Set[int]] = {}
+        for theater_id, row, old, new, count in changes:
+            if old == new or not count:
+                continue
+            delta = deltas.setdefault(theater_id, Counter())
+            delta[old] -= count
+            delta[new] += count
+            if Seat.STATUS_FREE in (old, new):
+                free_rows.setdefault(theater_id, set()).add(row)
+
+        for theater_id in sorted(deltas):
+            rows = sorted(free_rows.get(theater_id, ()))
+            if rows:
+                Seat._update_row_blocks(cursor, theater_id, rows, blocks or {})
+                max_block = """(
+                    SELECT COALESCE(MAX(longest), 0) FROM seat_row_blocks
+                    WHERE theater_id = :theater_id
+                )"""
+            else:
+                max_block = "max_block"
+            delta = deltas[theater_id]
+            cursor.execute(
+                f"""
+                UPDATE theaters
+                SET seat_version = seat_version + 1,
+                    free_count = free_count + :free,
+                    reserved_count = reserved_count + :reserved,
+                    sold_count = sold_count + :sold,
+                    max_block = {max_block}
+                WHERE id = :theater_id
+                """,
+                {
+                    "free": delta[Seat.STATUS_FREE],
+                    "reserved": delta[Seat.STATUS_RESERVED],
+                    "sold": delta[Seat.STATUS_SOLD],
+                    "theater_id": theater_id,
+                },
+            )
+
+    @staticmethod
+    def _update_row_blocks(
+        cursor: sqlite3.Cursor,
+        theater_id: int,
+        rows: List[int],
+        blocks: Dict[Tuple[int, int], int],
+    ) -> None:
+        """Записать в seat_row_blocks длины свободных отрезков указанных рядов сеанса."""
+        longest = {row: blocks[(theater_id, row)] for row in rows if (theater_id, row) in blocks}
+        missing = [row for row in rows if row not in longest]
+        if missing:
+            placeholders = ", ".join(["?"] * len(missing))
+            free = cursor.execute(
+                f"""
+                SELECT row, col FROM seats
+                WHERE theater_id = ? AND row IN ({placeholders}) AND status = ?
+                ORDER BY row, col
+                """,
+                (theater_id, *missing, Seat.STATUS_FREE),
+            ).fetchall()
+            longest.update(dict.fromkeys(missing, 0))
+            for row, positions in groupby(free, key=itemgetter(0)):
+                longest[row] = Seat._longest_run(list(positions))
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO seat_row_blocks (theater_id, row, longest)
+            VALUES (?, ?, ?)
+            """,
+            [(theater_id, row, length) for row, length in longest.items()],
+        )
+
+    @staticmethod
+    def _claim_changes(
+        theater_id: int,
+        seat_positions: Iterable[Tuple[int, int]],
+    ) -> List[SeatChange]:
+        """Изменения мест при захвате свободных мест: free -> reserved по рядам."""
+        per_row = Counter(row for row, _ in seat_positions)
+        return [
+            (theater_id, row, Seat.STATUS_FREE, Seat.STATUS_RESERVED, count)
+            for row, count in sorted(per_row.items())
+        ]
+
+    @staticmethod
+    def _map_blocks(
+        theater_id: int,
+        seat_map: SeatBitmap,
+        changes: Iterable[SeatChange],
+    ) -> Dict[Tuple[int, int], int]:
+        """Длины свободных отрезков изменённых рядов по карте мест: {(сеанс, ряд): длина}."""
+        return {
+            (theater_id, row): seat_map.longest_run(row, Seat.STATUS_FREE)
+            for row in {change[1] for change in changes}
+        }
+
+    @staticmethod
+    def _longest_run(free_positions: List[Tuple[int, int]]) -> int:
+        """Длина самого длинного отрезка соседних мест в одном ряду."""
+        longest = length = 0
+        previous: Optional[Tuple[int, int]] = None
+        for row, col in free_positions:
+            if previous is not None and previous == (row, col - 1):
+                length += 1
+            else:
+                length = 1
+            longest = max(longest, length)
+            previous = (row, col)
+        return longest
+
+    @staticmethod
+    def _positions_clause(
+        seat_positions: list[tuple[int, int]],
+    ) -> Tuple[str, Tuple[int, ...]]:
+        """Собрать условие (row, col) IN (VALUES ...) и его параметры."""
+        values = ", ".join(["(?, ?)"] * len(seat_positions))
+        params = tuple(value for position in seat_positions for value in position)
+        return f"(row, col) IN (VALUES {values})", params
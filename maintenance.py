@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import argparse
+from typing import List, Optional
+
+from db_init import init_db
+from reconciliation import AMOUNT_TOLERANCE, reconcile
+from theater import Theater
+
+
+def check_occupancy(theater_ids: Optional[List[int]] = None) -> int:
+    """Вывести расхождения счётчиков заполненности и вернуть их количество."""
+    mismatches = Theater.check_occupancy(theater_ids)
+    for mismatch in mismatches:
+        print(
+            f"Сеанс {mismatch['theater_id']}: сохранено {mismatch['stored']}, "
+            f"по местам {mismatch['actual']}"
+        )
+    print(f"Расхождений: {len(mismatches)}")
+    return len(mismatches)
+
+
+def rebuild_occupancy(theater_ids: Optional[List[int]] = None) -> int:
+    """Пересчитать счётчики заполненности и вернуть количество исправленных сеансов."""
+    fixed = Theater.rebuild_occupancy(theater_ids)
+    print(f"Исправлено сеансов: {fixed}")
+    return fixed
+
+
+def reconcile_ledger(
+    filename: str,
+    output: Optional[str] = None,
+    tolerance: float = AMOUNT_TOLERANCE,
+) -> int:
+    """Сверить выписку процессинга с платежами и вернуть количество расхождений."""
+    stats = reconcile(filename, output, tolerance)
+    print(
+        f"Выписка: {stats['ledger']}, платежей: {stats['payments']}, "
+        f"совпало: {stats['matched']}"
+    )
+    print(
+        f"Нет в БД: {stats['missing']}, нет в выписке: {stats['extra']}, "
+        f"расхождение суммы: {stats['amount_mismatch']}"
+    )
+    return stats["missing"] + stats["extra"] + stats["amount_mismatch"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Запуск служебных команд из командной строки."""
+    parser = argparse.ArgumentParser(description="Служебные команды кинотеатра.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (
+        ("check-occupancy", "сверить счётчики заполненности сеансов с местами"),
+        ("rebuild-occupancy", "пересчитать счётчики заполненности сеансов"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("theater_ids", nargs="*", type=int, help="ID сеансов (по умолчанию все)")
+
+    command = commands.add_parser(
+        "reconcile", help="сверить выписку процессинга (CSV/NDJSON) с платежами"
+    )
+    command.add_argument("ledger", help="файл выписки, отсортированный по transaction_id")
+    command.add_argument("--output", help="куда записать расхождения (NDJSON)")
+    command.add_argument("--tolerance", type=float, default=AMOUNT_TOLERANCE)
+
+    args = parser.parse_args(argv)
+    init_db()
+
+    if args.command == "reconcile":
+        return 1 if reconcile_ledger(args.ledger, args.output, args.tolerance) else 0
+    theater_ids = args.theater_ids or None
+    if args.command == "check-occupancy":
+        return 1 if check_occupancy(theater_ids) else 0
+    rebuild_occupancy(theater_ids)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import sqlite3
 import uuid
 from typing import Any, Dict, List, Optional, Tuple
 
 from base_repository import BaseRepository
 from booking import Booking
+from db_init import get_db
 from exceptions import PaymentError
+from tracing import annotate, span, traced
 
 
 class Payment(BaseRepository):
@@ -26,42 +29,208 @@ class Payment(BaseRepository):
             3: "status",
             4: "transaction_id",
             5: "created_at",
+            7: "idempotency_key",
         }
 
     @staticmethod
-    def process(booking_id: int, amount: float) -> int:
+    @traced("payment.process")
+    def process(
+        booking_id: int,
+        amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> int:
         """
         Обработать платёж и вернуть ID платежа.
 
+        Если передан idempotency_key и платёж с таким ключом уже есть,
+        возвращается его ID без повторной проверки брони: клиент может
+        безопасно повторить запрос после таймаута.
+
         Бросает:
-            PaymentError: если бронь не найдена или сумма не совпадает.
+            PaymentError: если бронь не найдена, сумма не совпадает,
+                бронь уже оплачена с другим ключом или ключ уже
+                использован для другой брони или суммы.
         """
-        booking = Booking()
-        booking_data = booking.get(booking_id)
+        annotate(booking_id=booking_id)
+        if idempotency_key is not None:
+            with span("payment.idempotency_lookup"), get_db() as cursor:
+                payment_id = Payment._find_by_key(cursor, idempotency_key, booking_id, amount)
+            if payment_id is not None:
+                annotate(replayed=True)
+                return payment_id
+
+        with span("booking.lookup"):
+            booking = Booking()
+            booking_data = booking.get(booking_id)
         if booking_data is None:
             raise PaymentError("Бронирование не найдено.")
 
-        expected_amount = booking_data[5]
+        Payment._check_amount(booking_data[5], amount)
+        with span("payment.insert"), get_db() as cursor:
+            return Payment._insert(cursor, booking_id, amount, idempotency_key)
+
+    @staticmethod
+    def process_in_transaction(
+        cursor: sqlite3.Cursor,
+        booking_id: int,
+        amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> int:
+        """
+        Обработать платёж внутри открытой транзакции (см. process).
+
+        Бросает:
+            PaymentError: если бронь не найдена, сумма не совпадает,
+                бронь уже оплачена с другим ключом или ключ уже
+                использован для другой брони или суммы.
+        """
+        if idempotency_key is not None:
+            payment_id = Payment._find_by_key(cursor, idempotency_key, booking_id, amount)
+            if payment_id is not None:
+                return payment_id
+        return Payment._process_new(cursor, booking_id, amount, idempotency_key)
+
+    @staticmethod
+    @traced("payment.pay_and_confirm")
+    def pay_and_confirm(
+        booking_id: int,
+        amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> int:
+        """
+        Оплатить и подтвердить бронирование одной транзакцией.
+
+        Платёж и подтверждение брони (см. Booking.confirm) выполняются в
+        одной транзакции BEGIN IMMEDIATE: при любой ошибке не остаётся
+        ни платежа, ни подтверждения. Повтор с тем же idempotency_key
+        возвращает ID уже записанного платежа; если этот платёж был
+        записан через process() и бронь ещё не подтверждена, она
+        подтверждается в той же транзакции.
+
+        Бросает:
+            PaymentError: если бронь не найдена, сумма не совпадает,
+                бронь уже оплачена с другим ключом или ключ уже
+                использован для другой брони или суммы.
+            BookingError: если бронь не в статусе pending (при повторе —
+                не pending и не confirmed).
+        """
+        annotate(booking_id=booking_id)
+        with span("booking.transaction"), get_db(immediate=True) as cursor:
+            payment_id = None
+            if idempotency_key is not None:
+                payment_id = Payment._find_by_key(cursor, idempotency_key, booking_id, amount)
+            if payment_id is None:
+                with span("payment.insert"):
+                    payment_id = Payment._process_new(
+                        cursor, booking_id, amount, idempotency_key
+                    )
+            else:
+                annotate(replayed=True)
+                status = cursor.execute(
+                    "SELECT status FROM bookings WHERE id = ?", (booking_id,)
+                ).fetchone()[0]
+                if status == Booking.STATUS_CONFIRMED:
+                    return payment_id
+            Booking.confirm_in_transaction(cursor, booking_id)
+            return payment_id
+
+    @staticmethod
+    def _process_new(
+        cursor: sqlite3.Cursor,
+        booking_id: int,
+        amount: float,
+        idempotency_key: Optional[str],
+    ) -> int:
+        """
+        Проверить бронь и записать платёж, когда ключ уже проверен вызывающим.
+
+        Бросает:
+            PaymentError: если бронь не найдена, сумма не совпадает
+                или бронь уже оплачена.
+        """
+        result = cursor.execute(
+            "SELECT total_price FROM bookings WHERE id = ?", (booking_id,)
+        ).fetchone()
+        if result is None:
+            raise PaymentError("Бронирование не найдено.")
+        Payment._check_amount(result[0], amount)
+        return Payment._insert(cursor, booking_id, amount, idempotency_key)
+
+    @staticmethod
+    def _find_by_key(
+        cursor: sqlite3.Cursor,
+        idempotency_key: str,
+        booking_id: int,
+        amount: float,
+    ) -> Optional[int]:
+        """
+        Найти ID платежа по ключу идемпотентности (по индексу).
+
+        Бросает:
+            PaymentError: если ключ использован для другой брони или суммы.
+        """
+        result = cursor.execute(
+            "SELECT id, booking_id, amount FROM payments WHERE idempotency_key = ?",
+            (idempotency_key,),
+        ).fetchone()
+        if result is None:
+            return None
+        if (result[1], result[2]) != (booking_id, amount):
+            raise PaymentError("Ключ идемпотентности уже использован для другого платежа.")
+        return result[0]
+
+    @staticmethod
+    def _check_amount(expected_amount: float, amount: float) -> None:
+        """
+        Проверить, что сумма платежа равна стоимости брони.
+
+        Бросает:
+            PaymentError: если сумма не совпадает.
+        """
         if amount != expected_amount:
             raise PaymentError(
                 f"Сумма не совпадает: ожидалось {expected_amount}, "
                 f"получено {amount}."
             )
 
-        transaction_id = str(uuid.uuid4())
+    @staticmethod
+    def _insert(
+        cursor: sqlite3.Cursor,
+        booking_id: int,
+        amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> int:
+        """
+        Записать успешный платёж с новым transaction_id и вернуть его ID.
+
+        Если параллельный запрос с тем же ключом успел записать платёж
+        первым, возвращается ID этого платежа.
+
+        Бросает:
+            PaymentError: если бронь уже оплачена.
+        """
         query = """
-            INSERT INTO payments (booking_id, amount, status, transaction_id)
-            VALUES (?, ?, ?, ?)
+            INSERT INTO payments (booking_id, amount, status, transaction_id,
+                                  idempotency_key)
+            VALUES (?, ?, ?, ?, ?)
         """
-        return Payment.execute_query(
-            query,
-            (
-                booking_id,
-                amount,
-                Payment.STATUS_COMPLETED,
-                transaction_id,
-            ),
-        )
+        try:
+            return cursor.execute(
+                query,
+                (
+                    booking_id,
+                    amount,
+                    Payment.STATUS_COMPLETED,
+                    str(uuid.uuid4()),
+                    idempotency_key,
+                ),
+            ).lastrowid
+        except sqlite3.IntegrityError:
+            if idempotency_key is not None:
+                payment_id = Payment._find_by_key(cursor, idempotency_key, booking_id, amount)
+                if payment_id is not None:
+                    return payment_id
+            raise PaymentError("Бронирование уже оплачено.")
 
     @staticmethod
     def get_by_booking(booking_id: int) -> Optional[Tuple[Any, ...]]:
@@ -81,4 +250,5 @@ class Payment(BaseRepository):
             "status": payment[3],
             "transaction_id": payment[4],
             "created_at": payment[5],
+            "idempotency_key": payment[7],
         }
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+from typing import IO, Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from db_init import get_db
+
+RECONCILE_CHUNK_SIZE = 1000
+AMOUNT_TOLERANCE = 0.005
+
+KIND_MISSING = "missing"
+KIND_EXTRA = "extra"
+KIND_AMOUNT_MISMATCH = "amount_mismatch"
+
+
+def read_ledger(filename: str) -> Iterator[Tuple[str, float]]:
+    """
+    Построчно прочитать выписку процессинга: (transaction_id, amount).
+
+    Формат определяется по расширению: .ndjson/.jsonl — по JSON объекту
+    на строку, иначе CSV с заголовком; колонки transaction_id и amount
+    обязательны, остальные игнорируются. Файлы .gz читаются через gzip.
+    Выписка должна быть отсортирована по transaction_id по возрастанию.
+
+    Бросает:
+        ValueError: если строка без transaction_id/amount или порядок нарушен.
+    """
+    with _open(filename) as file:
+        name = filename[:-3] if filename.endswith(".gz") else filename
+        if name.endswith((".ndjson", ".jsonl")):
+            records: Iterable[Dict[str, Any]] = (
+                json.loads(line) for line in file if line.strip()
+            )
+        else:
+            records = csv.DictReader(file)
+
+        previous: Optional[str] = None
+        for number, record in enumerate(records, 1):
+            try:
+                transaction_id = str(record["transaction_id"])
+                amount = float(record["amount"])
+            except (KeyError, TypeError, ValueError) as error:
+                raise ValueError(
+                    f"Запись {number}: некорректная строка выписки ({error})."
+                ) from error
+            if previous is not None and transaction_id <= previous:
+                raise ValueError(
+                    f"Запись {number}: выписка не отсортирована по transaction_id "
+                    f"('{transaction_id}' после '{previous}')."
+                )
+            previous = transaction_id
+            yield transaction_id, amount
+
+
+def iter_payments(chunk_size: int = RECONCILE_CHUNK_SIZE) -> Iterator[Tuple[str, int, float]]:
+    """
+    Перебрать платежи в порядке transaction_id: (transaction_id, id, amount).
+
+    Порядок обеспечивает индекс idx_payments_transaction, курсор читается
+    через fetchmany(chunk_size), поэтому память не зависит от числа платежей.
+    """
+    query = """
+        SELECT transaction_id, id, amount FROM payments
+        WHERE transaction_id IS NOT NULL
+        ORDER BY transaction_id
+    """
+    with get_db() as cursor:
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield from rows
+
+
+def iter_discrepancies(
+    ledger: Iterable[Tuple[str, float]],
+    payments: Iterable[Tuple[str, int, float]],
+    tolerance: float = AMOUNT_TOLERANCE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Слить два отсортированных по transaction_id потока и вернуть расхождения.
+
+    Каждое расхождение — словарь {"kind", "transaction_id",
+    "ledger_amount", "payment_id", "payment_amount"}, где kind:
+        missing — транзакция есть в выписке, но нет среди платежей;
+        extra — платёж есть в БД, но отсутствует в выписке;
+        amount_mismatch — суммы отличаются больше чем на tolerance.
+    В памяти держится только по одной текущей записи каждого потока.
+    """
+    ledger_rows = iter(ledger)
+    payment_rows = iter(payments)
+    entry = next(ledger_rows, None)
+    payment = next(payment_rows, None)
+
+    while entry is not None or payment is not None:
+        if payment is None or (entry is not None and entry[0] < payment[0]):
+            yield _discrepancy(KIND_MISSING, entry[0], entry[1], None)
+            entry = next(ledger_rows, None)
+        elif entry is None or payment[0] < entry[0]:
+            yield _discrepancy(KIND_EXTRA, payment[0], None, payment)
+            payment = next(payment_rows, None)
+        else:
+            if abs(entry[1] - payment[2]) > tolerance:
+                yield _discrepancy(KIND_AMOUNT_MISMATCH, entry[0], entry[1], payment)
+            entry = next(ledger_rows, None)
+            payment = next(payment_rows, None)
+
+
+def reconcile(
+    filename: str,
+    output: Optional[str] = None,
+    tolerance: float = AMOUNT_TOLERANCE,
+    chunk_size: int = RECONCILE_CHUNK_SIZE,
+) -> Dict[str, int]:
+    """
+    Сверить выписку процессинга с таблицей payments.
+
+    Расхождения пишутся в output (NDJSON, по записи на строку) по мере
+    нахождения. Возвращает количество записей выписки, платежей,
+    совпавших транзакций и расхождений каждого вида.
+
+    Бросает:
+        ValueError: если выписка некорректна или не отсортирована.
+    """
+    stats = {
+        "ledger": 0,
+        "payments": 0,
+        "matched": 0,
+        KIND_MISSING: 0,
+        KIND_EXTRA: 0,
+        KIND_AMOUNT_MISMATCH: 0,
+    }
+
+    def counted(rows: Iterable[Any], key: str) -> Iterator[Any]:
+        for row in rows:
+            stats[key] += 1
+            yield row
+
+    ledger = counted(read_ledger(filename), "ledger")
+    payments = counted(iter_payments(chunk_size), "payments")
+    file = open(output, "w", encoding="utf-8") if output else None
+    try:
+        for discrepancy in iter_discrepancies(ledger, payments, tolerance):
+            stats[discrepancy["kind"]] += 1
+            if file is not None:
+                file.write(json.dumps(discrepancy, ensure_ascii=False) + "\n")
+    finally:
+        if file is not None:
+            file.close()
+
+    stats["matched"] = stats["ledger"] - stats[KIND_MISSING] - stats[KIND_AMOUNT_MISMATCH]
+    return stats
+
+
+def _discrepancy(
+    kind: str,
+    transaction_id: str,
+    ledger_amount: Optional[float],
+    payment: Optional[Tuple[str, int, float]],
+) -> Dict[str, Any]:
+    """Собрать запись о расхождении."""
+    return {
+        "kind": kind,
+        "transaction_id": transaction_id,
+        "ledger_amount": ledger_amount,
+        "payment_id": payment[1] if payment else None,
+        "payment_amount": payment[2] if payment else None,
+    }
+
+
+def _open(filename: str) -> IO[str]:
+    """Открыть выписку на чтение, .gz — через gzip."""
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt", encoding="utf-8", newline="")
+    return open(filename, encoding="utf-8", newline="")
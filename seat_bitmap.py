@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import Iterator, List, Tuple
+
+# Коды состояний: порядковый номер в кортеже — 2-битное значение места.
+STATES: Tuple[str, ...] = ("free", "reserved", "sold")
+BITS_PER_SEAT = 2
+SEATS_PER_BYTE = 8 // BITS_PER_SEAT
+_MASK = (1 << BITS_PER_SEAT) - 1
+
+
+class SeatBitmap:
+    """
+    Компактная карта состояний мест зала.
+
+    Каждое место занимает 2 бита (free = 0, reserved = 1, sold = 2),
+    места упакованы построчно: ряд 1 место 1, ряд 1 место 2 и т.д.
+    Для зала 30x40 это 300 байт вместо 1200 строк таблицы seats.
+    """
+
+    def __init__(self, rows: int, cols: int, data: bytes = b"") -> None:
+        self.rows = rows
+        self.cols = cols
+        size = (rows * cols + SEATS_PER_BYTE - 1) // SEATS_PER_BYTE
+        if data and len(data) != size:
+            raise ValueError(
+                f"Размер карты мест {len(data)} байт, ожидалось {size}."
+            )
+        self._data = bytearray(data) if data else bytearray(size)
+
+    def contains(self, row: int, col: int) -> bool:
+        """Проверить, что место существует в зале."""
+        return 1 <= row <= self.rows and 1 <= col <= self.cols
+
+    def get(self, row: int, col: int) -> str:
+        """Вернуть статус места."""
+        index, shift = self._locate(row, col)
+        return STATES[(self._data[index] >> shift) & _MASK]
+
+    def set(self, row: int, col: int, status: str) -> None:
+        """Установить статус места."""
+        index, shift = self._locate(row, col)
+        code = STATES.index(status)
+        self._data[index] = (self._data[index] & ~(_MASK << shift)) | (code << shift)
+
+    def positions(self, status: str) -> List[Tuple[int, int]]:
+        """Вернуть список (ряд, место) всех мест с указанным статусом."""
+        return [(row, col) for row, col, state in self.cells() if state == status]
+
+    def longest_run(self, row: int, status: str = "free") -> int:
+        """Длина самого длинного отрезка соседних мест ряда с указанным статусом."""
+        longest = length = 0
+        for col in range(1, self.cols + 1):
+            length = length + 1 if self.get(row, col) == status else 0
+            longest = max(longest, length)
+        return longest
+
+    def cells(self) -> Iterator[Tuple[int, int, str]]:
+        """Перебрать все места как (ряд, место, статус) построчно."""
+        data = self._data
+        for row in range(1, self.rows + 1):
+            offset = (row - 1) * self.cols
+            for col in range(1, self.cols + 1):
+                index = offset + col - 1
+                shift = (index % SEATS_PER_BYTE) * BITS_PER_SEAT
+                yield row, col, STATES[(data[index // SEATS_PER_BYTE] >> shift) & _MASK]
+
+    def to_bytes(self) -> bytes:
+        """Вернуть упакованное представление для хранения в BLOB."""
+        return bytes(self._data)
+
+    def _locate(self, row: int, col: int) -> Tuple[int, int]:
+        """Вернуть (номер байта, сдвиг) для места."""
+        if not self.contains(row, col):
+            raise IndexError(f"Места ({row}, {col}) нет в зале.")
+        index = (row - 1) * self.cols + col - 1
+        return index // SEATS_PER_BYTE, (index % SEATS_PER_BYTE) * BITS_PER_SEAT
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+from db_init import get_db
+from logica import Seat
+
+# Непрерывный отрезок свободных мест в ряду: (ряд, первое место, длина).
+Run = Tuple[int, int, int]
+
+DEFAULT_PREFERENCES: Dict[str, Any] = {
+    # Предпочтительный ряд; None — ряд на 2/3 глубины зала.
+    "preferred_row": None,
+    # Вес удалённости от предпочтительного ряда.
+    "row_weight": 1.0,
+    # Вес удалённости блока от центра ряда.
+    "center_weight": 1.0,
+    # Разрешить разбивку на несколько групп, если блока из n мест нет.
+    "allow_split": True,
+}
+
+
+def free_runs(free_positions: List[Tuple[int, int]]) -> List[Run]:
+    """
+    Свернуть отсортированные свободные места в отрезки по рядам.
+
+    Места должны быть отсортированы по (ряд, место).
+    """
+    runs: List[Run] = []
+    start_row = start_col = length = 0
+    for row, col in free_positions:
+        if length and row == start_row and col == start_col + length:
+            length += 1
+            continue
+        if length:
+            runs.append((start_row, start_col, length))
+        start_row, start_col, length = row, col, 1
+    if length:
+        runs.append((start_row, start_col, length))
+    return runs
+
+
+def choose_seats(
+    rows: int,
+    cols: int,
+    free_positions: List[Tuple[int, int]],
+    n: int,
+    preferences: Optional[Dict[str, Any]] = None,
+) -> Optional[List[Tuple[int, int]]]:
+    """
+    Выбрать n лучших свободных мест зала rows x cols.
+
+    Сначала ищется один блок из n соседних мест в ряду с наименьшей
+    оценкой (удалённость от центра ряда и от предпочтительного ряда).
+    Если такого блока нет и разрешена разбивка, места набираются
+    жадно наибольшими лучшими блоками. Возвращает список (ряд, место)
+    или None, если свободных мест не хватает.
+    """
+    if n < 1:
+        return []
+    prefs = {**DEFAULT_PREFERENCES, **(preferences or {})}
+    if prefs["preferred_row"] is None:
+        prefs["preferred_row"] = max(1, round(rows * 2 / 3))
+
+    runs = free_runs(free_positions)
+    if sum(run[2] for run in runs) < n:
+        return None
+
+    block = _best_block(runs, n, rows, cols, prefs)
+    if block is not None:
+        row, start, _ = block
+        return [(row, col) for col in range(start, start + n)]
+    if not prefs["allow_split"]:
+        return None
+
+    chosen: List[Tuple[int, int]] = []
+    remaining = n
+    while remaining:
+        size = min(remaining, max(run[2] for run in runs))
+        row, start, _ = _best_block(runs, size, rows, cols, prefs)
+        chosen.extend((row, col) for col in range(start, start + size))
+        runs = _take(runs, row, start, size)
+        remaining -= size
+    return sorted(chosen)
+
+
+def find_best_seats(
+    theater_id: int,
+    n: int,
+    preferences: Optional[Dict[str, Any]] = None,
+) -> Optional[List[Tuple[int, int]]]:
+    """
+    Найти n лучших свободных мест сеанса (см. choose_seats).
+
+    Возвращает None, если сеанс не найден или мест не хватает.
+    """
+    with get_db() as cursor:
+        return find_in_transaction(cursor, theater_id, n, preferences)
+
+
+def find_in_transaction(
+    cursor: sqlite3.Cursor,
+    theater_id: int,
+    n: int,
+    preferences: Optional[Dict[str, Any]] = None,
+) -> Optional[List[Tuple[int, int]]]:
+    """Найти лучшие места, читая состояние через открытую транзакцию."""
+    theater = cursor.execute(
+        "SELECT rows, cols FROM theaters WHERE id = ?", (theater_id,)
+    ).fetchone()
+    if theater is None:
+        return None
+    free = Seat.free_positions(cursor, theater_id)
+    return choose_seats(theater[0], theater[1], free, n, preferences)
+
+
+def _best_block(
+    runs: List[Run],
+    size: int,
+    rows: int,
+    cols: int,
+    prefs: Dict[str, Any],
+) -> Optional[Run]:
+    """Вернуть лучший блок (ряд, первое место, size) или None."""
+    center = (cols + 1) / 2
+    best: Optional[Tuple[float, int, int]] = None
+    for row, start, length in runs:
+        if length < size:
+            continue
+        # Начало блока, ближайшее к центру ряда, в пределах отрезка.
+        ideal = round(center - (size - 1) / 2)
+        block_start = min(max(ideal, start), start + length - size)
+        block_center = block_start + (size - 1) / 2
+        score = (
+            prefs["center_weight"] * abs(block_center - center) / cols
+            + prefs["row_weight"] * abs(row - prefs["preferred_row"]) / rows
+        )
+        candidate = (score, row, block_start)
+        if best is None or candidate < best:
+            best = candidate
+    if best is None:
+        return None
+    return best[1], best[2], size
+
+
+def _take(runs: List[Run], row: int, start: int, size: int) -> List[Run]:
+    """Убрать занятый блок из списка отрезков."""
+    result: List[Run] = []
+    for run_row, run_start, length in runs:
+        run_end = run_start + length
+        if run_row != row or not run_start <= start < run_end:
+            result.append((run_row, run_start, length))
+            continue
+        if start > run_start:
+            result.append((run_row, run_start, start - run_start))
+        if start + size < run_end:
+            result.append((run_row, start + size, run_end - start - size))
+    return result
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
+import argparse
+import random
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 from faker import Faker
 
-from logica import Movie
+from booking import Booking
+from db_init import get_db, init_db
+from logica import Movie, Seat
+from payments import Payment
 from theater import Theater
 
 fake = Faker("ru_RU")
 
+BULK_BATCH_SIZE = 500
+# Размер словаря Faker, из которого собираются названия и описания.
+BULK_WORDS = 400
+BULK_TEXTS = 50
+
 
 def seed_movies(count: int = 5) -> List[int]:
     """Создать случайные фильмы и вернуть их ID."""
@@ -60,3 +72,235 @@ def seed_theaters(movie_ids: List[int], per_movie: int = 2) -> List[int]:
                 theater_ids.append(theater_id)
 
     return theater_ids
+
+
+def seed_bulk(
+    movies: int = 100,
+    sessions_per_movie: int = 10,
+    rows: Tuple[int, int] = (8, 20),
+    cols: Tuple[int, int] = (10, 30),
+    occupancy: float = 0.0,
+    confirmed_share: float = 0.7,
+    seed: int = 0,
+    batch_size: int = BULK_BATCH_SIZE,
+    seat_storage: str = Seat.STORAGE_ROWS,
+    start: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Быстро заполнить БД большим синтетическим набором данных.
+
+    Фильмы и сеансы пишутся пакетами по batch_size, одна транзакция на
+    пакет. Faker вызывается только для небольшого словаря, значения
+    собираются из него генератором random.Random(seed), поэтому при
+    одинаковых seed и start данные совпадают.
+
+    При occupancy > 0 на сеансах создаются брони (группы по 1-4 места
+    в ряду) так, чтобы занятой была примерно доля occupancy мест;
+    доля confirmed_share броней подтверждается и получает платёж.
+
+    Возвращает количество созданных фильмов, сеансов, мест, броней,
+    платежей и время работы в секундах.
+    """
+    started = time.perf_counter()
+    rng = random.Random(seed)
+    generator = Faker("ru_RU")
+    generator.seed_instance(seed)
+    words = [word.capitalize() for word in generator.words(nb=BULK_WORDS)]
+    texts = [generator.text(max_nb_chars=120) for _ in range(BULK_TEXTS)]
+    if start is None:
+        start = datetime.combine(datetime.now().date(), datetime.min.time())
+
+    stats = {"movies": 0, "theaters": 0, "seats": 0, "bookings": 0, "payments": 0}
+    used_titles: set = set()
+    for batch_start in range(0, movies, batch_size):
+        movie_ids = _insert_movies(
+            rng, words, texts, used_titles, min(batch_size, movies - batch_start)
+        )
+        stats["movies"] += len(movie_ids)
+
+        sessions = [
+            {
+                "movie_id": movie_id,
+                "rows": rng.randint(*rows),
+                "cols": rng.randint(*cols),
+                "price": float(rng.randrange(200, 650, 50)),
+                "schedule": (
+                    start + timedelta(days=rng.randint(0, 30), hours=rng.randint(10, 23))
+                ).isoformat(),
+                "seat_storage": seat_storage,
+            }
+            for movie_id in movie_ids
+            for _ in range(sessions_per_movie)
+        ]
+        for offset in range(0, len(sessions), batch_size):
+            chunk = sessions[offset:offset + batch_size]
+            theater_ids = Theater.add_many(chunk)
+            stats["theaters"] += len(theater_ids)
+            stats["seats"] += sum(session["rows"] * session["cols"] for session in chunk)
+            if occupancy > 0:
+                booked = _book_sessions(
+                    rng, list(zip(theater_ids, chunk)), occupancy, confirmed_share
+                )
+                stats["bookings"] += booked["bookings"]
+                stats["payments"] += booked["payments"]
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def _insert_movies(
+    rng: random.Random,
+    words: List[str],
+    texts: List[str],
+    used_titles: set,
+    count: int,
+) -> List[int]:
+    """Вставить пакет фильмов одной транзакцией и вернуть их ID."""
+    movie_ids: List[int] = []
+    with get_db() as cursor:
+        for _ in range(count):
+            title = " ".join(rng.sample(words, rng.randint(1, 3)))
+            while title in used_titles:
+                title = f"{title} {rng.randint(2, 99)}"
+            used_titles.add(title)
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO movies (title, duration, rating, description)
+                VALUES (?, ?, ?, ?)
+                """,
+                (
+                    title,
+                    rng.randint(80, 180),
+                    round(rng.uniform(4.0, 9.5), 1),
+                    rng.choice(texts),
+                ),
+            )
+            if cursor.rowcount:
+                movie_ids.append(cursor.lastrowid)
+    return movie_ids
+
+
+def _book_sessions(
+    rng: random.Random,
+    sessions: List[Tuple[Optional[int], Dict[str, Any]]],
+    occupancy: float,
+    confirmed_share: float,
+) -> Dict[str, int]:
+    """
+    Создать брони и платежи на пакете сеансов одной транзакцией.
+
+    ID броней назначаются явно от sqlite_sequence: транзакция держит
+    блокировку на запись, поэтому брони вставляются одним executemany.
+    """
+    bookings: List[Tuple[int, int, str, str, float, str]] = []
+    claims: Dict[int, List[Tuple[int, List[Tuple[int, int]]]]] = {}
+    confirmed: List[int] = []
+    payments: List[Tuple[int, float, str, str]] = []
+
+    with get_db(immediate=True) as cursor:
+        result = cursor.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'bookings'"
+        ).fetchone()
+        booking_id = result[0] if result else 0
+
+        for theater_id, session in sessions:
+            if theater_id is None:
+                continue
+            for row in range(1, session["rows"] + 1):
+                col = 1
+                while col <= session["cols"]:
+                    size = min(rng.randint(1, 4), session["cols"] - col + 1)
+                    if rng.random() < occupancy:
+                        booking_id += 1
+                        total = size * session["price"]
+                        bookings.append(
+                            (
+                                booking_id,
+                                theater_id,
+                                f"Гость {rng.randint(1, 10 ** 6)}",
+                                "",
+                                total,
+                                Booking.STATUS_PENDING,
+                            )
+                        )
+                        claims.setdefault(theater_id, []).append(
+                            (booking_id, [(row, seat) for seat in range(col, col + size)])
+                        )
+                        if rng.random() < confirmed_share:
+                            confirmed.append(booking_id)
+                            payments.append(
+                                (
+                                    booking_id,
+                                    total,
+                                    Payment.STATUS_COMPLETED,
+                                    str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                                )
+                            )
+                    col += size
+
+        cursor.executemany(
+            """
+            INSERT INTO bookings (id, theater_id, guest_name, guest_email,
+                                  total_price, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            bookings,
+        )
+        for theater_id, theater_claims in claims.items():
+            Seat.claim_many(cursor, theater_id, theater_claims)
+
+        if confirmed:
+            cursor.executemany(
+                """
+                UPDATE bookings SET status = ?, confirmed_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+                """,
+                [(Booking.STATUS_CONFIRMED, confirmed_id) for confirmed_id in confirmed],
+            )
+            Seat.sell_bookings(cursor, confirmed)
+            cursor.executemany(
+                """
+                INSERT INTO payments (booking_id, amount, status, transaction_id)
+                VALUES (?, ?, ?, ?)
+                """,
+                payments,
+            )
+
+    return {"bookings": len(bookings), "payments": len(payments)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Запуск из командной строки: пакетное заполнение БД."""
+    parser = argparse.ArgumentParser(description="Заполнение БД синтетическими данными.")
+    parser.add_argument("--movies", type=int, default=100)
+    parser.add_argument("--sessions-per-movie", type=int, default=10)
+    parser.add_argument("--occupancy", type=float, default=0.0)
+    parser.add_argument("--confirmed-share", type=float, default=0.7)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+    parser.add_argument(
+        "--seat-storage",
+        choices=(Seat.STORAGE_ROWS, Seat.STORAGE_BITMAP),
+        default=Seat.STORAGE_ROWS,
+    )
+    args = parser.parse_args(argv)
+
+    init_db()
+    stats = seed_bulk(
+        movies=args.movies,
+        sessions_per_movie=args.sessions_per_movie,
+        occupancy=args.occupancy,
+        confirmed_share=args.confirmed_share,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        seat_storage=args.seat_storage,
+    )
+    print(
+        f"Фильмов: {stats['movies']}, сеансов: {stats['theaters']}, "
+        f"мест: {stats['seats']}, броней: {stats['bookings']}, "
+        f"платежей: {stats['payments']} за {stats['seconds']:.1f} с"
+    )
+
+
+if __name__ == "__main__":
+    main()
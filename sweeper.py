@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+
+from booking import EXPIRE_BATCH_SIZE, HOLD_TTL, Booking
+
+SWEEP_INTERVAL = 60.0
+
+
+class HoldSweeper:
+    """
+    Периодическое истечение просроченных pending броней.
+
+    Можно вызвать один раз через run_once() или запустить в фоновом
+    потоке через start()/stop(). Счётчики metrics накапливаются за всё
+    время жизни объекта.
+    """
+
+    def __init__(
+        self,
+        interval: float = SWEEP_INTERVAL,
+        ttl: timedelta = HOLD_TTL,
+        batch_size: int = EXPIRE_BATCH_SIZE,
+    ) -> None:
+        self.interval = interval
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self._metrics: Dict[str, Any] = {
+            "runs": 0,
+            "errors": 0,
+            "bookings_expired": 0,
+            "seats_released": 0,
+            "last_run_seconds": 0.0,
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Снимок счётчиков работы."""
+        with self._lock:
+            return dict(self._metrics)
+
+    def run_once(self) -> Dict[str, int]:
+        """Выполнить один проход и вернуть его результат."""
+        started = time.perf_counter()
+        result = Booking.expire_stale_holds(self.ttl, self.batch_size)
+        with self._lock:
+            self._metrics["runs"] += 1
+            self._metrics["bookings_expired"] += result["bookings"]
+            self._metrics["seats_released"] += result["seats"]
+            self._metrics["last_run_seconds"] = time.perf_counter() - started
+        return result
+
+    def start(self) -> None:
+        """Запустить проходы каждые interval секунд в фоновом потоке."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="hold-sweeper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Остановить фоновый поток и дождаться его завершения."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        """Цикл фонового потока: проход сразу после старта, затем по интервалу."""
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                with self._lock:
+                    self._metrics["errors"] += 1
+            if self._stop.wait(self.interval):
+                break
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Запуск из командной строки: один проход или цикл с --interval."""
+    parser = argparse.ArgumentParser(description="Истечение просроченных броней.")
+    parser.add_argument("--ttl-minutes", type=float, default=HOLD_TTL.total_seconds() / 60)
+    parser.add_argument("--batch-size", type=int, default=EXPIRE_BATCH_SIZE)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="повторять каждые N секунд вместо одного прохода",
+    )
+    args = parser.parse_args(argv)
+
+    sweeper = HoldSweeper(
+        interval=args.interval or SWEEP_INTERVAL,
+        ttl=timedelta(minutes=args.ttl_minutes),
+        batch_size=args.batch_size,
+    )
+    if args.interval is None:
+        result = sweeper.run_once()
+        print(
+            f"Истекло броней: {result['bookings']}, "
+            f"освобождено мест: {result['seats']}"
+        )
+        return
+
+    sweeper.start()
+    try:
+        while True:
+            time.sleep(args.interval)
+            metrics = sweeper.metrics
+            print(
+                f"Проходов: {metrics['runs']}, истекло броней: "
+                f"{metrics['bookings_expired']}, освобождено мест: "
+                f"{metrics['seats_released']}"
+            )
+    except KeyboardInterrupt:
+        sweeper.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,29 @@
 """Общие фиксчуры и утилиты для тестов."""
 
 import os
-from db_init import clear_db, init_db
+import re
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+from unittest import mock
+
+import db_init
+from db_init import (
+    MEMORY_DB,
+    clear_db,
+    configure_database,
+    configure_profile,
+    get_db,
+    init_db,
+    reset_pool,
+)
+
+HOT_TABLES = ("seats", "bookings", "payments")
+# Цель БД для тестов; по умолчанию in-memory, для отладки на файле
+# можно задать путь (или ":temp:" — свой файл на каждый воркер).
+TEST_DB_ENV_VAR = "CINEMA_TEST_DB"
+
+configure_database(os.environ.get(TEST_DB_ENV_VAR, MEMORY_DB))
+configure_profile("test")
 
 
 def setup_test_db():
@@ -12,5 +34,59 @@ def setup_test_db():
 
 def teardown_test_db():
     """Очистить БД после тестов."""
-    if os.path.exists("cinema.db"):
-        os.remove("cinema.db")
+    clear_db()
+    reset_pool()
+
+
+@contextmanager
+def capture_queries() -> Iterator[List[str]]:
+    """
+    Собрать все SQL запросы, выполненные внутри блока.
+
+    Запросы приходят из trace callback соединений пула уже с
+    подставленными параметрами.
+    """
+    statements: List[str] = []
+    original = db_init.get_connection
+
+    def traced_connection():
+        conn = original()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    reset_pool()
+    try:
+        with mock.patch.object(db_init, "get_connection", traced_connection):
+            yield statements
+    finally:
+        reset_pool()
+
+
+def find_table_scans(
+    statements: List[str],
+    tables: Tuple[str, ...] = HOT_TABLES,
+) -> List[Tuple[str, str]]:
+    """
+    Вернуть пары (запрос, шаг плана) для полных сканов таблиц.
+
+    Проверяются только SELECT/UPDATE/DELETE с WHERE: выборки всей
+    таблицы (get_all) сканируют её по определению.
+    """
+    scan = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+    seen = set()
+    scans: List[Tuple[str, str]] = []
+    for sql in statements:
+        normalized = " ".join(sql.split())
+        verb = normalized.split(" ", 1)[0].upper()
+        if verb not in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            continue
+        if " WHERE " not in normalized.upper() or normalized in seen:
+            continue
+        seen.add(normalized)
+        with get_db() as cursor:
+            plan = cursor.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+        for step in plan:
+            match = scan.match(step[3])
+            if match and match.group(1) in tables:
+                scans.append((normalized, step[3]))
+    return scans
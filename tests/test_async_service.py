@@ -0,0 +1,115 @@
+"""Тесты для асинхронного фасада бронирования."""
+
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from async_service import AsyncBookingService, DatabaseExecutor
+from booking import Booking
+from db_init import clear_db, init_db
+from exceptions import BookingError, ServiceBusyError
+from logica import Movie, Seat
+from theater import Theater
+
+
+class TestAsyncBookingService(unittest.IsolatedAsyncioTestCase):
+    """Тесты корутин бронирования, чтений и обратного давления."""
+
+    def setUp(self):
+        """Инициализировать БД с фильмом и сеансом."""
+        clear_db()
+        init_db()
+        movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+        self.theater_id = Theater.add(movie_id, 2, 4, 300.0, "2025-01-01T18:00:00")
+
+    async def test_booking_flow(self):
+        """Тест создания, оплаты и подтверждения брони через корутины."""
+        async with AsyncBookingService() as service:
+            booking_id = await service.create(self.theater_id, "Иван", [(1, 1), (1, 2)])
+            payment_id = await service.process_payment(booking_id, 600.0)
+            await service.confirm(booking_id)
+            statuses = await service.seat_map(self.theater_id)
+            available = await service.check_available(self.theater_id, [(1, 1)])
+
+        self.assertIsNotNone(payment_id)
+        self.assertEqual(Booking().get(booking_id)[4], Booking.STATUS_CONFIRMED)
+        self.assertEqual(statuses[(1, 1)], Seat.STATUS_SOLD)
+        self.assertFalse(available)
+        self.assertEqual(service.stats["writes"], 3)
+
+    async def test_concurrent_creates_for_same_seat(self):
+        """Тест что из конкурирующих корутин место получает только одна."""
+        async with AsyncBookingService() as service:
+            results = await asyncio.gather(
+                *(service.create(self.theater_id, f"Гость {i}", [(2, 2)]) for i in range(10)),
+                return_exceptions=True,
+            )
+
+        booked = [result for result in results if isinstance(result, int)]
+        errors = [result for result in results if isinstance(result, BookingError)]
+        self.assertEqual((len(booked), len(errors)), (1, 9))
+
+    async def test_backpressure_rejects_when_queue_is_full(self):
+        """Тест отказа, когда очередь записи занята дольше submit_timeout."""
+        release = threading.Event()
+        booking_id = Booking.create(self.theater_id, "Иван", [(1, 1)])
+        service = AsyncBookingService(queue_size=1, submit_timeout=0.05)
+        with mock.patch("async_service.Booking.confirm", side_effect=lambda _: release.wait(5)):
+            blocked = asyncio.create_task(service.confirm(booking_id))
+            await asyncio.sleep(0.01)
+            with self.assertRaises(ServiceBusyError):
+                await service.cancel(booking_id)
+            release.set()
+            await blocked
+        await service.close()
+        self.assertEqual(service.stats["rejected"], 1)
+
+
+class TestDatabaseExecutor(unittest.TestCase):
+    """Тесты очереди потока-писателя."""
+
+    def test_full_queue_raises(self):
+        """Тест что переполненная очередь не блокирует, а бросает ServiceBusyError."""
+        executor = DatabaseExecutor(queue_size=1, readers=1)
+        release = threading.Event()
+        running = executor.submit_write(release.wait, 5)
+        while not running.running():
+            pass
+        queued = executor.submit_write(lambda: "готово")
+        with self.assertRaises(ServiceBusyError):
+            executor.submit_write(lambda: None)
+
+        release.set()
+        executor.close()
+        self.assertEqual(queued.result(), "готово")
+
+    def test_submit_racing_close_never_hangs(self):
+        """Тест что каждая запись, поставленная во время close(), получает результат."""
+        executor = DatabaseExecutor(queue_size=1000, readers=1)
+        futures, rejected = [], []
+        start = threading.Event()
+
+        def submit():
+            start.wait()
+            for _ in range(50):
+                try:
+                    futures.append(executor.submit_write(lambda: "готово"))
+                except RuntimeError:
+                    rejected.append(1)
+
+        threads = [threading.Thread(target=submit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        executor.close()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(futures) + len(rejected), 200)
+        for future in futures:
+            self.assertEqual(future.result(timeout=1), "готово")
+
+
+if __name__ == "__main__":
+    unittest.main()
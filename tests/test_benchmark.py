@@ -0,0 +1,103 @@
+"""Тесты для нагрузочного теста бронирования."""
+
+import os
+import tempfile
+import unittest
+
+from benchmark import (
+    check_integrity,
+    compare,
+    percentile,
+    run_benchmark,
+    run_profile_benchmark,
+)
+from booking import Booking
+from db_init import MEMORY_DB, clear_db, get_database, get_db, get_profile, init_db
+from logica import Movie
+from theater import Theater
+
+
+class TestBenchmark(unittest.TestCase):
+    """Тесты прогона нагрузки и проверки целостности."""
+
+    def setUp(self):
+        """Инициализировать основную БД."""
+        clear_db()
+        init_db()
+
+    def test_run_benchmark_reports(self):
+        """Тест что прогон считает сценарии и не портит основную БД."""
+        target = get_database()
+        with tempfile.TemporaryDirectory() as directory:
+            result = run_benchmark(
+                threads=3,
+                operations=10,
+                movies=2,
+                sessions_per_movie=2,
+                rows=3,
+                cols=6,
+                db_name=os.path.join(directory, "bench.db"),
+            )
+
+        self.assertEqual(get_database(), target)
+        self.assertEqual(result["attempts"], 30)
+        self.assertEqual(result["completed"] + result["conflicts"] + result["errors"], 30)
+        self.assertEqual(result["latency_ms"]["flow"]["count"], result["completed"])
+        self.assertEqual(set(result["violations"].values()), {0})
+        self.assertEqual(Movie().get_all(), [])
+
+    def test_in_memory_benchmark(self):
+        """Тест прогона на in-memory БД и запрета её для нескольких процессов."""
+        result = run_benchmark(threads=2, operations=5, movies=1, rows=2, cols=4, db_name=MEMORY_DB)
+        self.assertEqual(result["attempts"], 10)
+        with self.assertRaises(ValueError):
+            run_benchmark(processes=2, db_name=MEMORY_DB)
+
+    def test_profile_benchmark(self):
+        """Тест сравнения профилей PRAGMA на смешанной нагрузке."""
+        target, profile = get_database(), get_profile()
+        results = run_profile_benchmark(
+            ("default", "throughput"), readers=2, writers=1, duration=0.2, rows=2, cols=4
+        )
+        self.assertEqual(set(results), {"default", "throughput"})
+        self.assertGreater(results["throughput"]["reads_per_sec"], 0)
+        self.assertEqual((get_database(), get_profile()), (target, profile))
+
+    def test_check_integrity_detects_double_booking(self):
+        """Тест что перехваченное другой бронью место считается нарушением."""
+        movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+        theater_id = Theater.add(movie_id, 2, 4, 300.0, "2025-01-01T18:00:00")
+        first = Booking.create(theater_id, "Иван", [(1, 1), (1, 2)])
+        second = Booking.create(theater_id, "Пётр", [(1, 3)])
+        self.assertEqual(check_integrity()["seat_count"], 0)
+
+        with get_db() as cursor:
+            cursor.execute(
+                "UPDATE seats SET booking_id = ? WHERE booking_id = ? AND col = 2",
+                (second, first),
+            )
+        self.assertEqual(check_integrity()["seat_count"], 2)
+
+    def test_percentile_and_compare(self):
+        """Тест перцентилей и сравнения результатов."""
+        samples = [float(value) for value in range(1, 101)]
+        self.assertEqual(percentile(samples, 50), 50.0)
+        self.assertEqual(percentile(samples, 99), 99.0)
+
+        baseline = {
+            "throughput": 100.0,
+            "conflict_rate": 0.1,
+            "latency_ms": {"flow": {"p50": 2.0, "p95": 4.0, "p99": 8.0}},
+        }
+        current = {
+            "throughput": 80.0,
+            "conflict_rate": 0.1,
+            "latency_ms": {"flow": {"p50": 2.0, "p95": 5.0, "p99": 8.0}},
+        }
+        comparison = compare(baseline, current)
+        self.assertAlmostEqual(comparison["throughput"], -0.2)
+        self.assertAlmostEqual(comparison["latency"]["flow"]["p95"], 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,13 @@
 """Тесты для класса Booking."""
 
+import threading
 import unittest
 from db_init import clear_db, init_db
 from logica import Movie, Seat
 from theater import Theater
 from booking import Booking
 from exceptions import BookingError
+from tests.conftest import capture_queries
 
 
 class TestBooking(unittest.TestCase):
@@ -63,6 +65,59 @@ class TestBooking(unittest.TestCase):
         self.assertEqual(seat[4], Seat.STATUS_RESERVED)
         self.assertEqual(seat[5], booking_id)
 
+    def test_create_booking_list_positions(self):
+        """Тест мест в виде списков, как после разбора JSON."""
+        booking_id = Booking.create(
+            theater_id=self.theater_id,
+            guest_name="Иван",
+            seat_positions=[[4, 6], [4, 7], [4, 6]],
+        )
+        self.assertTrue(Seat.check_available(self.theater_id, [[4, 5]]))
+        self.assertFalse(Seat.check_available(self.theater_id, [[4, 6]]))
+        self.assertEqual(Booking().get(booking_id)[5], 500.0)
+
+    def test_create_booking_conflict_rolls_back(self):
+        """Тест что при конфликте бронь не создаётся и места не меняются."""
+        Booking.create(
+            theater_id=self.theater_id,
+            guest_name="Гость 1",
+            seat_positions=[(1, 2)],
+        )
+        with self.assertRaises(BookingError):
+            Booking.create(
+                theater_id=self.theater_id,
+                guest_name="Гость 2",
+                seat_positions=[(1, 1), (1, 2)],
+            )
+        self.assertEqual(Booking.get_by_guest("Гость 2"), [])
+        seat = Seat.get_by_position(self.theater_id, 1, 1)
+        self.assertEqual(seat[4], Seat.STATUS_FREE)
+        self.assertIsNone(seat[5])
+
+    def test_create_booking_concurrent_single_winner(self):
+        """Тест что из параллельных покупателей одного места выигрывает один."""
+        results = []
+
+        def buy(index):
+            try:
+                Booking.create(
+                    theater_id=self.theater_id,
+                    guest_name=f"Гость {index}",
+                    seat_positions=[(4, 4), (4, 5)],
+                )
+                results.append(True)
+            except BookingError:
+                results.append(False)
+
+        threads = [threading.Thread(target=buy, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(len(Booking().get_all()), 1)
+
     def test_confirm_booking_success(self):
         """Тест успешного подтверждения бронирования."""
         booking_id = Booking.create(
@@ -153,6 +208,29 @@ class TestBooking(unittest.TestCase):
         self.assertEqual(booking_dict["guest_name"], "Иван")
         self.assertEqual(booking_dict["seats_count"], 2)
 
+    def test_to_dicts_batch(self):
+        """Тест пакетного преобразования броней одним запросом мест."""
+        first_id = Booking.create(self.theater_id, "Иван", [(1, 2), (1, 1)])
+        second_id = Booking.create(self.theater_id, "Пётр", [(3, 3)])
+        Booking.cancel(second_id)
+        bookings = [Booking().get(first_id), Booking().get(second_id)]
+        with capture_queries() as statements:
+            dicts = Booking.to_dicts(bookings)
+        seat_queries = [sql for sql in statements if "FROM seats" in sql]
+        self.assertEqual(len(seat_queries), 1)
+        self.assertEqual(dicts[0]["seats"], [(1, 1), (1, 2)])
+        self.assertEqual(dicts[0]["seats_count"], 2)
+        self.assertEqual(dicts[1]["seats_count"], 0)
+
+    def test_list_with_seats_by_guest(self):
+        """Тест списка броней гостя вместе с местами."""
+        Booking.create(self.theater_id, "Александр", [(1, 1)])
+        Booking.create(self.theater_id, "Александр", [(2, 2), (2, 3)])
+        Booking.create(self.theater_id, "Иван", [(4, 4)])
+        bookings = Booking.list_with_seats("Александр")
+        self.assertEqual([b["seats_count"] for b in bookings], [1, 2])
+        self.assertEqual(len(Booking.list_with_seats()), 3)
+
 
 if __name__ == "__main__":
     unittest.main()
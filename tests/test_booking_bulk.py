@@ -0,0 +1,81 @@
+"""Тесты для пакетных переходов статусов бронирований."""
+
+import unittest
+
+from booking import Booking
+from db_init import clear_db, init_db
+from logica import Movie, Seat
+from tests.conftest import capture_queries
+from theater import Theater
+
+
+class TestBookingBulk(unittest.TestCase):
+    """Тесты confirm_many(), cancel_many() и expire_many()."""
+
+    def setUp(self):
+        """Инициализировать БД и создать сеанс с бронями."""
+        clear_db()
+        init_db()
+        movie_id = Movie.add("Тестовый фильм", 120, 8.0, "Описание")
+        self.theater_id = Theater.add(movie_id, 5, 8, 250.0, "2025-01-01T18:00:00")
+        self.booking_ids = [
+            Booking.create(self.theater_id, f"Гость {col}", [(1, col), (2, col)])
+            for col in range(1, 6)
+        ]
+
+    def _statuses(self):
+        """Статусы тестовых броней по порядку."""
+        return [Booking().get(booking_id)[4] for booking_id in self.booking_ids]
+
+    def test_confirm_many_report(self):
+        """Тест отчёта: подтверждённые, не найденные и уже подтверждённые брони."""
+        first, second = self.booking_ids[:2]
+        Booking.confirm(second)
+        report = Booking.confirm_many([first, second, 9999, first])
+
+        self.assertEqual(list(report), [first, second, 9999])
+        self.assertIsNone(report[first])
+        self.assertEqual(report[second], "Бронирование уже в статусе 'confirmed'.")
+        self.assertEqual(report[9999], "Бронирование не найдено.")
+        self.assertIsNotNone(Booking().get(first)[7])
+        statuses = Seat.get_statuses(self.theater_id)
+        self.assertEqual({statuses[(1, 1)], statuses[(2, 1)]}, {Seat.STATUS_SOLD})
+
+    def test_cancel_many_frees_seats(self):
+        """Тест отмены: места освобождаются, повторная отмена попадает в отчёт."""
+        Booking.cancel(self.booking_ids[0])
+        report = Booking.cancel_many(self.booking_ids)
+
+        self.assertEqual(report[self.booking_ids[0]], "Бронирование уже отменено.")
+        self.assertEqual(sum(error is None for error in report.values()), 4)
+        self.assertEqual(set(self._statuses()), {Booking.STATUS_CANCELLED})
+        self.assertEqual(set(Seat.get_statuses(self.theater_id).values()), {Seat.STATUS_FREE})
+        self.assertEqual(Theater.check_occupancy([self.theater_id]), [])
+
+    def test_expire_many(self):
+        """Тест пакетного истечения броней и согласованности счётчиков."""
+        report = Booking.expire_many(self.booking_ids[:3])
+        self.assertEqual(set(report.values()), {None})
+        self.assertEqual(
+            self._statuses(),
+            [Booking.STATUS_EXPIRED] * 3 + [Booking.STATUS_PENDING] * 2,
+        )
+        self.assertEqual(Theater.check_occupancy([self.theater_id]), [])
+
+    def test_statement_count_independent_of_batch(self):
+        """Тест что число запросов не растёт с числом броней."""
+        with capture_queries() as statements:
+            Booking.confirm_many(self.booking_ids)
+        # Триггеры повторяют текст внешнего запроса в trace callback.
+        statements = list(dict.fromkeys(statements))
+        updates = [sql for sql in statements if sql.lstrip().startswith("UPDATE bookings")]
+        self.assertEqual(len(updates), 1)
+        self.assertLess(len(statements), 12)
+
+    def test_empty_batch(self):
+        """Тест пустого списка броней."""
+        self.assertEqual(Booking.cancel_many([]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
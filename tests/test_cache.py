@@ -0,0 +1,97 @@
+"""Тесты для кэша чтения BaseRepository.get."""
+
+import unittest
+from unittest import mock
+
+from base_repository import BaseRepository, RepositoryCache
+from booking import Booking
+from db_init import clear_db, get_db, init_db
+from logica import Movie
+from theater import Theater
+from tests.conftest import capture_queries
+
+
+class TestRepositoryCache(unittest.TestCase):
+    """Тесты кэширования и инвалидации фильмов и сеансов."""
+
+    def setUp(self):
+        """Инициализировать БД с фильмом и сеансом."""
+        clear_db()
+        init_db()
+        self.movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+        self.theater_id = Theater.add(self.movie_id, 2, 4, 300.0, "2025-01-01T18:00:00")
+
+    def test_repeated_get_hits_cache(self):
+        """Тест что повторное чтение не обращается к БД."""
+        Movie().get(self.movie_id)
+        before = BaseRepository.cache_stats()["movies"]
+        with capture_queries() as statements:
+            movie = Movie().get(self.movie_id)
+        self.assertEqual(movie[1], "Фильм")
+        self.assertFalse([s for s in statements if "FROM movies" in s])
+        after = BaseRepository.cache_stats()["movies"]
+        self.assertEqual(after["hits"], before["hits"] + 1)
+        self.assertEqual(after["misses"], before["misses"])
+
+    def test_update_and_delete_invalidate(self):
+        """Тест что update() и delete() сбрасывают закэшированную строку."""
+        Movie().get(self.movie_id)
+        Movie.update(self.movie_id, title="Новое название")
+        self.assertEqual(Movie().get(self.movie_id)[1], "Новое название")
+
+        Theater().get_cached(self.theater_id)
+        Theater.update(self.theater_id, price=450.0)
+        self.assertEqual(Theater().get_cached(self.theater_id)[0], 450.0)
+
+        Theater().delete(self.theater_id)
+        self.assertIsNone(Theater().get_cached(self.theater_id))
+
+    def test_bookings_hit_theater_cache(self):
+        """Тест что брони не сбрасывают кэш сеанса, а get() видит свежие счётчики."""
+        before = Theater().to_dict(Theater().get(self.theater_id))
+        stats = BaseRepository.cache_stats().get("theaters", {"hits": 0, "misses": 0})
+        booking_ids = [Booking.create(self.theater_id, "Иван", [(1, col)]) for col in (1, 2, 3)]
+        after = BaseRepository.cache_stats()["theaters"]
+        self.assertEqual(after["misses"] - stats["misses"], 1)
+        self.assertEqual(after["hits"] - stats["hits"], 2)
+
+        current = Theater().to_dict(Theater().get(self.theater_id))
+        self.assertEqual(current["free_count"], before["free_count"] - 3)
+        self.assertEqual(current["reserved_count"], 3)
+        Booking.cancel(booking_ids[0])
+        current = Theater().to_dict(Theater().get(self.theater_id))
+        self.assertEqual(current["free_count"], before["free_count"] - 2)
+
+    def test_rollback_keeps_cached_row(self):
+        """Тест что откат транзакции не сбрасывает кэш."""
+        Movie().get(self.movie_id)
+        with self.assertRaises(RuntimeError):
+            with get_db():
+                BaseRepository.invalidate_cache("movies", [self.movie_id])
+                raise RuntimeError
+        self.assertEqual(BaseRepository.cache_stats()["movies"]["size"], 1)
+
+    def test_stale_read_not_stored(self):
+        """Тест что строка, прочитанная до инвалидации, не попадает в кэш."""
+        cache = RepositoryCache(size=4)
+        generation = cache.generation
+        cache.invalidate([1])
+        cache.put(1, (1, "старое"), generation)
+        self.assertIsNone(cache.get(1))
+
+    def test_lru_bound_and_ttl(self):
+        """Тест вытеснения по размеру и устаревания по TTL."""
+        cache = RepositoryCache(size=2, ttl=10.0)
+        for entity_id in (1, 2):
+            cache.put(entity_id, (entity_id,), cache.generation)
+        cache.get(1)
+        cache.put(3, (3,), cache.generation)
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+        with mock.patch("base_repository.time.monotonic", return_value=1e12):
+            self.assertIsNone(cache.get(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
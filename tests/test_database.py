@@ -0,0 +1,109 @@
+"""Тесты для выбора цели БД и очистки clear_db."""
+
+import os
+import tempfile
+import threading
+import unittest
+
+from db_init import (
+    MEMORY_DB,
+    TEMP_DB,
+    clear_db,
+    configure_database,
+    configure_profile,
+    get_database,
+    get_db,
+    get_profile,
+    init_db,
+)
+from logica import Movie
+
+
+class TestDatabaseTarget(unittest.TestCase):
+    """Тесты configure_database() и быстрой очистки."""
+
+    def setUp(self):
+        """Запомнить текущую цель БД и профиль."""
+        self.previous = get_database()
+        self.profile = get_profile()
+
+    def tearDown(self):
+        """Вернуть тестовую БД и профиль."""
+        configure_profile(self.profile)
+        configure_database(self.previous)
+
+    def test_memory_database_shared_between_connections(self):
+        """Тест что in-memory БД видна из всех соединений пула и потоков."""
+        configure_database(MEMORY_DB)
+        init_db()
+        movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+
+        titles = []
+        thread = threading.Thread(target=lambda: titles.append(Movie().get(movie_id)[1]))
+        thread.start()
+        thread.join()
+        self.assertEqual(titles, ["Фильм"])
+        self.assertFalse(os.path.exists(MEMORY_DB))
+
+    def test_memory_databases_are_isolated(self):
+        """Тест что каждая MEMORY_DB — отдельная БД, а к прежней можно вернуться."""
+        configure_database(MEMORY_DB)
+        init_db()
+        Movie.add("Фильм", 120, 8.0, "Описание")
+        first = configure_database(MEMORY_DB)
+        init_db()
+        self.assertEqual(Movie().get_all(), [])
+
+        configure_database(first)
+        self.assertEqual(len(Movie().get_all()), 1)
+
+    def test_file_and_temp_targets(self):
+        """Тест цели в виде пути, URI и временного файла."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cinema.db")
+            configure_database(path)
+            init_db()
+            Movie.add("Фильм", 120, 8.0, "Описание")
+            self.assertTrue(os.path.exists(path))
+
+            configure_database(f"file:{path}?mode=ro")
+            self.assertEqual(len(Movie().get_all()), 1)
+            configure_database(self.previous)
+
+        configure_database(TEMP_DB)
+        self.assertTrue(os.path.exists(get_database()))
+
+    def test_clear_db_truncates_and_resets_ids(self):
+        """Тест что clear_db() очищает таблицы и сбрасывает AUTOINCREMENT."""
+        clear_db()
+        first = Movie.add("Фильм", 120, 8.0, "Описание")
+        Movie.add("Другой", 90, 7.0, "Описание")
+        clear_db()
+
+        self.assertEqual(Movie().get_all(), [])
+        self.assertEqual(Movie.add("Фильм", 120, 8.0, "Описание"), first)
+        with get_db() as cursor:
+            changes = cursor.execute(
+                "SELECT value FROM sequences WHERE name = 'changes'"
+            ).fetchone()[0]
+        self.assertEqual(changes, 1)
+
+    def test_pragma_profiles(self):
+        """Тест что профиль применяется к новым соединениям пула."""
+        with tempfile.TemporaryDirectory() as directory:
+            configure_database(os.path.join(directory, "cinema.db"))
+            configure_profile("throughput")
+            with get_db() as cursor:
+                journal = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+                synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+                temp_store = cursor.execute("PRAGMA temp_store").fetchone()[0]
+            configure_database(self.previous)
+
+        self.assertEqual((journal, synchronous, temp_store), ("wal", 1, 2))
+        with self.assertRaises(ValueError):
+            configure_profile("fastest")
+        self.assertEqual(get_profile(), "throughput")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Тесты для класса Exporter."""
+
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from db_init import clear_db, init_db
+from logica import Movie
+from theater import Theater
+from booking import Booking
+from payments import Payment
+from exportio import Exporter
+
+
+class TestExporter(unittest.TestCase):
+    """Тесты выгрузки данных."""
+
+    def setUp(self):
+        """Инициализировать БД с бронями и платежом."""
+        clear_db()
+        init_db()
+        movie_id = Movie.add("Тестовый фильм", 120, 8.0, "Описание")
+        theater_id = Theater.add(movie_id, 5, 8, 250.0, "2025-01-01T18:00:00")
+        booking_id = Booking.create(theater_id, "Иван", [(1, 1), (1, 2)])
+        Payment.process(booking_id, Booking().get(booking_id)[5])
+        for col in range(3, 8):
+            Booking.create(theater_id, f"Гость {col}", [(2, col)])
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Удалить временные файлы выгрузки."""
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        """Путь к файлу во временной папке."""
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_stream_matches_full_export(self):
+        """Тест что потоковый JSON совпадает с обычной выгрузкой."""
+        expected = Exporter.to_json(self.path("full.json"))
+        stats = Exporter.to_json_stream(self.path("stream.json"), chunk_size=2)
+        with open(self.path("stream.json"), encoding="utf-8") as file:
+            streamed = json.load(file)
+        with open(self.path("full.json"), encoding="utf-8") as file:
+            self.assertEqual(streamed, json.load(file))
+        self.assertEqual(stats["tables"]["bookings"], len(expected["bookings"]))
+        self.assertEqual(stats["rows"], 1 + 1 + 6 + 1)
+        self.assertGreaterEqual(stats["rows_per_sec"], 0)
+
+    def test_stream_ndjson_gzip(self):
+        """Тест NDJSON выгрузки со сжатием."""
+        stats = Exporter.to_json_stream(
+            self.path("data.ndjson.gz"), ndjson=True, compress=True, chunk_size=4
+        )
+        with gzip.open(self.path("data.ndjson.gz"), "rt", encoding="utf-8") as file:
+            lines = [json.loads(line) for line in file]
+        self.assertEqual(len(lines), stats["rows"])
+        bookings = [line["data"] for line in lines if line["table"] == "bookings"]
+        self.assertEqual(bookings[0]["seats_count"], 2)
+
+    def test_stream_empty_db(self):
+        """Тест потоковой выгрузки пустой БД."""
+        clear_db()
+        Exporter.to_json_stream(self.path("empty.json"))
+        with open(self.path("empty.json"), encoding="utf-8") as file:
+            data = json.load(file)
+        self.assertEqual(data, {"movies": [], "theaters": [], "bookings": [], "payments": []})
+
+    def read_ndjson(self, name):
+        """Прочитать NDJSON файл как {таблица: [id, ...]}."""
+        tables = {}
+        with open(self.path(name), encoding="utf-8") as file:
+            for line in file:
+                record = json.loads(line)
+                tables.setdefault(record["table"], []).append(record["data"]["id"])
+        return tables
+
+    def test_export_changes_incremental(self):
+        """Тест что повторная выгрузка содержит только изменения."""
+        first = Exporter.export_changes(self.path("first.ndjson"))
+        self.assertIsNone(first["since"])
+        self.assertEqual(first["rows"], 9)
+        self.assertEqual(Exporter.get_watermark(), first["watermark"])
+
+        empty = Exporter.export_changes(self.path("empty.ndjson"))
+        self.assertEqual(empty["rows"], 0)
+
+        bookings = Booking.get_by_guest("Гость 3") + Booking.get_by_guest("Гость 4")
+        Booking.confirm(bookings[0][0])
+        Booking.cancel(bookings[1][0])
+        Payment.process(bookings[0][0], bookings[0][5])
+        stats = Exporter.export_changes(self.path("changes.ndjson"))
+        self.assertEqual(stats["since"], first["watermark"])
+        self.assertEqual(
+            self.read_ndjson("changes.ndjson"),
+            {"bookings": [bookings[0][0], bookings[1][0]], "payments": [2]},
+        )
+
+    def test_export_changes_named_watermarks(self):
+        """Тест что разные имена выгрузок ведут свои водяные знаки."""
+        Exporter.export_changes(self.path("a.ndjson"), name="warehouse")
+        self.assertIsNone(Exporter.get_watermark("audit"))
+        stats = Exporter.export_changes(self.path("b.ndjson"), name="audit")
+        self.assertEqual(stats["rows"], 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Тесты для группового commit записей."""
+
+import threading
+import unittest
+
+from booking import Booking
+from db_init import clear_db, init_db
+from exceptions import BookingError, PaymentError
+from group_commit import WriteCoordinator
+from logica import Movie, Seat
+from payments import Payment
+from theater import Theater
+
+
+class TestWriteCoordinator(unittest.TestCase):
+    """Тесты пакетной записи броней и платежей."""
+
+    def setUp(self):
+        """Инициализировать БД и запустить координатор."""
+        clear_db()
+        init_db()
+        movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+        self.theater_id = Theater.add(movie_id, 4, 8, 300.0, "2025-01-01T18:00:00")
+        self.coordinator = WriteCoordinator(max_batch=8, max_wait=0.05)
+
+    def tearDown(self):
+        """Остановить координатор."""
+        self.coordinator.close()
+
+    def _create_concurrently(self, positions):
+        """Создать брони из отдельных потоков; вернуть ID или исключения."""
+        results = [None] * len(positions)
+
+        def create(index):
+            try:
+                results[index] = self.coordinator.create_booking(
+                    self.theater_id, f"Гость {index}", [positions[index]]
+                )
+            except BookingError as error:
+                results[index] = error
+
+        threads = [threading.Thread(target=create, args=(i,)) for i in range(len(positions))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_writes_share_commits(self):
+        """Тест что параллельные брони записываются меньшим числом пакетов."""
+        results = self._create_concurrently([(1, col) for col in range(1, 9)])
+
+        self.assertTrue(all(isinstance(result, int) for result in results))
+        self.assertEqual(len(set(results)), 8)
+        stats = self.coordinator.stats
+        self.assertEqual(stats["operations"], 8)
+        self.assertLess(stats["batches"], 8)
+        self.assertEqual(Theater.check_occupancy([self.theater_id]), [])
+
+    def test_failed_operation_does_not_affect_batch(self):
+        """Тест что конфликт одной брони откатывает только её."""
+        results = self._create_concurrently([(2, 1), (2, 1), (2, 2)])
+
+        errors = [result for result in results if isinstance(result, BookingError)]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(len(Booking().get_all()), 2)
+        statuses = Seat.get_statuses(self.theater_id)
+        self.assertEqual(statuses[(2, 1)], Seat.STATUS_RESERVED)
+        self.assertEqual(statuses[(2, 2)], Seat.STATUS_RESERVED)
+
+    def test_payments(self):
+        """Тест платежа через координатор и ошибки суммы."""
+        booking_id = self.coordinator.create_booking(self.theater_id, "Иван", [(3, 3)])
+        payment_id = self.coordinator.process_payment(booking_id, 300.0)
+        self.assertEqual(Payment().get(payment_id)[1], booking_id)
+        with self.assertRaises(PaymentError):
+            self.coordinator.process_payment(booking_id, 1.0)
+        with self.assertRaises(BookingError):
+            self.coordinator.create_booking(999, "Иван", [(1, 1)])
+
+    def test_closed_coordinator_rejects(self):
+        """Тест что закрытый координатор не принимает операции."""
+        self.coordinator.close()
+        with self.assertRaises(RuntimeError):
+            self.coordinator.create_booking(self.theater_id, "Иван", [(1, 1)])
+
+    def test_submit_racing_close_never_hangs(self):
+        """Тест что операции, поставленные во время close(), не зависают."""
+        outcomes = []
+
+        def submit():
+            for _ in range(20):
+                try:
+                    outcomes.append(self.coordinator.submit(lambda cursor: "готово"))
+                except RuntimeError:
+                    outcomes.append(None)
+
+        threads = [threading.Thread(target=submit, daemon=True) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        self.coordinator.close()
+        for thread in threads:
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(len(outcomes), 80)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Тесты для сбора статистики запросов."""
+
+import sqlite3
+import unittest
+
+import instrumentation
+from booking import Booking
+from db_init import clear_db, get_db, init_db
+from instrumentation import normalize_sql
+from logica import Movie
+from theater import Theater
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Тесты гистограмм запросов, счётчиков строк и медленного лога."""
+
+    def setUp(self):
+        """Инициализировать БД с фильмом и сеансом."""
+        clear_db()
+        init_db()
+        self.movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+        self.theater_id = Theater.add(self.movie_id, 2, 4, 300.0, "2025-01-01T18:00:00")
+
+    def tearDown(self):
+        """Выключить сбор статистики."""
+        instrumentation.disable()
+
+    def test_disabled_uses_plain_cursor(self):
+        """Тест что без enable() get_db() отдаёт обычный курсор."""
+        with get_db() as cursor:
+            self.assertIsInstance(cursor, sqlite3.Cursor)
+        self.assertEqual(instrumentation.stats()["queries"], {})
+
+    def test_normalize_sql(self):
+        """Тест что литералы и списки параметров сворачиваются в один ключ."""
+        self.assertEqual(
+            normalize_sql("SELECT *  FROM seats\n WHERE id IN (?, ?) AND x = 'a'"),
+            normalize_sql("SELECT * FROM seats WHERE id IN (?) AND x = 5"),
+        )
+
+    def test_records_queries_rows_and_acquire(self):
+        """Тест учёта времени, строк и получения соединений."""
+        instrumentation.enable()
+        Booking.create(self.theater_id, "Иван", [(1, 1), (1, 2)])
+        with get_db() as cursor:
+            rows = cursor.execute(
+                "SELECT * FROM seats WHERE theater_id = ?", (self.theater_id,)
+            ).fetchall()
+
+        stats = instrumentation.stats()
+        key = normalize_sql("SELECT * FROM seats WHERE theater_id = ?")
+        self.assertEqual(stats["queries"][key]["count"], 1)
+        self.assertEqual(stats["queries"][key]["rows"], len(rows))
+        self.assertEqual(sum(stats["queries"][key]["histogram"].values()), 1)
+        self.assertGreaterEqual(stats["acquire"]["count"], 2)
+
+        claimed = [
+            timing["rows"]
+            for sql, timing in stats["queries"].items()
+            if sql.startswith("UPDATE seats SET status = ?, booking_id = ?")
+            and "status = ? AND" in sql
+        ]
+        self.assertEqual(claimed, [2])
+
+    def test_slow_query_log_and_reset(self):
+        """Тест записи медленных запросов в лог и обнуления статистики."""
+        instrumentation.enable(slow_query_ms=0)
+        with self.assertLogs("cinema.queries", level="WARNING") as logs:
+            Movie().get_all()
+        self.assertIn("FROM movies", logs.output[-1])
+        self.assertGreater(instrumentation.stats()["slow_queries"], 0)
+
+        instrumentation.reset()
+        stats = instrumentation.stats()
+        self.assertEqual((stats["queries"], stats["slow_queries"]), ({}, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,8 @@ from logica import Movie
 from theater import Theater
 from booking import Booking
 from payments import Payment
-from exceptions import PaymentError
+from exceptions import BookingError, PaymentError
+from tests.conftest import capture_queries, find_table_scans
 
 
 class TestPayment(unittest.TestCase):
@@ -83,6 +84,70 @@ class TestPayment(unittest.TestCase):
         self.assertEqual(payment_dict["booking_id"], self.booking_id)
         self.assertEqual(payment_dict["status"], Payment.STATUS_COMPLETED)
 
+    def test_idempotent_retry_returns_same_payment(self):
+        """Тест что повтор с тем же ключом возвращает исходный платёж одним запросом."""
+        amount = Booking().get(self.booking_id)[5]
+        payment_id = Payment.process(self.booking_id, amount, idempotency_key="key-1")
+        with capture_queries() as statements:
+            retried = Payment.process(self.booking_id, amount, idempotency_key="key-1")
+
+        self.assertEqual(retried, payment_id)
+        self.assertEqual(find_table_scans(statements, ("payments",)), [])
+        self.assertFalse(any("bookings" in sql for sql in statements))
+        self.assertEqual(Payment().to_dict(Payment().get(payment_id))["idempotency_key"], "key-1")
+        self.assertEqual(len(Payment().get_all()), 1)
+
+    def test_duplicate_payment_raises_payment_error(self):
+        """Тест что повторная оплата без ключа даёт PaymentError, а не IntegrityError."""
+        amount = Booking().get(self.booking_id)[5]
+        Payment.process(self.booking_id, amount)
+        with self.assertRaises(PaymentError):
+            Payment.process(self.booking_id, amount, idempotency_key="other")
+
+    def test_pay_and_confirm(self):
+        """Тест оплаты с подтверждением в одной транзакции и её повтора."""
+        amount = Booking().get(self.booking_id)[5]
+        payment_id = Payment.pay_and_confirm(self.booking_id, amount, idempotency_key="k")
+
+        self.assertEqual(Booking().get(self.booking_id)[4], Booking.STATUS_CONFIRMED)
+        self.assertEqual(Payment.pay_and_confirm(self.booking_id, amount, "k"), payment_id)
+        with self.assertRaises(PaymentError):
+            Payment.pay_and_confirm(self.booking_id, amount)
+
+    def test_pay_and_confirm_looks_up_key_once(self):
+        """Тест что новый платёж проверяет ключ идемпотентности одним запросом."""
+        amount = Booking().get(self.booking_id)[5]
+        with capture_queries() as statements:
+            Payment.pay_and_confirm(self.booking_id, amount, idempotency_key="k")
+        lookups = [sql for sql in statements if "FROM payments WHERE idempotency_key" in sql]
+        self.assertEqual(len(lookups), 1)
+
+    def test_pay_and_confirm_rolls_back_payment(self):
+        """Тест что ошибка подтверждения откатывает платёж."""
+        amount = Booking().get(self.booking_id)[5]
+        Booking.cancel(self.booking_id)
+        with self.assertRaises(BookingError):
+            Payment.pay_and_confirm(self.booking_id, amount, idempotency_key="k")
+        self.assertIsNone(Payment.get_by_booking(self.booking_id))
+
+    def test_idempotency_key_reused_for_other_booking(self):
+        """Тест что ключ другой брони или суммы даёт PaymentError, а не чужой платёж."""
+        amount = Booking().get(self.booking_id)[5]
+        Payment.process(self.booking_id, amount, idempotency_key="k")
+        other = Booking.create(self.theater_id, "Пётр", [(2, 1)])
+        with self.assertRaises(PaymentError):
+            Payment.process(other, 250.0, idempotency_key="k")
+        with self.assertRaises(PaymentError):
+            Payment.process(self.booking_id, amount + 1, idempotency_key="k")
+        self.assertIsNone(Payment.get_by_booking(other))
+
+    def test_pay_and_confirm_replay_confirms_pending_booking(self):
+        """Тест что повтор после process() с тем же ключом подтверждает бронь."""
+        amount = Booking().get(self.booking_id)[5]
+        payment_id = Payment.process(self.booking_id, amount, idempotency_key="k")
+        self.assertEqual(Payment.pay_and_confirm(self.booking_id, amount, "k"), payment_id)
+        self.assertEqual(Booking().get(self.booking_id)[4], Booking.STATUS_CONFIRMED)
+
 
 if __name__ == "__main__":
     unittest.main()
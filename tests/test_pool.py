@@ -0,0 +1,99 @@
+"""Тесты для пула соединений db_init."""
+
+import sqlite3
+import threading
+import time
+import unittest
+from db_init import (
+    ConnectionPool,
+    clear_db,
+    configure_pool,
+    get_db,
+    get_pool,
+    init_db,
+    reset_pool,
+)
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Тесты выдачи и возврата соединений."""
+
+    def setUp(self):
+        """Инициализировать БД со свежим пулом."""
+        clear_db()
+        init_db()
+
+    def tearDown(self):
+        """Вернуть пул с настройками по умолчанию."""
+        reset_pool()
+
+    def test_get_db_reuses_connection(self):
+        """Тест что последовательные get_db() используют одно соединение."""
+        with get_db() as cursor:
+            first = cursor.connection
+        with get_db() as cursor:
+            second = cursor.connection
+        self.assertIs(first, second)
+        self.assertEqual(get_pool().created, 1)
+
+    def test_pool_is_bounded(self):
+        """Тест что пул не открывает больше size соединений."""
+        pool = ConnectionPool(size=2, timeout=0.05)
+        first = pool.acquire()
+        second = pool.acquire()
+        with self.assertRaises(sqlite3.OperationalError):
+            pool.acquire()
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        pool.release(second)
+        pool.close()
+
+    def test_broken_connection_is_replaced(self):
+        """Тест что закрытое соединение не выдаётся повторно."""
+        pool = ConnectionPool(size=1)
+        conn = pool.acquire()
+        conn.close()
+        pool.release(conn)
+        fresh = pool.acquire()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(pool.created, 1)
+        pool.close()
+
+    def test_waiter_wakes_when_slot_is_freed(self):
+        """Тест что ожидающий поток получает слот, освобождённый закрытием соединения."""
+        pool = ConnectionPool(size=1, timeout=5.0)
+        conn = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        time.sleep(0.05)
+        conn.close()
+        pool.release(conn)
+        waiter.join(timeout=1.0)
+        self.assertFalse(waiter.is_alive())
+        self.assertIsNot(acquired[0], conn)
+        self.assertEqual(pool.created, 1)
+        pool.release(acquired[0])
+        pool.close()
+
+    def test_rollback_on_error_keeps_connection_usable(self):
+        """Тест что после ошибки соединение возвращается чистым."""
+        with self.assertRaises(sqlite3.IntegrityError):
+            with get_db() as cursor:
+                cursor.execute("INSERT INTO movies (title, duration) VALUES ('A', 90)")
+                cursor.execute("INSERT INTO movies (title, duration) VALUES ('A', 90)")
+        with get_db() as cursor:
+            count = cursor.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+        self.assertEqual(count, 0)
+
+    def test_configure_and_reset_pool(self):
+        """Тест пересоздания и сброса общего пула."""
+        pool = configure_pool(size=3, timeout=1.0)
+        self.assertIs(get_pool(), pool)
+        self.assertEqual(pool.size, 3)
+        reset_pool()
+        self.assertIsNot(get_pool(), pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
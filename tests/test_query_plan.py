@@ -0,0 +1,72 @@
+"""Тесты индексов схемы и планов запросов репозиториев."""
+
+import unittest
+from datetime import timedelta
+from db_init import INDEXES_VERSION, clear_db, get_db, init_db
+from logica import Movie, Seat
+from theater import Theater
+from booking import Booking
+from payments import Payment
+from tests.conftest import capture_queries, find_table_scans
+
+
+class TestQueryPlan(unittest.TestCase):
+    """Тесты что горячие запросы используют индексы."""
+
+    def setUp(self):
+        """Инициализировать БД."""
+        clear_db()
+        init_db()
+
+    def test_init_db_is_idempotent(self):
+        """Тест что повторный init_db не ломает схему и версию индексов."""
+        init_db()
+        with get_db() as cursor:
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            names = {
+                row[0]
+                for row in cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+            }
+        self.assertEqual(version, INDEXES_VERSION)
+        self.assertIn("idx_seats_position", names)
+        self.assertIn("idx_bookings_status_created", names)
+
+    def test_repository_queries_avoid_table_scans(self):
+        """Тест что запросы сценария бронирования не сканируют таблицы."""
+        with capture_queries() as statements:
+            movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+            theater_id = Theater.add(movie_id, 4, 5, 250.0, "2025-01-01T18:00:00")
+            Theater().get(theater_id)
+            Seat.get_available(theater_id)
+            Seat.get_by_position(theater_id, 1, 1)
+            Seat.check_available(theater_id, [(1, 1), (1, 2)])
+            booking_id = Booking.create(theater_id, "Иван", [(1, 1), (1, 2)])
+            Seat.get_by_booking(booking_id)
+            Booking.get_by_guest("Иван")
+            Payment.process(booking_id, Booking().get(booking_id)[5])
+            Payment.get_by_booking(booking_id)
+            Booking.confirm(booking_id)
+            other_id = Booking.create(theater_id, "Пётр", [(2, 2)])
+            Booking.cancel(other_id)
+            expired_id = Booking.create(theater_id, "Анна", [(3, 3)])
+            Booking.mark_expired(expired_id)
+
+            bitmap_id = Theater.add(
+                movie_id, 4, 5, 250.0, "2025-01-01T20:00:00",
+                seat_storage=Seat.STORAGE_BITMAP,
+            )
+            map_booking_id = Booking.create(bitmap_id, "Олег", [(1, 1)])
+            Seat.get_by_position(bitmap_id, 1, 1)
+            Seat.get_by_booking(map_booking_id)
+            Booking.confirm(map_booking_id)
+            Booking.cancel(map_booking_id)
+            Booking.expire_stale_holds(timedelta(0))
+
+        self.assertGreater(len(statements), 0)
+        self.assertEqual(find_table_scans(statements), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
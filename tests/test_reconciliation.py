@@ -0,0 +1,109 @@
+"""Тесты для сверки выписки процессинга с платежами."""
+
+import json
+import os
+import tempfile
+import unittest
+
+from booking import Booking
+from db_init import clear_db, get_db, init_db
+from logica import Movie
+from maintenance import main
+from payments import Payment
+from reconciliation import iter_discrepancies, reconcile
+from theater import Theater
+
+
+class TestReconciliation(unittest.TestCase):
+    """Тесты потоковой сверки merge-join."""
+
+    def setUp(self):
+        """Создать три платежа с известными transaction_id."""
+        clear_db()
+        init_db()
+        movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+        theater_id = Theater.add(movie_id, 2, 4, 300.0, "2025-01-01T18:00:00")
+        payments = []
+        for col, transaction_id in enumerate(("tx-b", "tx-c", "tx-e"), 1):
+            booking_id = Booking.create(theater_id, "Гость", [(1, col)])
+            payments.append((transaction_id, Payment.process(booking_id, 300.0)))
+        with get_db() as cursor:
+            cursor.executemany(
+                "UPDATE payments SET transaction_id = ? WHERE id = ?", payments
+            )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _path(self, name, content):
+        """Записать файл выписки во временный каталог."""
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def test_reconcile_csv(self):
+        """Тест отчёта по CSV: нет в БД, нет в выписке и расхождение суммы."""
+        ledger = self._path(
+            "ledger.csv",
+            "transaction_id,amount,currency\ntx-a,100,RUB\ntx-b,300.00,RUB\ntx-c,250,RUB\n",
+        )
+        output = os.path.join(self.directory.name, "report.ndjson")
+        stats = reconcile(ledger, output)
+
+        self.assertEqual(
+            stats,
+            {"ledger": 3, "payments": 3, "matched": 1,
+             "missing": 1, "extra": 1, "amount_mismatch": 1},
+        )
+        with open(output, encoding="utf-8") as file:
+            report = [json.loads(line) for line in file]
+        self.assertEqual(
+            [(item["kind"], item["transaction_id"]) for item in report],
+            [("missing", "tx-a"), ("amount_mismatch", "tx-c"), ("extra", "tx-e")],
+        )
+        self.assertEqual(report[1]["payment_amount"], 300.0)
+
+    def test_reconcile_ndjson_clean(self):
+        """Тест NDJSON выписки без расхождений."""
+        lines = [{"transaction_id": tx, "amount": 300.0} for tx in ("tx-b", "tx-c", "tx-e")]
+        ledger = self._path("ledger.ndjson", "\n".join(json.dumps(line) for line in lines))
+        self.assertEqual(reconcile(ledger)["matched"], 3)
+
+    def test_unsorted_ledger_rejected(self):
+        """Тест что неотсортированная выписка отвергается."""
+        ledger = self._path("ledger.csv", "transaction_id,amount\ntx-c,300\ntx-b,300\n")
+        with self.assertRaises(ValueError):
+            reconcile(ledger)
+
+    def test_merge_join_is_streaming(self):
+        """Тест что слияние работает с итераторами, не материализуя их."""
+        ledger = ((f"tx-{n:06d}", 1.0) for n in range(0, 100000, 2))
+        payments = ((f"tx-{n:06d}", n, 1.0) for n in range(0, 100000, 3))
+        kinds = {}
+        for item in iter_discrepancies(ledger, payments):
+            kinds[item["kind"]] = kinds.get(item["kind"], 0) + 1
+        self.assertEqual(kinds, {"missing": 33333, "extra": 16667})
+
+    def test_payments_read_in_index_order(self):
+        """Тест что платежи читаются по индексу без сортировки."""
+        with get_db() as cursor:
+            plan = cursor.execute(
+                """
+                EXPLAIN QUERY PLAN
+                SELECT transaction_id, id, amount FROM payments
+                WHERE transaction_id IS NOT NULL
+                ORDER BY transaction_id
+                """
+            ).fetchall()
+        details = " ".join(step[3] for step in plan)
+        self.assertIn("idx_payments_transaction", details)
+        self.assertNotIn("TEMP B-TREE", details)
+
+    def test_cli_exit_code(self):
+        """Тест команды maintenance reconcile."""
+        ledger = self._path("ledger.csv", "transaction_id,amount\ntx-b,300\n")
+        self.assertEqual(main(["reconcile", ledger]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Тесты для хранения мест в режиме bitmap."""
+
+import io
+import unittest
+from contextlib import redirect_stdout
+from db_init import clear_db, init_db
+from logica import Movie, Seat
+from seat_bitmap import SeatBitmap
+from theater import Theater
+from booking import Booking
+from exceptions import BookingError
+
+
+class TestSeatBitmapCodec(unittest.TestCase):
+    """Тесты упаковки состояний мест."""
+
+    def test_new_map_is_free(self):
+        """Тест что новая карта содержит только свободные места."""
+        seat_map = SeatBitmap(3, 5)
+        self.assertEqual(len(seat_map.to_bytes()), 4)  # 15 мест по 2 бита
+        self.assertEqual(len(seat_map.positions(Seat.STATUS_FREE)), 15)
+
+    def test_set_and_roundtrip(self):
+        """Тест установки статусов и восстановления из байтов."""
+        seat_map = SeatBitmap(3, 5)
+        seat_map.set(1, 1, Seat.STATUS_RESERVED)
+        seat_map.set(3, 5, Seat.STATUS_SOLD)
+        restored = SeatBitmap(3, 5, seat_map.to_bytes())
+        self.assertEqual(restored.get(1, 1), Seat.STATUS_RESERVED)
+        self.assertEqual(restored.get(3, 5), Seat.STATUS_SOLD)
+        self.assertEqual(restored.get(2, 3), Seat.STATUS_FREE)
+
+    def test_out_of_range_seat(self):
+        """Тест обращения к несуществующему месту."""
+        seat_map = SeatBitmap(2, 2)
+        self.assertFalse(seat_map.contains(3, 1))
+        with self.assertRaises(IndexError):
+            seat_map.get(3, 1)
+
+
+class TestSeatBitmapStorage(unittest.TestCase):
+    """Тесты операций с местами сеанса в режиме bitmap."""
+
+    def setUp(self):
+        """Инициализировать БД и создать сеанс с картой мест."""
+        clear_db()
+        init_db()
+        movie_id = Movie.add("Тестовый фильм", 120, 8.0, "Описание")
+        self.theater_id = Theater.add(
+            movie_id, 3, 3, 300.0, "2025-01-01T18:00:00",
+            seat_storage=Seat.STORAGE_BITMAP,
+        )
+
+    def test_no_seat_rows_created(self):
+        """Тест что для сеанса не создаются строки в seats."""
+        self.assertEqual(Seat().get_all(), [])
+        self.assertEqual(len(Seat.get_available(self.theater_id)), 9)
+
+    def test_reserve_sell_free(self):
+        """Тест переходов статусов мест."""
+        Seat.reserve(self.theater_id, [(1, 1), (1, 2)], booking_id=5)
+        seat = Seat.get_by_position(self.theater_id, 1, 1)
+        self.assertEqual(seat[4], Seat.STATUS_RESERVED)
+        self.assertEqual(seat[5], 5)
+        self.assertFalse(Seat.check_available(self.theater_id, [(1, 1)]))
+        self.assertCountEqual(Seat.get_by_booking(5), [(1, 1), (1, 2)])
+
+        Seat.sell(5)
+        self.assertEqual(Seat.get_by_position(self.theater_id, 1, 2)[4], Seat.STATUS_SOLD)
+
+        Seat.free(5)
+        seat = Seat.get_by_position(self.theater_id, 1, 2)
+        self.assertEqual(seat[4], Seat.STATUS_FREE)
+        self.assertIsNone(seat[5])
+        self.assertEqual(Seat.get_by_booking(5), [])
+        self.assertEqual(len(Seat.get_available(self.theater_id)), 9)
+
+    def test_booking_flow(self):
+        """Тест бронирования, конфликта и отмены на карте мест."""
+        booking_id = Booking.create(self.theater_id, "Иван", [(2, 2), (2, 3)])
+        with self.assertRaises(BookingError):
+            Booking.create(self.theater_id, "Пётр", [(2, 1), (2, 2)])
+        self.assertTrue(Seat.check_available(self.theater_id, [(2, 1)]))
+        self.assertEqual(Booking().to_dict(Booking().get(booking_id))["seats_count"], 2)
+
+        Booking.confirm(booking_id)
+        self.assertEqual(Seat.get_by_position(self.theater_id, 2, 2)[4], Seat.STATUS_SOLD)
+        Booking.cancel(booking_id)
+        self.assertEqual(len(Seat.get_available(self.theater_id)), 9)
+
+    def test_out_of_range_booking_fails(self):
+        """Тест бронирования места за пределами зала."""
+        with self.assertRaises(BookingError):
+            Booking.create(self.theater_id, "Иван", [(4, 1)])
+
+    def test_show_seat_map(self):
+        """Тест что схема зала показывает статусы из карты."""
+        Booking.create(self.theater_id, "Иван", [(1, 1)])
+        output = io.StringIO()
+        with redirect_stdout(output):
+            Theater.show_seat_map(self.theater_id)
+        self.assertEqual(output.getvalue().count("🟡"), 2)  # место и легенда
+        self.assertEqual(output.getvalue().count("⭕"), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
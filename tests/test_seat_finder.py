@@ -0,0 +1,98 @@
+"""Тесты для поиска лучших свободных мест."""
+
+import unittest
+from db_init import clear_db, init_db
+from logica import Movie, Seat
+from theater import Theater
+from booking import Booking
+from exceptions import BookingError
+from seat_finder import choose_seats, find_best_seats, free_runs
+
+
+def all_seats(rows, cols, taken=()):
+    """Свободные места зала rows x cols без занятых."""
+    return [
+        (row, col)
+        for row in range(1, rows + 1)
+        for col in range(1, cols + 1)
+        if (row, col) not in taken
+    ]
+
+
+class TestChooseSeats(unittest.TestCase):
+    """Тесты выбора мест по свободной сетке."""
+
+    def test_free_runs(self):
+        """Тест свёртки свободных мест в отрезки."""
+        runs = free_runs([(1, 1), (1, 2), (1, 4), (2, 1)])
+        self.assertEqual(runs, [(1, 1, 2), (1, 4, 1), (2, 1, 1)])
+
+    def test_center_block_in_preferred_row(self):
+        """Тест что блок выбирается по центру предпочтительного ряда."""
+        seats = choose_seats(6, 10, all_seats(6, 10), 4)
+        self.assertEqual(seats, [(4, 4), (4, 5), (4, 6), (4, 7)])
+
+    def test_block_shifts_around_taken_seats(self):
+        """Тест что блок сдвигается, если центр ряда занят."""
+        taken = {(1, 5)}
+        seats = choose_seats(1, 10, all_seats(1, 10, taken), 3)
+        self.assertEqual(seats, [(1, 6), (1, 7), (1, 8)])
+
+    def test_split_when_no_block(self):
+        """Тест разбивки на группы, если n соседних мест нет."""
+        taken = {(1, 3), (2, 3)}
+        seats = choose_seats(2, 4, all_seats(2, 4, taken), 3)
+        self.assertEqual(len(seats), 3)
+        self.assertTrue(set(seats).isdisjoint(taken))
+        self.assertIsNone(
+            choose_seats(2, 4, all_seats(2, 4, taken), 3, {"allow_split": False})
+        )
+
+    def test_not_enough_seats(self):
+        """Тест что при нехватке мест возвращается None."""
+        self.assertIsNone(choose_seats(1, 3, [(1, 1), (1, 3)], 3))
+
+
+class TestBestAvailableBooking(unittest.TestCase):
+    """Тесты бронирования лучших мест."""
+
+    def setUp(self):
+        """Инициализировать БД и создать сеансы."""
+        clear_db()
+        init_db()
+        movie_id = Movie.add("Тестовый фильм", 120, 8.0, "Описание")
+        self.theater_id = Theater.add(movie_id, 3, 6, 250.0, "2025-01-01T18:00:00")
+        self.bitmap_id = Theater.add(
+            movie_id, 3, 6, 250.0, "2025-01-01T20:00:00",
+            seat_storage=Seat.STORAGE_BITMAP,
+        )
+
+    def test_find_best_seats(self):
+        """Тест поиска мест по сеансу."""
+        Booking.create(self.theater_id, "Иван", [(2, 3), (2, 4)])
+        seats = find_best_seats(self.theater_id, 2)
+        self.assertEqual(len(seats), 2)
+        self.assertTrue(Seat.check_available(self.theater_id, seats))
+        self.assertIsNone(find_best_seats(9999, 2))
+
+    def test_create_best_available(self):
+        """Тест что лучшие места занимаются одной операцией."""
+        for theater_id in (self.theater_id, self.bitmap_id):
+            booking_id = Booking.create_best_available(theater_id, "Иван", 3)
+            booking = Booking().get(booking_id)
+            self.assertEqual(booking[5], 750.0)
+            self.assertEqual(
+                sorted(Seat.get_by_booking(booking_id)), [(2, 2), (2, 3), (2, 4)]
+            )
+
+    def test_create_best_available_sold_out(self):
+        """Тест ошибки, если свободных мест не хватает."""
+        Booking.create_best_available(self.theater_id, "Иван", 17)
+        with self.assertRaises(BookingError):
+            Booking.create_best_available(self.theater_id, "Пётр", 2)
+        with self.assertRaises(BookingError):
+            Booking.create_best_available(9999, "Пётр", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Тесты для пакетного заполнения БД."""
+
+import unittest
+from datetime import datetime
+
+from benchmark import check_integrity
+from db_init import clear_db, get_db, init_db
+from logica import Movie, Seat
+from seed_data import seed_bulk
+from theater import Theater
+
+START = datetime(2025, 1, 1)
+
+
+class TestSeedBulk(unittest.TestCase):
+    """Тесты пакетной генерации фильмов, сеансов и броней."""
+
+    def setUp(self):
+        """Инициализировать пустую БД."""
+        clear_db()
+        init_db()
+
+    @staticmethod
+    def _snapshot():
+        """Содержимое фильмов и сеансов без служебных колонок."""
+        with get_db() as cursor:
+            movies = cursor.execute(
+                "SELECT title, duration, rating, description FROM movies ORDER BY id"
+            ).fetchall()
+            theaters = cursor.execute(
+                """
+                SELECT movie_id, rows, cols, price, schedule, free_count
+                FROM theaters ORDER BY id
+                """
+            ).fetchall()
+        return movies, theaters
+
+    def test_seed_is_deterministic(self):
+        """Тест что одинаковый seed даёт одинаковые данные."""
+        options = dict(
+            movies=7, sessions_per_movie=3, occupancy=0.3, seed=42, batch_size=4, start=START
+        )
+        first = seed_bulk(**options)
+        snapshot = self._snapshot()
+        clear_db()
+        init_db()
+        second = seed_bulk(**options)
+
+        self.assertEqual(self._snapshot(), snapshot)
+        self.assertEqual(first["bookings"], second["bookings"])
+        self.assertEqual((first["movies"], first["theaters"]), (7, 21))
+
+    def test_target_occupancy(self):
+        """Тест что занятость близка к заданной и данные согласованы."""
+        stats = seed_bulk(movies=4, sessions_per_movie=5, occupancy=0.5, seed=1, start=START)
+        with get_db() as cursor:
+            taken = cursor.execute(
+                "SELECT COUNT(*) FROM seats WHERE status != ?", (Seat.STATUS_FREE,)
+            ).fetchone()[0]
+            payments = cursor.execute("SELECT COUNT(*) FROM payments").fetchone()[0]
+
+        self.assertAlmostEqual(taken / stats["seats"], 0.5, delta=0.1)
+        self.assertEqual(payments, stats["payments"])
+        self.assertEqual(set(check_integrity().values()), {0})
+
+    def test_bitmap_storage(self):
+        """Тест заполнения сеансов с хранением мест в карте."""
+        seed_bulk(
+            movies=2, sessions_per_movie=2, occupancy=0.4, seed=3,
+            seat_storage=Seat.STORAGE_BITMAP, start=START,
+        )
+        self.assertEqual(Seat().get_all(), [])
+        self.assertEqual(set(check_integrity().values()), {0})
+
+    def test_claim_many_skips_taken_seats(self):
+        """Тест что claim_many пропускает занятые места и обновляет счётчики."""
+        movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+        theater_id = Theater.add(movie_id, 2, 4, 300.0, "2025-01-01T18:00:00")
+        with get_db(immediate=True) as cursor:
+            claimed = Seat.claim_many(
+                cursor, theater_id, [(101, [(1, 1), (1, 2)]), (102, [(1, 2), (1, 3)])]
+            )
+        self.assertEqual(claimed, 3)
+        self.assertEqual(Theater.check_occupancy([theater_id]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
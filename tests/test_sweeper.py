@@ -0,0 +1,75 @@
+"""Тесты для истечения просроченных броней."""
+
+import unittest
+from datetime import timedelta
+from db_init import clear_db, get_db, init_db
+from logica import Movie, Seat
+from theater import Theater
+from booking import Booking
+from sweeper import HoldSweeper
+
+
+class TestHoldSweeper(unittest.TestCase):
+    """Тесты поиска и истечения просроченных броней."""
+
+    def setUp(self):
+        """Инициализировать БД и создать брони разного возраста."""
+        clear_db()
+        init_db()
+        movie_id = Movie.add("Тестовый фильм", 120, 8.0, "Описание")
+        self.theater_id = Theater.add(movie_id, 5, 8, 250.0, "2025-01-01T18:00:00")
+        self.bitmap_id = Theater.add(
+            movie_id, 5, 8, 250.0, "2025-01-01T20:00:00",
+            seat_storage=Seat.STORAGE_BITMAP,
+        )
+        self.stale = [
+            Booking.create(self.theater_id, "Иван", [(1, 1), (1, 2)]),
+            Booking.create(self.theater_id, "Пётр", [(2, 1)]),
+            Booking.create(self.bitmap_id, "Анна", [(3, 3), (3, 4)]),
+        ]
+        self.confirmed = Booking.create(self.theater_id, "Олег", [(4, 4)])
+        Booking.confirm(self.confirmed)
+        self.fresh = Booking.create(self.theater_id, "Мария", [(5, 5)])
+        with get_db() as cursor:
+            cursor.execute(
+                "UPDATE bookings SET created_at = datetime('now', '-1 hour') WHERE id != ?",
+                (self.fresh,),
+            )
+
+    def status(self, booking_id):
+        """Статус брони."""
+        return Booking().get(booking_id)[4]
+
+    def test_expire_stale_holds(self):
+        """Тест что истекают только старые pending брони и их места."""
+        result = Booking.expire_stale_holds(timedelta(minutes=15), batch_size=2)
+        self.assertEqual(result, {"bookings": 3, "seats": 5, "batches": 2})
+        for booking_id in self.stale:
+            self.assertEqual(self.status(booking_id), Booking.STATUS_EXPIRED)
+        self.assertEqual(self.status(self.confirmed), Booking.STATUS_CONFIRMED)
+        self.assertEqual(self.status(self.fresh), Booking.STATUS_PENDING)
+        self.assertTrue(Seat.check_available(self.theater_id, [(1, 1), (2, 1)]))
+        self.assertTrue(Seat.check_available(self.bitmap_id, [(3, 3), (3, 4)]))
+        self.assertFalse(Seat.check_available(self.theater_id, [(5, 5)]))
+
+    def test_run_once_metrics(self):
+        """Тест накопления метрик за несколько проходов."""
+        sweeper = HoldSweeper(ttl=timedelta(minutes=15))
+        sweeper.run_once()
+        sweeper.run_once()
+        metrics = sweeper.metrics
+        self.assertEqual(metrics["runs"], 2)
+        self.assertEqual(metrics["bookings_expired"], 3)
+        self.assertEqual(metrics["seats_released"], 5)
+
+    def test_background_thread(self):
+        """Тест запуска и остановки фонового потока."""
+        sweeper = HoldSweeper(interval=0.01, ttl=timedelta(minutes=15))
+        sweeper.start()
+        sweeper.stop(timeout=5)
+        self.assertGreaterEqual(sweeper.metrics["runs"], 1)
+        self.assertEqual(self.status(self.stale[0]), Booking.STATUS_EXPIRED)
+
+
+if __name__ == "__main__":
+    unittest.main()
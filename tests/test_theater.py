@@ -1,9 +1,11 @@
 """Тесты для класса Theater."""
 
 import unittest
-from db_init import clear_db, init_db
+from db_init import clear_db, get_db, init_db
 from logica import Movie, Seat
 from theater import Theater
+from booking import Booking
+from tests.conftest import capture_queries, find_table_scans
 
 
 class TestTheater(unittest.TestCase):
@@ -27,6 +29,30 @@ class TestTheater(unittest.TestCase):
         seats = Seat().get_all()
         self.assertEqual(len(seats), 12)  # 3x4 = 12 мест
 
+    def test_add_theater_seat_positions(self):
+        """Тест что места создаются по всей сетке рядов и мест."""
+        theater_id = Theater.add(self.movie_id, 2, 3, 300.0, "2025-01-01T18:00:00")
+        positions = sorted((seat[2], seat[3]) for seat in Seat.get_available(theater_id))
+        expected = [(row, col) for row in range(1, 3) for col in range(1, 4)]
+        self.assertEqual(positions, expected)
+
+    def test_add_many_theaters(self):
+        """Тест пакетного создания сеансов с местами."""
+        other_movie_id = Movie.add("Другой фильм", 90, 7.0, "Описание")
+        theater_ids = Theater.add_many([
+            {"movie_id": self.movie_id, "rows": 2, "cols": 3, "price": 250.0,
+             "schedule": "2025-01-01T18:00:00"},
+            {"movie_id": 9999, "rows": 2, "cols": 2, "price": 250.0,
+             "schedule": "2025-01-01T19:00:00"},
+            {"movie_id": other_movie_id, "rows": 4, "cols": 5, "price": 300.0,
+             "schedule": "2025-01-01T20:00:00"},
+        ])
+        self.assertEqual(len(theater_ids), 3)
+        self.assertIsNone(theater_ids[1])
+        self.assertEqual(len(Theater().get_all()), 2)
+        self.assertEqual(len(Seat.get_available(theater_ids[0])), 6)
+        self.assertEqual(len(Seat.get_available(theater_ids[2])), 20)
+
     def test_add_theater_nonexistent_movie(self):
         """Тест создания сеанса для несуществующего фильма."""
         result = Theater.add(9999, 5, 8, 250.0, "2025-01-01T18:00:00")
@@ -69,6 +95,172 @@ class TestTheater(unittest.TestCase):
         deleted = Theater().get(theater_id)
         self.assertIsNone(deleted)
 
+    def test_render_seat_map(self):
+        """Тест отрисовки схемы мест в строку."""
+        theater_id = Theater.add(self.movie_id, 2, 3, 250.0, "2025-01-01T18:00:00")
+        Booking.create(theater_id, "Иван", [(1, 2)])
+        rendered = Theater.render_seat_map(theater_id)
+        self.assertIn("всего 2x3", rendered)
+        self.assertIn(" 1  ⭕ 🟡 ⭕", rendered)
+        self.assertIsNone(Theater.render_seat_map(9999))
+
+    def test_render_seat_map_cached_until_seats_change(self):
+        """Тест что схема берётся из кэша, пока места не изменились."""
+        theater_id = Theater.add(self.movie_id, 2, 3, 250.0, "2025-01-01T18:00:00")
+        first = Theater.render_seat_map(theater_id)
+        with capture_queries() as statements:
+            second = Theater.render_seat_map(theater_id)
+        self.assertIs(first, second)
+        self.assertFalse(any("FROM seats" in sql for sql in statements))
+
+        booking_id = Booking.create(theater_id, "Иван", [(2, 1)])
+        reserved = Theater.render_seat_map(theater_id)
+        self.assertIn(" 2  🟡 ⭕ ⭕", reserved)
+        Booking.confirm(booking_id)
+        self.assertIn(" 2  🔴 ⭕ ⭕", Theater.render_seat_map(theater_id))
+        Booking.cancel(booking_id)
+        self.assertEqual(Theater.render_seat_map(theater_id), first)
+
+    def test_occupancy_counters_follow_seats(self):
+        """Тест что free_count и max_block следуют за изменениями мест."""
+        theater_id = Theater.add(self.movie_id, 2, 6, 250.0, "2025-01-01T18:00:00")
+        counters = Theater().to_dict(Theater().get(theater_id))
+        self.assertEqual((counters["free_count"], counters["max_block"]), (12, 6))
+
+        booking_id = Booking.create(theater_id, "Иван", [(1, 3), (2, 4)])
+        counters = Theater().to_dict(Theater().get(theater_id))
+        self.assertEqual((counters["free_count"], counters["max_block"]), (10, 3))
+
+        Booking.cancel(booking_id)
+        counters = Theater().to_dict(Theater().get(theater_id))
+        self.assertEqual((counters["free_count"], counters["max_block"]), (12, 6))
+
+    def test_occupancy_status_counters(self):
+        """Тест счётчиков свободных, зарезервированных и проданных мест."""
+        theater_id = Theater.add(self.movie_id, 2, 5, 250.0, "2025-01-01T18:00:00")
+        sold_id = Booking.create(theater_id, "Иван", [(1, 1), (1, 2)])
+        Booking.create(theater_id, "Пётр", [(2, 5)])
+        Booking.confirm(sold_id)
+        counters = Theater().to_dict(Theater().get(theater_id))
+        self.assertEqual(counters["free_count"], 7)
+        self.assertEqual(counters["reserved_count"], 1)
+        self.assertEqual(counters["sold_count"], 2)
+        self.assertEqual(Theater.check_occupancy(), [])
+
+    def test_incremental_counters_match_recount(self):
+        """Тест что счётчики, обновляемые разницами, совпадают с пересчётом мест."""
+        for storage in (Seat.STORAGE_ROWS, Seat.STORAGE_BITMAP):
+            theater_id = Theater.add(
+                self.movie_id, 3, 6, 250.0, "2025-01-01T18:00:00", storage
+            )
+            first = Booking.create(theater_id, "Иван", [(1, 2), (1, 3), (2, 6)])
+            second = Booking.create(theater_id, "Пётр", [(1, 5), (3, 1)])
+            third = Booking.create(theater_id, "Анна", [(2, 1), (2, 2)])
+            Booking.confirm(first)
+            Booking.cancel(second)
+            Booking.confirm_many([third])
+            Booking.cancel(first)
+            Seat.reserve(theater_id, [(3, 3), (3, 4)], third)
+            self.assertEqual(Theater.check_occupancy([theater_id]), [], storage)
+            with get_db() as cursor:
+                blocks = cursor.execute(
+                    "SELECT row, longest FROM seat_row_blocks WHERE theater_id = ? ORDER BY row",
+                    (theater_id,),
+                ).fetchall()
+            self.assertEqual(blocks, [(1, 6), (2, 4), (3, 2)], storage)
+
+    def test_seat_changes_do_not_rescan_session(self):
+        """Тест что бронь и подтверждение не читают все места сеанса."""
+        theater_id = Theater.add(self.movie_id, 4, 8, 250.0, "2025-01-01T18:00:00")
+        with capture_queries() as statements:
+            booking_id = Booking.create(theater_id, "Иван", [(2, 2), (2, 3)])
+            Booking.confirm(booking_id)
+        full_reads = [
+            sql for sql in statements
+            if "FROM seats" in sql and " row IN " not in sql and "booking_id IN" not in sql
+            and "row = " not in sql
+        ]
+        self.assertEqual(full_reads, [])
+        self.assertEqual(Theater.check_occupancy([theater_id]), [])
+
+    def test_check_and_rebuild_occupancy(self):
+        """Тест обнаружения и исправления рассинхронизации счётчиков."""
+        theater_id = Theater.add(self.movie_id, 2, 5, 250.0, "2025-01-01T18:00:00")
+        Booking.create(theater_id, "Иван", [(1, 1)])
+        with get_db() as cursor:
+            cursor.execute(
+                "UPDATE theaters SET free_count = 0, reserved_count = 0 WHERE id = ?",
+                (theater_id,),
+            )
+        mismatches = Theater.check_occupancy([theater_id])
+        self.assertEqual(len(mismatches), 1)
+        self.assertEqual(mismatches[0]["actual"]["free_count"], 9)
+
+        self.assertEqual(Theater.rebuild_occupancy(), 1)
+        self.assertEqual(Theater.check_occupancy(), [])
+        self.assertEqual(Theater.rebuild_occupancy(), 0)
+
+    def test_upgrade_backfills_occupancy(self):
+        """Тест что init_db() заполняет добавленные счётчики у существующих сеансов."""
+        theater_id = Theater.add(self.movie_id, 2, 5, 250.0, "2025-01-01T18:00:00")
+        Booking.create(theater_id, "Иван", [(1, 1), (2, 3)])
+        with get_db() as cursor:
+            cursor.execute("DROP TABLE seat_row_blocks")
+            for column in ("free_count", "max_block", "reserved_count", "sold_count"):
+                cursor.execute(f"ALTER TABLE theaters DROP COLUMN {column}")
+
+        init_db()
+        found = Theater.search(min_free=8, min_block=4)
+        self.assertEqual([row[0] for row in found], [theater_id])
+        self.assertEqual(Theater.check_occupancy(), [])
+        self.assertEqual(Theater.rebuild_occupancy(), 0)
+
+    def test_search_sessions(self):
+        """Тест поиска сеансов по фильму, времени, цене и свободным местам."""
+        other_movie_id = Movie.add("Другой фильм", 90, 7.0, "Описание")
+        early = Theater.add(self.movie_id, 2, 4, 250.0, "2025-01-01T12:00:00")
+        late = Theater.add(self.movie_id, 2, 4, 400.0, "2025-01-02T20:00:00")
+        full = Theater.add(self.movie_id, 1, 4, 250.0, "2025-01-01T18:00:00")
+        Theater.add(other_movie_id, 2, 4, 250.0, "2025-01-01T18:00:00")
+        Booking.create(full, "Иван", [(1, 2)])
+        Booking.create(early, "Пётр", [(1, 2), (2, 3)])
+
+        found = Theater.search(movie_id=self.movie_id)
+        self.assertEqual([t[0] for t in found], [early, full, late])
+
+        found = Theater.search(
+            movie_id=self.movie_id,
+            starts_from="2025-01-01T00:00:00",
+            starts_before="2025-01-02T00:00:00",
+        )
+        self.assertEqual([t[0] for t in found], [early, full])
+
+        found = Theater.search(movie_id=self.movie_id, min_block=3)
+        self.assertEqual([t[0] for t in found], [late])
+        found = Theater.search(movie_id=self.movie_id, min_free=4, max_price=300.0)
+        self.assertEqual([t[0] for t in found], [early])
+
+    def test_search_uses_movie_schedule_index(self):
+        """Тест что поиск по фильму и времени идёт по индексу."""
+        with get_db() as cursor:
+            plan = cursor.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM theaters "
+                "WHERE movie_id = 1 AND schedule >= '2025' AND free_count >= 4 "
+                "ORDER BY schedule"
+            ).fetchall()
+        details = " ".join(step[3] for step in plan)
+        self.assertIn("idx_theaters_movie_schedule", details)
+
+    def test_search_without_movie_uses_schedule_index(self):
+        """Тест что поиск по окну времени без фильма не сканирует таблицу."""
+        Theater.add(self.movie_id, 5, 8, 250.0, "2025-01-01T18:00:00")
+        with capture_queries() as statements:
+            found = Theater.search(
+                starts_from="2025-01-01", starts_before="2025-01-02", max_price=300.0
+            )
+        self.assertEqual(len(found), 1)
+        self.assertEqual(find_table_scans(statements, ("theaters",)), [])
+
     def test_to_dict(self):
         """Тест преобразования сеанса в словарь."""
         theater_id = Theater.add(self.movie_id, 5, 8, 250.0, "2025-01-01T18:00:00")
@@ -0,0 +1,83 @@
+"""Тесты для трассировки операций бронирования и оплаты."""
+
+import os
+import tempfile
+import unittest
+
+import tracing
+from booking import Booking
+from db_init import clear_db, init_db
+from exceptions import BookingError
+from logica import Movie
+from payments import Payment
+from theater import Theater
+from tracing import JsonLinesExporter, MemoryExporter, fold, span
+
+
+class TestTracing(unittest.TestCase):
+    """Тесты вложенных участков и их выгрузки."""
+
+    def setUp(self):
+        """Инициализировать БД с фильмом и сеансом."""
+        clear_db()
+        init_db()
+        self.movie_id = Movie.add("Фильм", 120, 8.0, "Описание")
+        self.theater_id = Theater.add(self.movie_id, 2, 4, 300.0, "2025-01-01T18:00:00")
+
+    def tearDown(self):
+        """Выключить трассировку."""
+        tracing.disable()
+
+    def test_disabled_records_nothing(self):
+        """Тест что без enable() участки не создаются."""
+        with span("noop") as current:
+            self.assertIsNone(current)
+        Booking.create(self.theater_id, "Иван", [(1, 1)])
+
+    def test_create_spans_are_nested(self):
+        """Тест что этапы Booking.create вложены в корневой участок."""
+        exporter = tracing.enable(MemoryExporter())
+        booking_id = Booking.create(self.theater_id, "Иван", [(1, 1), (1, 2)])
+
+        spans = {s.name: s for s in exporter.spans}
+        root = spans["booking.create"]
+        self.assertIsNone(root.parent_id)
+        self.assertEqual(root.attributes["booking_id"], booking_id)
+        self.assertEqual(spans["theater.lookup"].parent_id, root.span_id)
+        transaction = spans["booking.transaction"]
+        self.assertEqual(spans["seat.claim"].parent_id, transaction.span_id)
+        self.assertEqual(spans["booking.insert"].parent_id, transaction.span_id)
+        self.assertEqual({s.trace_id for s in exporter.spans}, {root.trace_id})
+        self.assertGreaterEqual(root.duration_ms, transaction.duration_ms)
+
+    def test_error_is_recorded(self):
+        """Тест что исключение записывается в участок и пробрасывается."""
+        exporter = tracing.enable(MemoryExporter())
+        booking_id = Booking.create(self.theater_id, "Иван", [(1, 1)])
+        Booking.cancel(booking_id)
+        with self.assertRaises(BookingError):
+            Booking.cancel(booking_id)
+
+        failed = [s for s in exporter.spans if s.name == "booking.cancel"][-1]
+        self.assertIn("BookingError", failed.error)
+
+    def test_json_lines_export_and_fold(self):
+        """Тест выгрузки в JSON lines и свёртки стеков для flame graph."""
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "traces.jsonl")
+            tracing.enable(JsonLinesExporter(filename))
+            booking_id = Booking.create(self.theater_id, "Иван", [(1, 1)])
+            Booking.confirm(booking_id)
+            Payment.process(booking_id, 300.0)
+            tracing.disable()
+
+            folded = fold(filename)
+
+        self.assertIn("booking.create;booking.transaction;seat.claim", folded)
+        self.assertIn("booking.confirm;booking.transaction;seat.sell", folded)
+        self.assertIn("payment.process;payment.insert", folded)
+        self.assertTrue(all(value >= 0 for value in folded.values()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+"""Тесты для очереди потока-писателя write_queue."""
+
+import threading
+import unittest
+from concurrent.futures import Future
+
+from write_queue import WriteQueue
+
+
+class TestWriteQueue(unittest.TestCase):
+    """Тесты закрытия очереди."""
+
+    def test_put_after_close_rejected(self):
+        """Тест что закрытая очередь не принимает задания."""
+        writes = WriteQueue("Очередь закрыта.")
+        writer = threading.Thread(target=writes.get)
+        writer.start()
+        self.assertTrue(writes.close(writer))
+        self.assertFalse(writes.close(writer))
+        with self.assertRaisesRegex(RuntimeError, "Очередь закрыта."):
+            writes.put(Future(), "payload")
+
+    def test_close_fails_leftover_jobs(self):
+        """Тест что задания, не взятые писателем, завершаются ошибкой."""
+        writes = WriteQueue("Очередь закрыта.")
+        leftover: Future = Future()
+        writes.put(leftover, "payload")
+        writer = threading.Thread(target=lambda: None)
+        writer.start()
+        writes.close(writer)
+        self.assertIsInstance(leftover.exception(timeout=0), RuntimeError)
+        self.assertEqual(writes.qsize(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,30 @@
 from __future__ import annotations
 
+import sqlite3
+import threading
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple
 
 from base_repository import BaseRepository
-from db_init import get_db
+from db_init import add_reset_hook, get_db
 from logica import Movie, Seat
 
+SEAT_MAP_CACHE_SIZE = 256
+
+# Кэш схем мест: ID сеанса -> (seat_version, отрисованная схема).
+_seat_map_cache: "OrderedDict[int, Tuple[int, str]]" = OrderedDict()
+_seat_map_lock = threading.Lock()
+
 
 class Theater(BaseRepository):
     """Класс для работы с залами и сеансами."""
 
+    cache_size = 1024
+    cache_ttl = 30.0
+    # Счётчики заполненности и seat_version меняются при каждой брони,
+    # поэтому кэшируются только параметры сеанса (см. get_cached).
+    cache_columns = "price, rows, cols, schedule"
+
     @property
     def table_name(self) -> str:
         return "theaters"
@@ -23,6 +38,11 @@ class Theater(BaseRepository):
             3: "cols",
             4: "price",
             5: "schedule",
+            6: "seat_version",
+            8: "free_count",
+            9: "max_block",
+            10: "reserved_count",
+            11: "sold_count",
         }
 
     @staticmethod
@@ -32,30 +52,148 @@ class Theater(BaseRepository):
         cols: int,
         price: float,
         schedule: str,
+        seat_storage: str = Seat.STORAGE_ROWS,
     ) -> Optional[int]:
-        """Создать сеанс и места для него."""
+        """
+        Создать сеанс и места для него.
+
+        seat_storage выбирает способ хранения мест: Seat.STORAGE_ROWS
+        (строка на место) или Seat.STORAGE_BITMAP (компактная карта).
+        """
         movie = Movie()
         if movie.get(movie_id) is None:
             return None
 
-        query = """
-            INSERT INTO theaters (movie_id, rows, cols, price, schedule)
-            VALUES (?, ?, ?, ?, ?)
+        with get_db() as cursor:
+            theater_id = Theater._insert_session(
+                cursor, movie_id, rows, cols, price, schedule, seat_storage
+            )
+
+        return theater_id
+
+    @staticmethod
+    def add_many(sessions: List[Dict[str, Any]]) -> List[Optional[int]]:
         """
+        Создать много сеансов с местами в одной транзакции.
+
+        Каждый элемент sessions содержит ключи movie_id, rows, cols,
+        price, schedule и необязательный seat_storage (как аргументы
+        add). Возвращает ID сеансов в
+        том же порядке; для несуществующих фильмов вместо ID будет None.
+        """
+        if not sessions:
+            return []
+
+        movie_ids = sorted({session["movie_id"] for session in sessions})
+        placeholders = ", ".join(["?"] * len(movie_ids))
+        theater_ids: List[Optional[int]] = []
 
         with get_db() as cursor:
-            theater_id = cursor.execute(query, (movie_id, rows, cols, price, schedule)).lastrowid
-
-            for row in range(1, rows + 1):
-                for col in range(1, cols + 1):
-                    cursor.execute(
-                        """
-                        INSERT INTO seats (theater_id, row, col, status)
-                        VALUES (?, ?, ?, ?)
-                        """,
-                        (theater_id, row, col, Seat.STATUS_FREE),
+            known = {
+                row[0]
+                for row in cursor.execute(
+                    f"SELECT id FROM movies WHERE id IN ({placeholders})",
+                    movie_ids,
+                )
+            }
+            for session in sessions:
+                if session["movie_id"] not in known:
+                    theater_ids.append(None)
+                    continue
+                theater_ids.append(
+                    Theater._insert_session(
+                        cursor,
+                        session["movie_id"],
+                        session["rows"],
+                        session["cols"],
+                        session["price"],
+                        session["schedule"],
+                        session.get("seat_storage", Seat.STORAGE_ROWS),
                     )
+                )
+
+        return theater_ids
+
+    @staticmethod
+    def _insert_session(
+        cursor: sqlite3.Cursor,
+        movie_id: int,
+        rows: int,
+        cols: int,
+        price: float,
+        schedule: str,
+        seat_storage: str = Seat.STORAGE_ROWS,
+    ) -> int:
+        """
+        Вставить сеанс и все его места внутри открытой транзакции.
+
+        Места генерируются одним INSERT ... SELECT из рекурсивных CTE
+        рядов и мест вместо отдельного INSERT на каждое место; в режиме
+        bitmap вместо строк мест создаётся одна пустая карта.
+        """
+        if seat_storage not in (Seat.STORAGE_ROWS, Seat.STORAGE_BITMAP):
+            raise ValueError(f"Неизвестный способ хранения мест: {seat_storage}.")
+
+        query = """
+            INSERT INTO theaters (movie_id, rows, cols, price, schedule,
+                                  free_count, max_block)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        theater_id = cursor.execute(
+            query,
+            (
+                movie_id,
+                rows,
+                cols,
+                price,
+                schedule,
+                max(rows, 0) * max(cols, 0),
+                max(cols, 0) if rows > 0 else 0,
+            ),
+        ).lastrowid
 
+        cursor.execute(
+            """
+            WITH RECURSIVE seat_rows(row) AS (
+                SELECT 1 WHERE :rows >= 1
+                UNION ALL
+                SELECT row + 1 FROM seat_rows WHERE row < :rows
+            )
+            INSERT INTO seat_row_blocks (theater_id, row, longest)
+            SELECT :theater_id, row, :cols FROM seat_rows
+            """,
+            {"rows": rows, "cols": max(cols, 0), "theater_id": theater_id},
+        )
+
+        if seat_storage == Seat.STORAGE_BITMAP:
+            Seat.create_map(cursor, theater_id, rows, cols)
+            return theater_id
+
+        cursor.execute(
+            """
+            WITH RECURSIVE
+                seat_rows(row) AS (
+                    SELECT 1 WHERE :rows >= 1
+                    UNION ALL
+                    SELECT row + 1 FROM seat_rows WHERE row < :rows
+                ),
+                seat_cols(col) AS (
+                    SELECT 1 WHERE :cols >= 1
+                    UNION ALL
+                    SELECT col + 1 FROM seat_cols WHERE col < :cols
+                )
+            INSERT INTO seats (theater_id, row, col, status)
+            SELECT :theater_id, seat_rows.row, seat_cols.col, :status
+            FROM seat_rows, seat_cols
+            ORDER BY seat_rows.row, seat_cols.col
+            """,
+            {
+                "rows": rows,
+                "cols": cols,
+                "theater_id": theater_id,
+                "status": Seat.STATUS_FREE,
+            },
+        )
         return theater_id
 
     @staticmethod
@@ -78,41 +216,215 @@ class Theater(BaseRepository):
         params = tuple(fields_to_update.values()) + (theater_id,)
 
         Theater.execute_query(query, params)
+        Theater.invalidate_cache("theaters", [theater_id])
+
+    @staticmethod
+    def search(
+        movie_id: Optional[int] = None,
+        starts_from: Optional[str] = None,
+        starts_before: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_free: int = 0,
+        min_block: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[Any, ...]]:
+        """
+        Найти сеансы со свободными местами одним запросом.
+
+        Фильтры: фильм, окно времени начала [starts_from, starts_before)
+        в формате schedule (ISO), диапазон цены, минимум свободных мест
+        (free_count) и минимальный блок соседних свободных мест в одном
+        ряду (max_block). Счётчики поддерживаются методами Seat при
+        каждом изменении мест, поэтому места при поиске не читаются.
+        Результат отсортирован по времени начала. Поиск по фильму идёт
+        по idx_theaters_movie_schedule, без фильма — по idx_theaters_schedule;
+        без фильма и окна времени индекс обходится целиком.
+        """
+        conditions: List[str] = []
+        params: List[Any] = []
+        filters = [
+            ("movie_id = ?", movie_id),
+            ("schedule >= ?", starts_from),
+            ("schedule < ?", starts_before),
+            ("price >= ?", min_price),
+            ("price <= ?", max_price),
+            ("free_count >= ?", min_free or None),
+            ("max_block >= ?", min_block or None),
+        ]
+        for condition, value in filters:
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+
+        query = "SELECT * FROM theaters"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY schedule"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        result = Theater.execute_query(query, tuple(params), fetch_all=True)
+        return result if result else []
+
+    @staticmethod
+    def check_occupancy(
+        theater_ids: Optional[List[int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Сверить счётчики заполненности сеансов с состоянием мест.
+
+        Проверяются указанные сеансы или все. Возвращает список
+        расхождений: {"theater_id", "stored", "actual"}.
+        """
+        mismatches: List[Dict[str, Any]] = []
+        with get_db() as cursor:
+            for theater_id, stored in Theater._stored_occupancy(cursor, theater_ids):
+                actual = Seat.occupancy(cursor, theater_id)
+                if stored != actual:
+                    mismatches.append(
+                        {"theater_id": theater_id, "stored": stored, "actual": actual}
+                    )
+        return mismatches
+
+    @staticmethod
+    def rebuild_occupancy(theater_ids: Optional[List[int]] = None) -> int:
+        """
+        Пересчитать счётчики заполненности сеансов по состоянию мест.
+
+        Заодно заново заполняются длины свободных отрезков рядов
+        (seat_row_blocks). Возвращает количество исправленных сеансов.
+        """
+        with get_db(immediate=True) as cursor:
+            return Theater.rebuild_occupancy_in_transaction(cursor, theater_ids)
+
+    @staticmethod
+    def rebuild_occupancy_in_transaction(
+        cursor: sqlite3.Cursor,
+        theater_ids: Optional[List[int]] = None,
+    ) -> int:
+        """Пересчитать счётчики внутри открытой транзакции (см. rebuild_occupancy)."""
+        fixed = 0
+        for theater_id, stored in Theater._stored_occupancy(cursor, theater_ids):
+            Seat.rebuild_row_blocks(cursor, theater_id)
+            actual = Seat.occupancy(cursor, theater_id)
+            if stored == actual:
+                continue
+            cursor.execute(
+                """
+                UPDATE theaters
+                SET free_count = :free_count,
+                    reserved_count = :reserved_count,
+                    sold_count = :sold_count,
+                    max_block = :max_block
+                WHERE id = :theater_id
+                """,
+                {**actual, "theater_id": theater_id},
+            )
+            fixed += 1
+        return fixed
+
+    @staticmethod
+    def _stored_occupancy(
+        cursor: sqlite3.Cursor,
+        theater_ids: Optional[List[int]],
+    ) -> List[Tuple[int, Dict[str, int]]]:
+        """Прочитать сохранённые счётчики сеансов: [(ID, счётчики), ...]."""
+        query = """
+            SELECT id, free_count, reserved_count, sold_count, max_block
+            FROM theaters
+        """
+        params: Tuple[int, ...] = ()
+        if theater_ids is not None:
+            if not theater_ids:
+                return []
+            placeholders = ", ".join(["?"] * len(theater_ids))
+            query += f" WHERE id IN ({placeholders})"
+            params = tuple(theater_ids)
+        rows = cursor.execute(query + " ORDER BY id", params).fetchall()
+        return [
+            (
+                row[0],
+                {
+                    "free_count": row[1],
+                    "reserved_count": row[2],
+                    "sold_count": row[3],
+                    "max_block": row[4],
+                },
+            )
+            for row in rows
+        ]
+
+    @staticmethod
+    def render_seat_map(theater_id: int) -> Optional[str]:
+        """
+        Вернуть схему мест сеанса в виде строки или None, если сеанса нет.
+
+        Готовая схема кэшируется по ID сеанса вместе с theaters.seat_version;
+        пока версия не изменилась, повторный вызов стоит одного чтения
+        строки сеанса по первичному ключу.
+        """
+        query = "SELECT rows, cols, seat_version FROM theaters WHERE id = ?"
+        theater_data = Theater.execute_query(query, (theater_id,), fetch_one=True)
+        if theater_data is None:
+            return None
+
+        rows, cols, version = theater_data
+        with _seat_map_lock:
+            cached = _seat_map_cache.get(theater_id)
+            if cached is not None and cached[0] == version:
+                _seat_map_cache.move_to_end(theater_id)
+                return cached[1]
+
+        rendered = Theater._format_seat_map(rows, cols, Seat.get_statuses(theater_id))
+
+        with _seat_map_lock:
+            _seat_map_cache[theater_id] = (version, rendered)
+            _seat_map_cache.move_to_end(theater_id)
+            while len(_seat_map_cache) > SEAT_MAP_CACHE_SIZE:
+                _seat_map_cache.popitem(last=False)
+        return rendered
+
+    @staticmethod
+    def clear_seat_map_cache() -> None:
+        """Очистить кэш отрисованных схем мест."""
+        with _seat_map_lock:
+            _seat_map_cache.clear()
 
     @staticmethod
     def show_seat_map(theater_id: int) -> None:
         """Показать схему мест для сеанса."""
-        theater = Theater()
-        theater_data = theater.get(theater_id)
-        if theater_data is None:
+        rendered = Theater.render_seat_map(theater_id)
+        if rendered is None:
             print("Сеанс не найден.")
             return
+        print(rendered, end="")
 
-        rows, cols = theater_data[2], theater_data[3]
-        seats = Seat()
-        seat_list = seats.get_all()
-
-        seat_status: dict[tuple[int, int], str] = {}
-        for seat_row in seat_list:
-            if seat_row[1] == theater_id:
-                seat_status[(seat_row[2], seat_row[3])] = seat_row[4]
+    @staticmethod
+    def _format_seat_map(
+        rows: int,
+        cols: int,
+        seat_status: Dict[Tuple[int, int], str],
+    ) -> str:
+        """Нарисовать сетку мест по статусам."""
+        symbols = {
+            Seat.STATUS_FREE: " ⭕",
+            Seat.STATUS_RESERVED: " 🟡",
+            Seat.STATUS_SOLD: " 🔴",
+        }
+        lines = [
+            f"\nСхема мест (всего {rows}x{cols}):\n",
+            "   " + "".join(f"{col:3}" for col in range(1, cols + 1)),
+        ]
+        for row in range(1, rows + 1):
+            cells = "".join(
+                symbols.get(seat_status.get((row, col), Seat.STATUS_FREE), "")
+                for col in range(1, cols + 1)
+            )
+            lines.append(f"{row:2} {cells}")
+        lines.append("\n⭕ = Свободно | 🟡 = Зарезервировано | 🔴 = Продано\n")
+        return "\n".join(lines) + "\n"
 
-        print(f"\nСхема мест (всего {rows}x{cols}):\n")
-        print("   ", end="")
-        for col in range(1, cols + 1):
-            print(f"{col:3}", end="")
-        print()
 
-        for row in range(1, rows + 1):
-            print(f"{row:2} ", end="")
-            for col in range(1, cols + 1):
-                status = seat_status.get((row, col), Seat.STATUS_FREE)
-                if status == Seat.STATUS_FREE:
-                    print(" ⭕", end="")
-                elif status == Seat.STATUS_RESERVED:
-                    print(" 🟡", end="")
-                elif status == Seat.STATUS_SOLD:
-                    print(" 🔴", end="")
-            print()
-
-        print("\n⭕ = Свободно | 🟡 = Зарезервировано | 🔴 = Продано\n")
+add_reset_hook(Theater.clear_seat_map_cache)
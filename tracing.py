@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRACE_FILE = "cinema_traces.jsonl"
+
+
+class Span:
+    """Участок работы: имя, время начала и длительность, атрибуты."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str]) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.parent_id = parent_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.attributes: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.start = time.time()
+        self.duration_ms = 0.0
+        self._started = time.perf_counter()
+
+    def finish(self) -> None:
+        """Зафиксировать длительность."""
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление для выгрузки."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "thread": threading.current_thread().name,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class JsonLinesExporter:
+    """Запись завершённых участков в файл, по JSON объекту на строку."""
+
+    def __init__(self, filename: str = TRACE_FILE) -> None:
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._file = open(filename, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        """Дописать участок в файл."""
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        """Закрыть файл."""
+        with self._lock:
+            self._file.close()
+
+
+class MemoryExporter:
+    """Накопление завершённых участков в списке (для тестов и отладки)."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        """Сохранить участок."""
+        with self._lock:
+            self.spans.append(span)
+
+    def close(self) -> None:
+        """Ничего не делает."""
+
+
+_exporter: Optional[Any] = None
+_local = threading.local()
+_NO_SPAN = nullcontext()
+
+
+def enable(exporter: Optional[Any] = None) -> Any:
+    """
+    Включить трассировку и вернуть экспортёр.
+
+    По умолчанию участки пишутся в TRACE_FILE через JsonLinesExporter;
+    экспортёр — любой объект с методами export(span) и close().
+    """
+    global _exporter
+    disable()
+    _exporter = exporter if exporter is not None else JsonLinesExporter()
+    return _exporter
+
+
+def disable() -> None:
+    """Выключить трассировку и закрыть экспортёр."""
+    global _exporter
+    exporter, _exporter = _exporter, None
+    if exporter is not None:
+        exporter.close()
+
+
+def span(name: str, **attributes: Any) -> ContextManager[Optional[Span]]:
+    """
+    Открыть участок name, вложенный в текущий участок потока.
+
+    Пока трассировка выключена, возвращает пустой контекстный
+    менеджер. Исключение внутри участка записывается в его поле error
+    и пробрасывается дальше.
+
+    Использование:
+        with span("seat.claim", seats=len(positions)):
+            ...
+    """
+    if _exporter is None:
+        return _NO_SPAN
+    return _open_span(name, attributes)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Декоратор: выполнять функцию внутри участка name."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with _open_span(name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def annotate(**attributes: Any) -> None:
+    """Добавить атрибуты текущему участку потока, если он есть."""
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1].attributes.update(attributes)
+
+
+@contextmanager
+def _open_span(name: str, attributes: Dict[str, Any]) -> Iterator[Span]:
+    """Открыть участок, положить его на стек потока и выгрузить по завершении."""
+    stack: List[Span] = _local.__dict__.setdefault("stack", [])
+    parent = stack[-1] if stack else None
+    current = Span(
+        name,
+        parent.trace_id if parent else uuid.uuid4().hex,
+        parent.span_id if parent else None,
+    )
+    current.attributes.update(attributes)
+    stack.append(current)
+    try:
+        yield current
+    except BaseException as error:
+        current.error = f"{type(error).__name__}: {error}"
+        raise
+    finally:
+        stack.pop()
+        current.finish()
+        exporter = _exporter
+        if exporter is not None:
+            exporter.export(current)
+
+
+def fold(filename: str = TRACE_FILE) -> Dict[str, float]:
+    """
+    Свернуть участки из JSON lines файла в стеки для flame graph.
+
+    Возвращает {"корень;потомок;...": собственное время в мс}, где
+    собственное время — длительность участка без вложенных участков.
+    Формат совместим с flamegraph.pl и speedscope (collapsed stacks).
+    """
+    spans: Dict[str, Dict[str, Any]] = {}
+    with open(filename, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                spans[record["span_id"]] = record
+
+    children_ms: Dict[str, float] = defaultdict(float)
+    for record in spans.values():
+        if record["parent_id"] is not None:
+            children_ms[record["parent_id"]] += record["duration_ms"]
+
+    folded: Dict[str, float] = defaultdict(float)
+    for span_id, record in spans.items():
+        names = [record["name"]]
+        parent = spans.get(record["parent_id"])
+        while parent is not None:
+            names.append(parent["name"])
+            parent = spans.get(parent["parent_id"])
+        self_ms = max(record["duration_ms"] - children_ms[span_id], 0.0)
+        folded[";".join(reversed(names))] += self_ms
+    return dict(folded)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Вывести свёрнутые стеки (мкс) для flamegraph.pl или speedscope."""
+    parser = argparse.ArgumentParser(description="Свёртка трасс в формат flame graph.")
+    parser.add_argument("filename", nargs="?", default=TRACE_FILE)
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.filename):
+        parser.error(f"файл {args.filename} не найден")
+    for stack, self_ms in sorted(fold(args.filename).items()):
+        print(f"{stack} {round(self_ms * 1000)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Optional
+
+STOP = object()
+
+
+class WriteQueue:
+    """
+    Очередь заданий единственного потока-писателя.
+
+    Элемент очереди — кортеж, первый элемент которого Future задания.
+    Проверка закрытия в put() и постановка STOP в close() идут под одной
+    блокировкой, поэтому задание не может попасть в очередь после STOP.
+    После остановки писателя close() завершает ошибкой всё, что осталось
+    в очереди, и ни один Future не остаётся без результата.
+    """
+
+    def __init__(self, closed_message: str, maxsize: int = 0) -> None:
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._closed_message = closed_message
+
+    def qsize(self) -> int:
+        """Количество элементов в очереди."""
+        return self._queue.qsize()
+
+    def put(self, future: Future, *payload: Any) -> None:
+        """
+        Поставить задание (future, *payload) в очередь без ожидания.
+
+        Бросает:
+            RuntimeError: если очередь закрыта.
+            queue.Full: если ограниченная очередь заполнена.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(self._closed_message)
+            self._queue.put_nowait((future, *payload))
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Взять задание или STOP; timeout=0 — без ожидания.
+
+        Бросает:
+            queue.Empty: если за timeout секунд ничего не появилось.
+        """
+        if timeout is not None and timeout <= 0:
+            return self._queue.get_nowait()
+        return self._queue.get(timeout=timeout)
+
+    def close(self, writer: threading.Thread) -> bool:
+        """
+        Закрыть очередь, дождаться писателя и отменить оставшиеся задания.
+
+        Возвращает False, если очередь уже была закрыта.
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            self._closed = True
+            self._queue.put(STOP)
+        writer.join()
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not STOP:
+                item[0].set_exception(RuntimeError(self._closed_message))
+        return True